@@ -0,0 +1,24 @@
+"""Linha de comando comum dos benchmarks (bench_*.py).
+
+Cada bench_*.py define um dicionário `benchmarks` (nome -> função) e
+chama `main(benchmarks)`:
+
+    python3 bench_<script>.py <nome> [args inteiros]
+"""
+
+import sys
+
+
+def main(benchmarks, arguments=None):
+    """Executa o benchmark escolhido com os argumentos (inteiros) dados."""
+    if arguments is None:
+        arguments = sys.argv[1:]
+    if not arguments or arguments[0] not in benchmarks:
+        print(f"Uso: {sys.argv[0]} [{'|'.join(benchmarks)}] [args]")
+        sys.exit(1)
+    try:
+        values = [int(arg) for arg in arguments[1:]]
+    except ValueError:
+        print(f"Erro: os argumentos de '{arguments[0]}' devem ser inteiros.")
+        sys.exit(1)
+    benchmarks[arguments[0]](*values)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Benchmarks do dicionário offline (dicionario.py).
+
+Uso:
+    python3 bench_dicionario.py inserts [total]
+    python3 bench_dicionario.py pool [requisições] [latência_ms] [taxa]
+    python3 bench_dicionario.py memory [entradas]
+    python3 bench_dicionario.py startup [entradas]
+
+Os arquivos de dados são criados em um diretório temporário.
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+import bench
+import dicionario
+
+
+def make_entry(i):
+    """Gera uma entrada sintética única"""
+    return {
+        'word': f"palavra{i}",
+        'src_lang': "pt",
+        'target_lang': "en",
+        'translation': f"word{i}",
+    }
+
+
+def new_manager(tmpdir):
+    """Cria um DictionaryManager isolado em `tmpdir`"""
+    manager = dicionario.DictionaryManager(
+        os.path.join(tmpdir, "dictionary_v2.txt"),
+        os.path.join(tmpdir, "dictionary_v2.idx"),
+        trigram_path=None,
+        cache_path=None,
+    )
+    # O histórico não interessa aqui: mede-se apenas índice + armazenamento
+    manager.log_change = lambda action, entry: None
+    return manager
+
+
+def open_manager(tmpdir, snapshot):
+    """Abre o DictionaryManager do benchmark, com ou sem snapshot"""
+    return dicionario.DictionaryManager(
+        os.path.join(tmpdir, "dictionary_v2.txt"),
+        os.path.join(tmpdir, "dictionary_v2.idx"),
+        trigram_path=None, cache_path=None, translator=SlowTranslator(0),
+        snapshot_path=os.path.join(tmpdir, "dictionary_v2.snap")
+        if snapshot else None)
+
+
+def bench_inserts(total=1_000_000):
+    """Inserções em lote: o tempo por inserção deve ficar constante"""
+    print(f"{'inserções':>12} {'total (s)':>10} {'µs/inserção':>12}")
+    size = total // 8
+    while size <= total:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = new_manager(tmpdir)
+            start = time.perf_counter()
+            for i in range(size):
+                manager.add_entry(make_entry(i))
+            # 10% de sobrescritas exercitam o caminho de duplicatas
+            for i in range(0, size, 10):
+                manager.add_entry(make_entry(i), overwrite=True)
+            manager.save_entries()
+            elapsed = time.perf_counter() - start
+            manager.close()
+        print(f"{size:>12} {elapsed:>10.2f} {elapsed / size * 1e6:>12.2f}")
+        size *= 2
+
+
+class SlowTranslator:
+    """Tradutor falso que simula a latência de rede de cada requisição"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def translate(self, texts, src="auto", dest="en"):
+        time.sleep(self.latency)
+        return [dicionario.Translated(text[::-1], src, dest)
+                for text in texts]
+
+
+def bench_pool(requests=200, latency_ms=50, rate=100):
+    """Vazão do TranslationPool conforme o número de threads
+
+    Sem limite de taxa a vazão ideal é workers / latência; o limitador
+    (`rate` requisições/s) deve ser o teto.
+    """
+    translator = SlowTranslator(latency_ms / 1000)
+    chunks = [[f"palavra{i}"] for i in range(requests)]
+    print(f"latência {latency_ms} ms, limite {rate} req/s")
+    print(f"{'workers':>8} {'req/s':>8} {'ideal':>8}")
+    workers = 1
+    while workers <= 32:
+        pool = dicionario.TranslationPool(lambda: translator, workers, rate)
+        start = time.perf_counter()
+        pool.translate_chunks(chunks, "pt", "en")
+        elapsed = time.perf_counter() - start
+        pool.close()
+        ideal = min(workers / translator.latency, rate)
+        print(f"{workers:>8} {requests / elapsed:>8.1f} {ideal:>8.1f}")
+        workers *= 2
+
+
+def measure(build, total):
+    """Bytes alocados por entrada pela estrutura criada por `build`"""
+    tracemalloc.start()
+    result = build()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return allocated / total
+
+
+def write_entries(filepath, total):
+    """Grava `total` entradas sintéticas no formato TSV do dicionário"""
+    with open(filepath, "w", encoding="utf-8") as f:
+        for i in range(total):
+            f.write(f"palavra{i}\tpt\ten\tword{i}\t"
+                    f"2025-02-04T02:50:56.{i % 1_000_000:06d}\n")
+
+
+def legacy_manager(filepath):
+    """Estruturas em memória do gerenciador com entradas em dict
+
+    Reproduz o que o DictionaryManager mantinha antes da Entry compacta:
+    offsets do armazenamento e índice por tupla, entradas em dict de 5
+    chaves e índices de pesquisa (idiomas e trigramas) sobre as tuplas.
+    """
+    offsets = {}
+    index = {}
+    with open(filepath, "rb") as f:
+        offset = 0
+        for line in f:
+            parts = line.decode("utf-8").strip().split("\t")
+            offsets[tuple(parts[:3])] = offset
+            offset += len(line)
+    with open(filepath, "rb") as f:
+        for line in f:
+            entry = dict(zip(dicionario.ENTRY_FIELDS,
+                             line.decode("utf-8").strip().split("\t")))
+            index[dicionario.entry_key(entry)] = entry
+    lang_index = defaultdict(set)
+    text_index = dicionario.TrigramIndex()
+    for key, entry in index.items():
+        lang_index[key[1]].add(key)
+        lang_index[key[2]].add(key)
+        text_index.add(key, entry['word'])
+        text_index.add(key, entry['translation'])
+    return offsets, index, lang_index, text_index
+
+
+def bench_memory(total=200_000):
+    """Memória por entrada do gerenciador inteiro: dicts x Entry compacta
+
+    Mede tudo o que o DictionaryManager mantém por entrada: offsets do
+    armazenamento, índice de entradas e índices de pesquisa.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = os.path.join(tmpdir, "dictionary_v2.txt")
+        write_entries(filepath, total)
+        as_dict = measure(lambda: legacy_manager(filepath), total)
+
+        managers = []
+
+        def build(snapshot):
+            manager = open_manager(tmpdir, snapshot)
+            manager.store.offsets
+            managers.append(manager)
+        as_entry = measure(lambda: build(False), total)
+        managers.pop().close()
+        # A primeira abertura grava o snapshot; mede-se a seguinte
+        build(True)
+        managers.pop().close()
+        as_snapshot = measure(lambda: build(True), total)
+        managers.pop().close()
+        mapped = os.path.getsize(
+            os.path.join(tmpdir, "dictionary_v2.snap")) / total
+    print(f"{'formato':>8} {'bytes/entrada':>14}")
+    print(f"{'dict':>8} {as_dict:>14.1f}")
+    print(f"{'Entry':>8} {as_entry:>14.1f}")
+    print(f"{'snapshot':>8} {as_snapshot:>14.1f}")
+    print(f"redução: {as_dict / as_entry:.2f}x (Entry), "
+          f"{as_dict / as_snapshot:.2f}x (snapshot)")
+    print(f"snapshot mapeado (page cache, fora do heap): "
+          f"{mapped:.1f} bytes/entrada")
+
+
+def bench_startup(total=2_000_000):
+    """Abertura do DictionaryManager: leitura do TSV x snapshot mapeado
+
+    A primeira abertura com snapshot o grava a partir do TSV; as seguintes
+    apenas mapeiam o arquivo. Uma busca exata e uma pesquisa confirmam que
+    as entradas são servidas do snapshot.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_entries(os.path.join(tmpdir, "dictionary_v2.txt"), total)
+        timings = {}
+        for name, snapshot in (("TSV", False), ("gravação", True),
+                               ("snapshot", True)):
+            start = time.perf_counter()
+            manager = open_manager(tmpdir, snapshot)
+            timings[name] = time.perf_counter() - start
+            if name == "snapshot":
+                start = time.perf_counter()
+                found = manager.find_entry(f"palavra{total // 2}", "pt", "en")
+                lookup = time.perf_counter() - start
+                start = time.perf_counter()
+                results = manager.search_entries(f"word{total - 1}")
+                search = time.perf_counter() - start
+            manager.close()
+    print(f"{total} entradas")
+    for name, elapsed in timings.items():
+        print(f"{name:>9} {elapsed * 1000:>10.1f} ms")
+    print(f"redução: {timings['TSV'] / timings['snapshot']:.0f}x")
+    print(f"busca exata {lookup * 1e6:.0f} µs ({found['translation']}), "
+          f"pesquisa {search * 1000:.1f} ms ({len(results)} resultado(s))")
+
+
+benchmarks = {"inserts": bench_inserts, "pool": bench_pool,
+              "memory": bench_memory, "startup": bench_startup}
+
+if __name__ == "__main__":
+    bench.main(benchmarks)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmarks do relatório de alunos por atividade (escola*.py).
+
+Uso:
+    python3 bench_escola.py report [alunos] [salas] [atividades] [inscritos]
+    python3 bench_escola.py workers [alunos] [salas] [atividades] [inscritos]
+                                    [max_workers]
+
+Compara o relatório completo (atividade x sala) feito como em
+escola_v1_com_listas.py (listas), em escola_v2_com_sets.py (sets recriados
+a cada iteração) e em escola_v4_com_bitsets.py (bitsets), e o tempo do
+relatório paralelo (--workers) de escola_v4_com_bitsets.py com 1 até
+`max_workers` processos. A escalabilidade só é medida com vários núcleos:
+com uma única CPU o resultado mostra apenas o custo do pool.
+"""
+
+import os
+import random
+import time
+
+import bench
+import escola_v4_com_bitsets as escola
+
+# A versão com listas é quadrática: mede-se uma amostra das atividades e o
+# tempo total é estimado
+LIST_SAMPLE = 5
+
+
+def make_school(students, rooms, activities, enrolled, seed=42):
+    """Gera salas (partição dos alunos) e atividades aleatórias"""
+    rng = random.Random(seed)
+    names = [f"Aluno{i}" for i in range(students)]
+    per_room = -(-students // rooms)
+    room_list = [(f"sala{r + 1}", names[r * per_room:(r + 1) * per_room])
+                 for r in range(rooms)]
+    activity_list = [(f"Atividade{a + 1}", rng.sample(names, enrolled))
+                     for a in range(activities)]
+    return room_list, activity_list
+
+
+def report_lists(rooms, activities):
+    """Relatório como em escola_v1_com_listas.py"""
+    lines = []
+    for activity_name, activity in activities:
+        for room_name, room in rooms:
+            lines.append((room_name,
+                          [aluno for aluno in activity if aluno in room]))
+    return lines
+
+
+def report_sets(rooms, activities):
+    """Relatório como em escola_v2_com_sets.py"""
+    lines = []
+    for activity_name, activity in activities:
+        for room_name, room in rooms:
+            lines.append((room_name, set(room) & set(activity)))
+    return lines
+
+
+def bench_report(students=100_000, rooms=100, activities=1000, enrolled=500):
+    """Tempo do relatório completo: listas x sets x bitsets"""
+    room_list, activity_list = make_school(students, rooms, activities,
+                                           enrolled)
+    print(f"{students} alunos, {rooms} salas, {activities} atividades "
+          f"com {enrolled} inscritos")
+    print(f"{'versão':>10} {'tempo (s)':>10}")
+
+    sample = activity_list[:LIST_SAMPLE]
+    start = time.perf_counter()
+    report_lists(room_list, sample)
+    lists = (time.perf_counter() - start) * activities / len(sample)
+    print(f"{'listas':>10} {lists:>10.2f} (estimado por {len(sample)} "
+          f"atividades)")
+
+    start = time.perf_counter()
+    report_sets(room_list, activity_list)
+    sets = time.perf_counter() - start
+    print(f"{'sets':>10} {sets:>10.2f}")
+
+    start = time.perf_counter()
+    enrollment = escola.load(room_list, activity_list)
+    loaded = time.perf_counter() - start
+    enrollment.report()
+    bitsets = time.perf_counter() - start
+    print(f"{'bitsets':>10} {bitsets:>10.2f} (carga {loaded:.2f})")
+    print(f"bitsets: {lists / bitsets:,.0f}x mais rápido que listas, "
+          f"{sets / bitsets:,.1f}x mais rápido que sets")
+
+
+def bench_workers(students=1_000_000, rooms=1000, activities=1000,
+                  enrolled=5000, max_workers=os.cpu_count()):
+    """Relatório paralelo de 1 até `max_workers` processos"""
+    room_list, activity_list = make_school(students, rooms, activities,
+                                           enrolled)
+    enrollment = escola.load(room_list, activity_list)
+    del room_list, activity_list
+    print(f"{students} alunos, {rooms} salas, {activities} atividades "
+          f"com {enrolled} inscritos, {os.cpu_count()} CPUs")
+    if (os.cpu_count() or 1) < 2:
+        print("Aviso: uma única CPU; a escalabilidade não é medida, "
+              "apenas o custo do pool.")
+    print(f"{'workers':>8} {'tempo (s)':>10} {'vs 1':>9}")
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        enrollment.cells = {}  # Recalcula todas as células
+        start = time.perf_counter()
+        for _ in enrollment.iter_report(workers):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>8.2f}x")
+        workers *= 2
+
+
+benchmarks = {"report": bench_report, "workers": bench_workers}
+
+if __name__ == "__main__":
+    bench.main(benchmarks)
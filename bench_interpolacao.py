@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmarks da mala direta (interpolacao.py).
+
+Uso:
+    python3 bench_interpolacao.py merge [destinatários]
+
+Os arquivos de entrada são criados em um diretório temporário.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "interpolacao.py")
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "email_tmpl.txt")
+
+
+def make_recipients(filepath, total):
+    """Grava `total` destinatários sintéticos `nome,email`"""
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.writelines(f"Cliente{i},cliente{i}@example.com\n"
+                     for i in range(total))
+
+
+def bench_merge(total=10_000_000):
+    """Vazão e memória máxima conforme o tamanho da lista
+
+    A memória máxima (RSS) deve ficar constante com o crescimento da lista.
+    """
+    print(f"{'destinatários':>14} {'emails/s':>12} {'MB/s':>8} {'RSS (MB)':>9}")
+    size = max(1, total // 100)
+    while size <= total:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            make_recipients(os.path.join(tmpdir, "emails.txt"), size)
+            shutil.copy(TEMPLATE, os.path.join(tmpdir, "email_tmpl.txt"))
+            outpath = os.path.join(tmpdir, "saida.txt")
+            with open(outpath, "w") as out:
+                start = time.perf_counter()
+                pid = subprocess.Popen(
+                    [sys.executable, SCRIPT, "emails.txt", "email_tmpl.txt"],
+                    cwd=tmpdir, stdout=out).pid
+                _, status, usage = os.wait4(pid, 0)
+                elapsed = time.perf_counter() - start
+            written = os.path.getsize(outpath) / 1e6
+        rss = usage.ru_maxrss / 1024  # KiB no Linux
+        print(f"{size:>14} {size / elapsed:>12,.0f} "
+              f"{written / elapsed:>8.1f} {rss:>9.1f}")
+        size *= 10
+
+
+benchmarks = {"merge": bench_merge}
+
+if __name__ == "__main__":
+    bench.main(benchmarks)
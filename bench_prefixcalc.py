@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmarks da calculadora prefixada (prefixcalc.py).
+
+Uso:
+    python3 bench_prefixcalc.py stream [operações]
+    python3 bench_prefixcalc.py workers [operações] [max_workers]
+    python3 bench_prefixcalc.py numeric [operações]
+    python3 bench_prefixcalc.py nested [operações]
+
+Os arquivos de entrada e de log são criados em um diretório temporário.
+Em `workers`, a coluna "vs 1" é a vazão com N processos dividida pela vazão
+com 1; a escalabilidade só é medida com vários núcleos: com uma única CPU o
+resultado mostra apenas o custo do pool.
+"""
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench
+import prefixcalc
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "prefixcalc.py")
+
+
+def make_operations(total, seed=42):
+    """Gera `total` operações aleatórias `operação n1 n2`"""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(prefixcalc.valid_operations)} "
+        f"{rng.randint(1, 10_000)} {rng.randint(1, 10_000)}\n"
+        for _ in range(total)
+    ]
+
+
+def bench_stream(total=1_000_000):
+    """Vazão: um processo por operação x modo streaming"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Um processo por operação (uso atual); poucas amostras bastam
+        samples = 20
+        start = time.perf_counter()
+        for _ in range(samples):
+            subprocess.run([sys.executable, SCRIPT, "sum", "5", "2"],
+                           cwd=tmpdir, stdout=subprocess.DEVNULL, check=True)
+        per_process = samples / (time.perf_counter() - start)
+
+        # Modo streaming, processo inteiro (leitura, saída e log incluídos)
+        inputpath = os.path.join(tmpdir, "operations.txt")
+        with open(inputpath, "w") as f:
+            f.writelines(make_operations(total))
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, f"--stream={inputpath}"],
+                       cwd=tmpdir, stdout=subprocess.DEVNULL, check=True)
+        stream = total / (time.perf_counter() - start)
+
+    print(f"{'modo':>22} {'operações/s':>14}")
+    print(f"{'um processo por op.':>22} {per_process:>14,.0f}")
+    print(f"{'--stream':>22} {stream:>14,.0f} ({stream / per_process:,.0f}x)")
+
+
+def bench_workers(total=4_000_000, max_workers=os.cpu_count()):
+    """Escalabilidade do --workers de 1 até `max_workers` processos"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        inputpath = os.path.join(tmpdir, "operations.txt")
+        with open(inputpath, "w") as f:
+            f.writelines(make_operations(total))
+        print(f"{total} operações, {os.cpu_count()} CPUs")
+        if (os.cpu_count() or 1) < 2:
+            print("Aviso: uma única CPU; a escalabilidade não é medida, "
+                  "apenas o custo do pool.")
+        print(f"{'workers':>8} {'operações/s':>14} {'vs 1':>9}")
+        baseline = None
+        workers = 1
+        while workers <= max_workers:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, SCRIPT, f"--stream={inputpath}",
+                            f"--workers={workers}"],
+                           cwd=tmpdir, stdout=subprocess.DEVNULL, check=True)
+            rate = total / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{workers:>8} {rate:>14,.0f} {rate / baseline:>8.2f}x")
+            workers *= 2
+
+
+def bench_numeric(total=500_000):
+    """Vazão e exatidão de cada modo numérico (--numeric)"""
+    lines = make_operations(total)
+    # Casos em que float perde precisão; int não aceita decimais
+    probes = ("sum 0.1 0.2", "div 1 3")
+    print(f"{'modo':>9} {'operações/s':>14} "
+          + " ".join(f"{probe:>22}" for probe in probes))
+    for numeric in prefixcalc.numeric_backends:
+        start = time.perf_counter()
+        for chunk in prefixcalc.read_chunks(iter(lines)):
+            prefixcalc.evaluate_lines(chunk, numeric=numeric)
+        rate = total / (time.perf_counter() - start)
+        results = []
+        for probe in probes:
+            try:
+                results.append(str(prefixcalc.evaluate_line(probe, numeric)[1]))
+            except prefixcalc.ExpressionError:
+                results.append("inválido")
+        print(f"{numeric:>9} {rate:>14,.0f} "
+              + " ".join(f"{result[:22]:>22}" for result in results))
+
+
+def bench_nested(total=200_000):
+    """Expressões aninhadas: avaliação linha a linha x em grupos por forma"""
+    rng = random.Random(42)
+    lines = [f"sum {rng.randint(1, 99)} mul {rng.randint(1, 99)} "
+             f"{rng.choice(prefixcalc.valid_operations)} "
+             f"{rng.randint(1, 99)} {rng.randint(1, 99)}\n"
+             for _ in range(total)]
+    print(f"{'avaliação':>14} {'operações/s':>14}")
+    start = time.perf_counter()
+    for line in lines:
+        prefixcalc.evaluate_line(line)
+    single = total / (time.perf_counter() - start)
+    print(f"{'linha a linha':>14} {single:>14,.0f}")
+    start = time.perf_counter()
+    for lineno, chunk in enumerate(prefixcalc.read_chunks(iter(lines))):
+        prefixcalc.evaluate_lines(chunk, lineno * prefixcalc.STREAM_CHUNK + 1)
+    grouped = total / (time.perf_counter() - start)
+    print(f"{'por forma':>14} {grouped:>14,.0f} ({grouped / single:.1f}x)")
+
+
+benchmarks = {"stream": bench_stream, "workers": bench_workers,
+              "numeric": bench_numeric, "nested": bench_nested}
+
+if __name__ == "__main__":
+    bench.main(benchmarks)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmarks da tabuada (tabuada.py).
+
+Uso:
+    python3 bench_tabuada.py render [tabuadas] [multiplicadores]
+    python3 bench_tabuada.py workers [tabuadas] [multiplicadores] [max_workers]
+
+Em `render` a saída é descartada (os.devnull), medindo apenas a geração e a
+escrita; em `workers` ela é gravada em um arquivo temporário (--saida), que
+é comparado com o da geração sequencial. A coluna "vs 1" é o tempo com 1
+processo dividido pelo tempo com N; a escalabilidade só é medida com vários
+núcleos: com uma única CPU o resultado mostra apenas o custo do pool.
+"""
+
+import contextlib
+import filecmp
+import os
+import tempfile
+import time
+
+import bench
+import tabuada
+
+
+def print_tables(n1_stop, n2_stop):
+    """Tabuada como na versão original: um print por linha"""
+    for n1 in range(1, n1_stop + 1):
+        print("{:-^18}".format(f"Tabuada do {n1}"))
+        print()
+        for n2 in range(1, n2_stop + 1):
+            resultado = n1 * n2
+            print("{:^18}".format(f"{n1} x {n2} = {resultado}"))
+        print()
+        print()
+        print("#" * 18)
+        print()
+        print()
+
+
+def bench_render(n1_stop=1000, n2_stop=10_000):
+    """Vazão (MB/s) da versão com print x renderizador em cada formato"""
+    print(f"{n1_stop} x {n2_stop} produtos"
+          f"{' (NumPy)' if tabuada.numpy is not None else ''}")
+    print(f"{'versão':>14} {'tempo (s)':>10} {'MB':>8} {'MB/s':>8}")
+    with open(os.devnull, "w") as devnull:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            print_tables(n1_stop, n2_stop)
+        elapsed = time.perf_counter() - start
+    size = sum(map(len, tabuada.render((1, n1_stop), (1, n2_stop)))) / 1e6
+    print(f"{'print':>14} {elapsed:>10.2f} {size:>8.1f} {size / elapsed:>8.1f}")
+
+    for output_format in tabuada.valid_formats:
+        with open(os.devnull, "wb") as devnull:
+            start = time.perf_counter()
+            size = 0
+            for chunk in tabuada.render((1, n1_stop), (1, n2_stop),
+                                        output_format):
+                devnull.write(chunk)
+                size += len(chunk)
+            elapsed = time.perf_counter() - start
+        size /= 1e6
+        print(f"{output_format:>14} {elapsed:>10.2f} {size:>8.1f} "
+              f"{size / elapsed:>8.1f}")
+
+
+def bench_workers(n1_stop=2000, n2_stop=10_000, max_workers=os.cpu_count()):
+    """Gravação em arquivo de 1 até `max_workers` processos"""
+    print(f"{n1_stop} x {n2_stop} produtos, {os.cpu_count()} CPUs")
+    if (os.cpu_count() or 1) < 2:
+        print("Aviso: uma única CPU; a escalabilidade não é medida, "
+              "apenas o custo do pool.")
+    print(f"{'formato':>8} {'workers':>8} {'tempo (s)':>10} {'MB/s':>8} "
+          f"{'vs 1':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        sequential = os.path.join(directory, "sequencial")
+        parallel = os.path.join(directory, "paralelo")
+        for output_format in tabuada.valid_formats:
+            baseline = None
+            workers = 1
+            while workers <= max_workers:
+                path = sequential if workers == 1 else parallel
+                start = time.perf_counter()
+                tabuada.write_file(path, (1, n1_stop), (1, n2_stop),
+                                   output_format, workers)
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                size = os.path.getsize(path) / 1e6
+                same = path == sequential or filecmp.cmp(sequential, path,
+                                                         shallow=False)
+                print(f"{output_format:>8} {workers:>8} {elapsed:>10.2f} "
+                      f"{size / elapsed:>8.1f} {baseline / elapsed:>8.2f}x"
+                      f"{'' if same else '  DIFERENTE DO SEQUENCIAL'}")
+                workers *= 2
+
+
+benchmarks = {"render": bench_render, "workers": bench_workers}
+
+if __name__ == "__main__":
+    bench.main(benchmarks)
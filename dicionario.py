@@ -12,106 +12,1607 @@ Melhorias implementadas:
 - Melhor tratamento de erros
 """
 
+import atexit
+import getpass
+import mmap
 import os
+import pickle
+import sqlite3
+import struct
 import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from googletrans import Translator
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque, namedtuple
+
+from indexacao import TrigramIndex, file_signature
 
 # Configurações
 FILEPATH = os.path.join(os.curdir, "dictionary_v2.txt")
+INDEX_PATH = os.path.join(os.curdir, "dictionary_v2.idx")
+TRIGRAM_PATH = os.path.join(os.curdir, "dictionary_v2.tri")
+SNAPSHOT_PATH = os.path.join(os.curdir, "dictionary_v2.snap")
 HISTORY_PATH = os.path.join(os.curdir, "history.log")
+CACHE_PATH = os.path.join(os.curdir, "translations.db")
 SUPPORTED_LANGUAGES = {'en', 'es', 'fr', 'de', 'pt', 'it', 'ru', 'ja'}
 ENTRY_FIELDS = ['word', 'src_lang', 'target_lang', 'translation', 'timestamp']
 ITEMS_PER_PAGE = 5
+# Compactação: registros obsoletos mínimos e proporção sobre os ativos
+COMPACT_MIN_GARBAGE = 10_000
+COMPACT_RATIO = 1.0
+# Snapshot binário: regravado quando a cauda do TSV ainda não coberta
+# passa desta fração do trecho coberto
+SNAPSHOT_REBUILD_RATIO = 0.1
+# Cache de traduções: limites em memória/disco e validade (segundos)
+CACHE_MAX_ENTRIES = 10_000
+CACHE_MAX_DISK_ENTRIES = 1_000_000
+CACHE_TTL = 30 * 24 * 60 * 60
+CACHE_COMMIT_EVERY = 100
+# Traduções em lote: textos enviados ao tradutor por requisição
+BATCH_CHUNK_SIZE = 50
+# Histórico: intervalo (s) e tamanho máximos do buffer de escrita e
+# quantidade de registros recentes mantidos em memória
+HISTORY_FLUSH_INTERVAL = 5.0
+HISTORY_FLUSH_SIZE = 100
+HISTORY_MEMORY = 1000
+# Pesquisa por período no histórico: tamanho do trecho lido linearmente
+HISTORY_SCAN_BLOCK = 8192
+# Pool de tradução: threads, requisições/s, tentativas e espera inicial (s)
+TRANSLATE_WORKERS = 4
+TRANSLATE_RATE = 10.0
+TRANSLATE_RETRIES = 3
+TRANSLATE_BACKOFF = 0.5
+
+
+def entry_key(entry):
+    """Chave única de uma entrada: (palavra, idioma origem, idioma destino)"""
+    if isinstance(entry, Entry):
+        return entry.key
+    return (entry['word'], entry['src_lang'], entry['target_lang'])
+
+
+class Entry:
+    """Entrada compacta do dicionário com acesso no estilo dict
+
+    A palavra é guardada como str (é a parte da chave mais consultada) e
+    os códigos de idioma são internados e compartilhados entre todas as
+    entradas. Tradução e timestamp ficam juntos em um único bytes UTF-8
+    ("tradução\ttimestamp"), com o timestamp exatamente como foi lido.
+    `entry['word']` e afins continuam funcionando como no dict usado
+    anteriormente.
+
+    A entrada tem o mesmo hash e é igual à sua chave (palavra, idioma
+    origem, idioma destino), então pode ser usada no lugar dela nas buscas:
+    `index.get(entry)` e `index.get((palavra, origem, destino))`. Como duas
+    traduções diferentes da mesma chave são iguais, entradas ficam apenas
+    como valores de dicts indexados pela chave, nunca em conjuntos; os
+    índices de pesquisa guardam as chaves.
+    """
+
+    __slots__ = ('word', 'src_lang', 'target_lang', '_data')
+
+    def __init__(self, word, src_lang, target_lang, translation, timestamp):
+        self.word = word
+        self.src_lang = sys.intern(src_lang)
+        self.target_lang = sys.intern(target_lang)
+        self._data = f"{translation}\t{timestamp}".encode("utf-8")
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """Cria uma entrada a partir de um dict com os campos da entrada"""
+        return cls(*(mapping[field] for field in ENTRY_FIELDS))
+
+    @property
+    def key(self):
+        """Chave da entrada: (palavra, idioma origem, idioma destino)"""
+        return (self.word, self.src_lang, self.target_lang)
+
+    def __hash__(self):
+        return hash((self.word, self.src_lang, self.target_lang))
+
+    def __eq__(self, other):
+        if isinstance(other, Entry):
+            other = other.key
+        return self.key == other
+
+    @property
+    def translation(self):
+        return self._data.decode("utf-8").partition("\t")[0]
+
+    @property
+    def timestamp(self):
+        return self._data.decode("utf-8").partition("\t")[2]
+
+    def __getitem__(self, field):
+        if field not in ENTRY_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field in ('src_lang', 'target_lang'):
+            setattr(self, field, sys.intern(value))
+        elif field == 'word':
+            self.word = value
+        elif field in ('translation', 'timestamp'):
+            fields = {'translation': self.translation,
+                      'timestamp': self.timestamp, field: value}
+            self._data = "{translation}\t{timestamp}".format_map(
+                fields).encode("utf-8")
+        else:
+            raise KeyError(field)
+
+    def get(self, field, default=None):
+        return self[field] if field in ENTRY_FIELDS else default
+
+    def keys(self):
+        return list(ENTRY_FIELDS)
+
+    def update(self, changes):
+        for field, value in changes.items():
+            self[field] = value
+
+    def to_dict(self):
+        return {field: self[field] for field in ENTRY_FIELDS}
+
+    @property
+    def packed(self):
+        """Tradução e timestamp no formato empacotado"""
+        return self._data
+
+    @classmethod
+    def from_packed(cls, word, src_lang, target_lang, packed):
+        """Recria uma entrada a partir dos dados já empacotados"""
+        entry = cls.__new__(cls)
+        entry.word = word
+        entry.src_lang = src_lang
+        entry.target_lang = target_lang
+        entry._data = packed
+        return entry
+
+    def __repr__(self):
+        return f"Entry({self.to_dict()!r})"
+
+
+# Snapshot colunar mapeado em memória: cabeçalho (magic, assinatura do TSV
+# coberto, nº de entradas, lixo do log), diretório de seções (offset,
+# tamanho) e as seções alinhadas em 8 bytes
+SNAPSHOT_MAGIC = b"DICSNAP3"
+SNAPSHOT_HEADER = struct.Struct("<8sQI4xQQ")
+SNAPSHOT_SECTION = struct.Struct("<QQ")
+SNAPSHOT_SECTIONS = ("langs", "src", "target", "bounds", "text", "table",
+                     "grams", "gram_bounds", "gram_ids", "lang_bounds",
+                     "lang_ids", "offsets")
+
+
+def snapshot_hash(word, src_lang, target_lang):
+    """Hash estável da chave, usado na tabela de espalhamento do snapshot"""
+    return zlib.crc32(f"{word}\t{src_lang}\t{target_lang}".encode("utf-8"))
+
+
+def build_snapshot(entries, offsets):
+    """Monta as seções de um snapshot a partir das entradas
+
+    Cada entrada recebe um id (sua posição). As seções guardam:
+    - langs: tabela de idiomas; src/target: id do idioma (uint16);
+    - bounds/text: "palavra\\ttradução\\ttimestamp" de cada entrada;
+    - table: tabela de espalhamento (id + 1, sondagem linear) da chave;
+    - grams/gram_bounds/gram_ids: listas de ids ordenados por trigrama
+      de palavra e tradução;
+    - lang_bounds/lang_ids: ids de cada idioma (origem ou destino);
+    - offsets: offset da linha de cada entrada no TSV, obtido de
+      `offsets` (chave -> offset, como DictionaryStore.offsets).
+    Retorna o nº de entradas e as seções na ordem de SNAPSHOT_SECTIONS.
+    """
+    langs = {}
+    src = array("H")
+    target = array("H")
+    bounds = array("Q", [0])
+    text = []
+    hashes = array("I")
+    grams = defaultdict(lambda: array("I"))
+    lang_ids = defaultdict(lambda: array("I"))
+    positions = array("Q")
+    trigrams = TrigramIndex.trigrams
+    for i, entry in enumerate(entries):
+        s = langs.setdefault(entry.src_lang, len(langs))
+        t = langs.setdefault(entry.target_lang, len(langs))
+        src.append(s)
+        target.append(t)
+        lang_ids[s].append(i)
+        if t != s:
+            lang_ids[t].append(i)
+        word, translation = entry.word, entry.translation
+        line = f"{word}\t{translation}\t{entry.timestamp}".encode("utf-8")
+        text.append(line)
+        bounds.append(bounds[-1] + len(line))
+        hashes.append(snapshot_hash(*entry.key))
+        positions.append(offsets[entry.key])
+        for gram in trigrams(word.lower()) | trigrams(translation.lower()):
+            grams[gram].append(i)
+    count = len(hashes)
+
+    capacity = 8
+    while capacity < 2 * count:
+        capacity *= 2
+    mask = capacity - 1
+    table = array("I", bytes(4 * capacity))
+    for i, h in enumerate(hashes):
+        slot = h & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = i + 1
+
+    gram_bounds = array("Q", [0])
+    gram_ids = array("I")
+    for ids in grams.values():
+        gram_ids.extend(ids)
+        gram_bounds.append(len(gram_ids))
+    lang_bounds = array("Q", [0])
+    flat_lang_ids = array("I")
+    for s in range(len(langs)):
+        flat_lang_ids.extend(lang_ids[s])
+        lang_bounds.append(len(flat_lang_ids))
+
+    return count, [
+        "\n".join(langs).encode("utf-8"),
+        src.tobytes(),
+        target.tobytes(),
+        bounds.tobytes(),
+        b"".join(text),
+        table.tobytes(),
+        "\n".join(grams).encode("utf-8"),
+        gram_bounds.tobytes(),
+        gram_ids.tobytes(),
+        lang_bounds.tobytes(),
+        flat_lang_ids.tobytes(),
+        positions.tobytes(),
+    ]
+
+
+def write_snapshot(path, count, sections, signature, garbage):
+    """Grava as seções montadas por `build_snapshot` de forma atômica
+
+    `garbage` é o lixo do log (DictionaryStore.garbage) no trecho coberto.
+    Os arrays usam a ordem de bytes da máquina: o snapshot é um cache
+    local do TSV.
+    """
+    position = SNAPSHOT_HEADER.size + SNAPSHOT_SECTION.size * len(sections)
+    directory = []
+    for section in sections:
+        position += -position % 8
+        directory.append(SNAPSHOT_SECTION.pack(position, len(section)))
+        position += len(section)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, *signature, count,
+                                     garbage))
+        f.write(b"".join(directory))
+        for section in sections:
+            f.write(bytes(-f.tell() % 8))
+            f.write(section)
+    os.replace(tmp, path)
+
+
+def save_snapshot(path, store, signature):
+    """Grava as entradas de um DictionaryStore em um snapshot colunar"""
+    write_snapshot(path, *build_snapshot(store, store.offsets), signature,
+                   store.garbage)
+
+
+class Snapshot:
+    """Entradas de um snapshot servidas diretamente do mmap
+
+    Nada é convertido em objetos Python ao abrir: cada Entry é montada
+    apenas quando acessada (`entry`), a busca por chave usa a tabela de
+    espalhamento gravada e a pesquisa usa as listas de trigramas gravadas.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        try:
+            magic, size, crc, self.count, self.garbage = \
+                SNAPSHOT_HEADER.unpack_from(self._mmap)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("snapshot em formato desconhecido")
+            self.signature = (size, crc)
+            self._views.append(memoryview(self._mmap))
+            sections = {}
+            for number, name in enumerate(SNAPSHOT_SECTIONS):
+                start, length = SNAPSHOT_SECTION.unpack_from(
+                    self._mmap,
+                    SNAPSHOT_HEADER.size + number * SNAPSHOT_SECTION.size)
+                if start + length > len(self._mmap):
+                    raise ValueError("snapshot truncado")
+                sections[name] = (start, length)
+            self.langs = [sys.intern(lang) for lang in self._section(
+                sections, "langs").decode("utf-8").split("\n")]
+            self.src = self._array(sections, "src", "H")
+            self.target = self._array(sections, "target", "H")
+            self.bounds = self._array(sections, "bounds", "Q")
+            self._text_start = sections["text"][0]
+            self.table = self._array(sections, "table", "I")
+            self._grams = sections["grams"]
+            self._gram_positions = None
+            self.gram_bounds = self._array(sections, "gram_bounds", "Q")
+            self.gram_ids = self._array(sections, "gram_ids", "I")
+            self.lang_bounds = self._array(sections, "lang_bounds", "Q")
+            self.lang_ids = self._array(sections, "lang_ids", "I")
+            self.offsets = self._array(sections, "offsets", "Q")
+        except (ValueError, TypeError, struct.error):
+            self.close()
+            raise
+
+    def _section(self, sections, name):
+        start, length = sections[name]
+        return self._mmap[start:start + length]
+
+    def _array(self, sections, name, typecode):
+        start, length = sections[name]
+        view = self._views[0][start:start + length].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def close(self):
+        """Libera as visões e desfaz o mapeamento"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __len__(self):
+        return self.count
+
+    def _line(self, i):
+        start = self._text_start
+        return self._mmap[start + self.bounds[i]:start + self.bounds[i + 1]]
+
+    def key(self, i):
+        """Chave (palavra, origem, destino) do id `i`"""
+        line = self._line(i)
+        return (line[:line.index(b"\t")].decode("utf-8"),
+                self.langs[self.src[i]], self.langs[self.target[i]])
+
+    def entry(self, i):
+        """Monta a Entry de id `i`"""
+        line = self._line(i)
+        tab = line.index(b"\t")
+        return Entry.from_packed(line[:tab].decode("utf-8"),
+                                 self.langs[self.src[i]],
+                                 self.langs[self.target[i]],
+                                 line[tab + 1:])
+
+    def find(self, key):
+        """Id da entrada com a chave (palavra, origem, destino), ou -1"""
+        word, src_lang, target_lang = key
+        prefix = word.encode("utf-8") + b"\t"
+        mask = len(self.table) - 1
+        slot = snapshot_hash(word, src_lang, target_lang) & mask
+        while True:
+            i = self.table[slot] - 1
+            if i < 0:
+                return -1
+            if self.langs[self.src[i]] == src_lang and \
+                    self.langs[self.target[i]] == target_lang and \
+                    self._line(i).startswith(prefix):
+                return i
+            slot = (slot + 1) & mask
+
+    def candidates(self, term):
+        """Ids que podem conter o termo, ou None se ele for curto demais
+
+        As listas gravadas estão ordenadas: a menor é filtrada por busca
+        binária nas demais, sem criar conjuntos com milhões de ids.
+        """
+        grams = TrigramIndex.trigrams(term)
+        if not grams:
+            return None
+        if self._gram_positions is None:
+            start, length = self._grams
+            names = self._mmap[start:start + length].decode("utf-8")
+            self._gram_positions = {
+                gram: number
+                for number, gram in enumerate(names.split("\n"))
+            } if length else {}
+        lists = []
+        for gram in grams:
+            number = self._gram_positions.get(gram)
+            if number is None:
+                return []
+            lists.append(self.gram_ids[self.gram_bounds[number]:
+                                       self.gram_bounds[number + 1]])
+        lists.sort(key=len)
+        result = lists[0].tolist()
+        for ids in lists[1:]:
+            if not result:
+                break
+            result = [i for i in result
+                      if (position := bisect_left(ids, i)) < len(ids)
+                      and ids[position] == i]
+        return result
+
+    def lang_candidates(self, term):
+        """Ids das entradas com idioma (origem ou destino) contendo o termo"""
+        for number, lang in enumerate(self.langs):
+            if term in lang.lower():
+                yield from self.lang_ids[self.lang_bounds[number]:
+                                         self.lang_bounds[number + 1]]
+
+
+def load_snapshot(path, datapath):
+    """Abre um snapshot via mmap, sem ler as entradas
+
+    Retorna o Snapshot e quantos bytes de `datapath` ele cobre; se o
+    snapshot estiver ausente ou não corresponder mais ao arquivo de
+    dados, retorna (None, 0).
+    """
+    try:
+        snapshot = Snapshot(path)
+    except (OSError, ValueError, TypeError, struct.error):
+        return None, 0
+    size = snapshot.signature[0]
+    try:
+        valid = size <= os.path.getsize(datapath) and \
+            file_signature(datapath, size) == snapshot.signature
+    except OSError:
+        valid = False
+    if not valid:
+        snapshot.close()
+        return None, 0
+    return snapshot, size
+
+
+_MISSING = object()
+
+
+class EntryIndex:
+    """Índice de entradas: snapshot mapeado + alterações em memória
+
+    Comporta-se como o dict chave -> Entry usado pelo gerenciador (busca
+    pela Entry ou pela tupla da chave). As entradas do snapshot continuam
+    no mmap; removidas ou substituídas, seus ids vão para `removed`, e o
+    que foi adicionado depois dele fica em `overlay`, indexado pela tupla
+    da chave. A iteração segue a
+    ordem de inserção: snapshot primeiro, depois o overlay.
+    """
+
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot
+        self.removed = set()
+        self.overlay = {}
+
+    def _base_id(self, key):
+        if self.snapshot is None:
+            return -1
+        i = self.snapshot.find(key.key if isinstance(key, Entry) else key)
+        return -1 if i in self.removed else i
+
+    def get(self, key, default=None):
+        entry = self.overlay.get(key)
+        if entry is not None:
+            return entry
+        i = self._base_id(key)
+        return default if i < 0 else self.snapshot.entry(i)
+
+    def __getitem__(self, key):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __contains__(self, key):
+        return key in self.overlay or self._base_id(key) >= 0
+
+    def __setitem__(self, key, entry):
+        # Uma entrada do snapshot substituída passa para o fim da ordem
+        i = self._base_id(key)
+        if i >= 0:
+            self.removed.add(i)
+        self.overlay[key.key if isinstance(key, Entry) else key] = entry
+
+    def __delitem__(self, key):
+        if key in self.overlay:
+            del self.overlay[key]
+            return
+        i = self._base_id(key)
+        if i < 0:
+            raise KeyError(key)
+        self.removed.add(i)
+
+    def pop(self, key, default=_MISSING):
+        entry = self.get(key)
+        if entry is None:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        del self[key]
+        return entry
+
+    def __len__(self):
+        base = 0 if self.snapshot is None else len(self.snapshot)
+        return base - len(self.removed) + len(self.overlay)
+
+    def base_ids(self):
+        """Ids ativos do snapshot, em ordem"""
+        if self.snapshot is not None:
+            removed = self.removed
+            for i in range(len(self.snapshot)):
+                if i not in removed:
+                    yield i
+
+    def __iter__(self):
+        if self.snapshot is not None:
+            entry = self.snapshot.entry
+            for i in self.base_ids():
+                yield entry(i)
+        yield from self.overlay.values()
+
+    def values(self):
+        return iter(self)
+
+    def candidates(self, term):
+        """Entradas do snapshot que podem conter o termo (ou None)"""
+        if self.snapshot is None:
+            return []
+        ids = self.snapshot.candidates(term)
+        if ids is None:
+            return None
+        return [self.snapshot.entry(i) for i in ids if i not in self.removed]
+
+    def lang_candidates(self, term):
+        """Entradas do snapshot com idioma contendo o termo"""
+        if self.snapshot is None:
+            return []
+        return [self.snapshot.entry(i)
+                for i in self.snapshot.lang_candidates(term)
+                if i not in self.removed]
+
+    def close(self):
+        """Desfaz o mapeamento do snapshot"""
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+
+class OffsetIndex:
+    """Índice chave -> offset servido pela coluna de offsets do snapshot
+
+    Substitui o dict carregado do `.idx` no DictionaryStore enquanto há um
+    snapshot aberto, com as mesmas operações usadas por ele. As chaves do
+    snapshot são resolvidas pela tabela de espalhamento e pela coluna
+    `offsets`; removidas ou regravadas, seus ids vão para `removed`, e os
+    offsets gravados depois ficam em `overlay`. O snapshot pertence ao
+    EntryIndex do gerenciador, que o desmapeia.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.removed = set()
+        self.overlay = {}
+
+    def _base_id(self, key):
+        i = self.snapshot.find(key)
+        return -1 if i in self.removed else i
+
+    def get(self, key, default=None):
+        offset = self.overlay.get(key)
+        if offset is not None:
+            return offset
+        i = self._base_id(key)
+        return default if i < 0 else self.snapshot.offsets[i]
+
+    def __getitem__(self, key):
+        offset = self.get(key)
+        if offset is None:
+            raise KeyError(key)
+        return offset
+
+    def __contains__(self, key):
+        return key in self.overlay or self._base_id(key) >= 0
+
+    def __setitem__(self, key, offset):
+        if key not in self.overlay:
+            i = self._base_id(key)
+            if i >= 0:
+                self.removed.add(i)
+        self.overlay[key] = offset
+
+    def pop(self, key, default=None):
+        offset = self.overlay.pop(key, None)
+        if offset is not None:
+            return offset
+        i = self._base_id(key)
+        if i < 0:
+            return default
+        self.removed.add(i)
+        return self.snapshot.offsets[i]
+
+    def __len__(self):
+        return len(self.snapshot) - len(self.removed) + len(self.overlay)
+
+    def items(self):
+        snapshot, removed = self.snapshot, self.removed
+        for i in range(len(snapshot)):
+            if i not in removed:
+                yield snapshot.key(i), snapshot.offsets[i]
+        yield from self.overlay.items()
+
+
+# Resultados devolvidos pelo CachedTranslator (mesmos atributos usados do
+# googletrans)
+Translated = namedtuple("Translated", ["text", "src", "dest"])
+Detected = namedtuple("Detected", ["lang"])
+
+
+class TranslationCache:
+    """Cache de traduções: LRU em memória apoiado em um SQLite em disco
+
+    As chaves são (texto, idioma origem, idioma destino). Itens mais
+    antigos que `ttl` segundos são ignorados e descartados; a memória
+    guarda até `max_entries` itens e o disco até `max_disk_entries`.
+    Com `path=None` o cache existe apenas em memória.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES,
+                 max_disk_entries=CACHE_MAX_DISK_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "text TEXT, src TEXT, dest TEXT, translation TEXT, "
+                "created REAL, PRIMARY KEY (text, src, dest))")
+            self.db.execute("CREATE INDEX IF NOT EXISTS translations_created "
+                            "ON translations (created)")
+
+    def _remember(self, key, value, created):
+        """Coloca um item no LRU em memória, descartando o mais antigo"""
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, text, src, dest):
+        """Retorna a tradução em cache ou None"""
+        key = (text, src, dest)
+        expired = time.time() - self.ttl
+        with self._lock:
+            value, created = self.memory.get(key, (None, 0))
+            if value is not None and created < expired:
+                del self.memory[key]
+                value = None
+            if value is None and self.db is not None:
+                row = self.db.execute(
+                    "SELECT translation, created FROM translations "
+                    "WHERE text = ? AND src = ? AND dest = ? AND created >= ?",
+                    (*key, expired)).fetchone()
+                if row:
+                    value, created = row
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value, created)
+            return value
+
+    def set(self, text, src, dest, translation):
+        """Guarda uma tradução na memória e no disco"""
+        key = (text, src, dest)
+        created = time.time()
+        with self._lock:
+            self._remember(key, translation, created)
+            if self.db is None:
+                return
+            self.db.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                (*key, translation, created))
+            self._pending += 1
+            if self._pending >= CACHE_COMMIT_EVERY:
+                self._commit()
+
+    def _commit(self):
+        """Aplica os limites de validade/tamanho e grava no disco"""
+        self.db.execute("DELETE FROM translations WHERE created < ?",
+                        (time.time() - self.ttl,))
+        self.db.execute(
+            "DELETE FROM translations WHERE rowid IN (SELECT rowid FROM "
+            "translations ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,))
+        self.db.commit()
+        self._pending = 0
+
+    def stats(self):
+        """Contadores de acertos/falhas do cache"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        """Grava as alterações pendentes e fecha o banco"""
+        with self._lock:
+            if self.db is not None:
+                self._commit()
+                self.db.close()
+                self.db = None
+
+
+class TokenBucket:
+    """Limitador de taxa por balde de fichas
+
+    Permite em média `rate` chamadas por segundo, com rajadas de até
+    `burst` chamadas. `acquire` bloqueia até haver uma ficha disponível.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Consome uma ficha, esperando se necessário"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens +
+                                  (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class TranslationPool:
+    """Executa requisições de tradução concorrentes em um pool de threads
+
+    Cada requisição passa pelo limitador de taxa e, em caso de erro, é
+    repetida até `retries` vezes com espera exponencial a partir de
+    `backoff` segundos. Os resultados voltam na ordem de entrada.
+
+    O Translator do googletrans guarda um cliente httpx com estado próprio
+    (conexões, token) e não é seguro para uso simultâneo: cada thread cria
+    o seu tradutor com `factory()` no primeiro uso.
+    """
+
+    def __init__(self, factory, workers=TRANSLATE_WORKERS,
+                 rate=TRANSLATE_RATE, retries=TRANSLATE_RETRIES,
+                 backoff=TRANSLATE_BACKOFF):
+        self.factory = factory
+        self._local = threading.local()
+        self.retries = retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate, burst=workers) if rate else None
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    @property
+    def translator(self):
+        """Tradutor da thread atual, criado no primeiro uso"""
+        translator = getattr(self._local, 'translator', None)
+        if translator is None:
+            translator = self._local.translator = self.factory()
+        return translator
+
+    def _translate(self, texts, src, dest):
+        """Uma requisição com limite de taxa e novas tentativas"""
+        for attempt in range(self.retries + 1):
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                return self.translator.translate(texts, src=src, dest=dest)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def translate_chunks(self, chunks, src, dest):
+        """Traduz cada bloco de textos concorrentemente, na ordem dada"""
+        futures = [self.executor.submit(self._translate, chunk, src, dest)
+                   for chunk in chunks]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Encerra as threads do pool"""
+        self.executor.shutdown()
+
+
+class CachedTranslator:
+    """Tradutor com cache, com a mesma interface usada do googletrans
+
+    `translator` pode ser qualquer objeto com `detect(texto)` e
+    `translate(texto, src=..., dest=...)`, o que permite usar um tradutor
+    falso em testes sem acesso à rede.
+    """
+
+    def __init__(self, translator, cache):
+        self.translator = translator
+        self.cache = cache
+
+    def detect(self, text):
+        """Detecta o idioma do texto, consultando o cache antes"""
+        lang = self.cache.get(text, "auto", "detect")
+        if lang is None:
+            lang = self.translator.detect(text).lang
+            self.cache.set(text, "auto", "detect", lang)
+        return Detected(lang)
+
+    def translate(self, text, src="auto", dest="en"):
+        """Traduz o texto, consultando o cache antes"""
+        translation = self.cache.get(text, src, dest)
+        if translation is None:
+            translation = self.translator.translate(
+                text, src=src, dest=dest).text
+            self.cache.set(text, src, dest, translation)
+        return Translated(translation, src, dest)
+
+    def translate_many(self, texts, src="auto", dest="en",
+                       chunk_size=BATCH_CHUNK_SIZE, pool=None):
+        """Traduz vários textos, mantendo a ordem de entrada
+
+        Apenas os textos ausentes do cache são enviados ao tradutor, em
+        blocos de `chunk_size` textos por requisição. Com um
+        TranslationPool, os blocos são enviados concorrentemente.
+        """
+        results = [self.cache.get(text, src, dest) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        chunks = [missing[start:start + chunk_size]
+                  for start in range(0, len(missing), chunk_size)]
+        batches = [[texts[i] for i in chunk] for chunk in chunks]
+        if pool is not None:
+            translated = pool.translate_chunks(batches, src, dest)
+        else:
+            translated = [self.translator.translate(batch, src=src, dest=dest)
+                          for batch in batches]
+        for chunk, objs in zip(chunks, translated):
+            for i, obj in zip(chunk, objs):
+                results[i] = obj.text
+                self.cache.set(texts[i], src, dest, obj.text)
+        return [Translated(result, src, dest) for result in results]
+
+
+def current_user():
+    """Usuário atual, sem depender de um terminal
+
+    `os.getlogin()` falha sem TTY (cron, containers); `getpass.getuser()`
+    consulta as variáveis de ambiente e a base de usuários.
+    """
+    try:
+        return getpass.getuser()
+    except (OSError, KeyError):
+        return "anonymous"
+
+
+class HistoryWriter:
+    """Escrita do histórico de alterações em lotes
+
+    As linhas são acumuladas e gravadas juntas quando o buffer atinge
+    `flush_size` linhas, `flush_interval` segundos após a primeira linha
+    pendente, ou ao fechar. Apenas os `maxlen` registros mais recentes
+    ficam em memória (`recent`).
+    """
+
+    def __init__(self, path=HISTORY_PATH, flush_interval=HISTORY_FLUSH_INTERVAL,
+                 flush_size=HISTORY_FLUSH_SIZE, maxlen=HISTORY_MEMORY):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.user = current_user()
+        self.recent = deque(maxlen=maxlen)
+        self._buffer = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def write(self, action, entries):
+        """Registra uma mesma ação sobre várias entradas"""
+        now = datetime.now()
+        lines = [
+            f"{now} | {action} | {entry['word']} | "
+            f"{entry['src_lang']}-{entry['target_lang']} | "
+            f"user: {self.user}"
+            for entry in entries
+        ]
+        with self._lock:
+            self.recent.extend(lines)
+            self._buffer.extend(lines)
+            if len(self._buffer) >= self.flush_size:
+                self._flush()
+            elif self._timer is None and self._buffer:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in self._buffer))
+        self._buffer.clear()
+
+    def flush(self):
+        """Grava as linhas pendentes no arquivo"""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Grava as linhas pendentes; chamado ao encerrar"""
+        self.flush()
+
+
+def parse_history_line(line):
+    """Converte uma linha do histórico em dict; None se malformada"""
+    parts = line.rstrip("\n").split(" | ")
+    if len(parts) < 5 or not parts[-1].startswith("user: "):
+        return None
+    try:
+        timestamp = datetime.fromisoformat(parts[0])
+    except ValueError:
+        return None
+    return {
+        'timestamp': timestamp,
+        'action': parts[1],
+        'word': " | ".join(parts[2:-2]),
+        'langs': parts[-2],
+        'user': parts[-1][len("user: "):],
+    }
+
+
+def read_history(path=HISTORY_PATH, start=None, end=None):
+    """Gera os registros do histórico entre `start` e `end` (datetimes)
+
+    O arquivo está em ordem cronológica, então o início do período é
+    localizado por busca binária nos offsets; apenas o trecho final de
+    até HISTORY_SCAN_BLOCK bytes e os registros do período são lidos.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        lo, hi = 0, os.path.getsize(path)
+        while start is not None and hi - lo > HISTORY_SCAN_BLOCK:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()  # Descarta a linha parcial
+            record = parse_history_line(f.readline().decode("utf-8"))
+            if record is not None and record['timestamp'] < start:
+                lo = mid
+            else:
+                hi = mid
+        f.seek(lo)
+        if lo:
+            f.readline()
+        for line in f:
+            record = parse_history_line(line.decode("utf-8"))
+            if record is None:
+                continue
+            if start is not None and record['timestamp'] < start:
+                continue
+            if end is not None and record['timestamp'] > end:
+                break
+            yield record
+
+
+class DictionaryStore:
+    """Armazenamento em log append-only com índice de offsets persistido
+
+    O arquivo de dados continua no formato TSV de 5 colunas. Adições e
+    edições acrescentam uma nova linha ao final (a última vence) e remoções
+    acrescentam uma "lápide" com apenas as 3 colunas da chave, que leitores
+    antigos ignoram por não ter 5 campos. O índice chave -> offset é salvo
+    em `index_path` junto com a assinatura da parte já indexada; ao abrir,
+    apenas a cauda não indexada do arquivo é relida. Com um snapshot
+    (`attach_snapshot`), os offsets vêm da coluna gravada nele e o `.idx`
+    não é lido nem regravado. Registros obsoletos são descartados por uma
+    compactação executada em segundo plano.
+    """
+
+    def __init__(self, filepath=FILEPATH, index_path=INDEX_PATH):
+        self.filepath = filepath
+        self.index_path = index_path
+        self._offsets = None
+        self.garbage = 0
+        self._lock = threading.RLock()
+        self._compactor = None
+        self._index_dirty = False
+        if not os.path.exists(self.filepath):
+            open(self.filepath, "wb").close()
+        with open(self.filepath, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    # Garante que o próximo registro comece em uma nova linha
+                    f.write(b"\n")
+        self._writer = open(self.filepath, "ab")
+        self._reader = open(self.filepath, "rb")
+
+    @property
+    def offsets(self):
+        """Índice chave -> offset, carregado no primeiro uso"""
+        if self._offsets is None:
+            with self._lock:
+                if self._offsets is None:
+                    self._load_index()
+        return self._offsets
+
+    @staticmethod
+    def _parse(line):
+        """Converte uma linha do arquivo em chave e campos
+
+        Os códigos de idioma são internados: milhões de chaves passam a
+        compartilhar as mesmas poucas strings.
+        """
+        parts = line.decode("utf-8").strip().split("\t")
+        if len(parts) >= 3:
+            parts[1] = sys.intern(parts[1])
+            parts[2] = sys.intern(parts[2])
+        return tuple(parts[:3]), parts
+
+    def _load_index(self):
+        """Carrega o índice salvo e indexa a cauda ainda não indexada"""
+        self._writer.flush()
+        size = os.path.getsize(self.filepath)
+        self._offsets = {}
+        self.garbage = 0
+        start = 0
+        try:
+            with open(self.index_path, "rb") as f:
+                saved = pickle.load(f)
+            indexed = saved['signature'][0]
+            if indexed <= size and \
+                    file_signature(self.filepath, indexed) == saved['signature']:
+                self._offsets = saved['offsets']
+                self.garbage = saved['garbage']
+                start = indexed
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+            pass
+
+        with open(self.filepath, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                self._replay(offset, line)
+                offset += len(line)
+        self._index_dirty = start != size
+
+    def attach_snapshot(self, snapshot, size):
+        """Resolve os offsets pelo snapshot, que cobre `size` bytes do log
+
+        Evita carregar o `.idx` (ou reler o arquivo inteiro) na primeira
+        escrita: apenas a cauda gravada depois do snapshot é reaplicada. Se
+        o índice já foi carregado, ele continua em uso.
+        """
+        with self._lock:
+            if self._offsets is not None:
+                return
+            self._writer.flush()
+            self._offsets = OffsetIndex(snapshot)
+            self.garbage = snapshot.garbage
+            with open(self.filepath, "rb") as f:
+                f.seek(size)
+                offset = size
+                for line in f:
+                    self._replay(offset, line)
+                    offset += len(line)
+
+    def _replay(self, offset, line, offsets=None):
+        """Aplica um registro do log ao índice; retorna o lixo gerado"""
+        offsets = self._offsets if offsets is None else offsets
+        if not line.strip():
+            return 0
+        key, parts = self._parse(line)
+        if len(parts) == 5:
+            dead = 1 if key in offsets else 0
+            offsets[key] = offset
+        elif len(parts) == 3:
+            dead = 2 if offsets.pop(key, None) is not None else 1
+        else:
+            dead = 1
+        if offsets is self._offsets:
+            self.garbage += dead
+        return dead
+
+    def save_index(self):
+        """Persiste o índice de offsets de forma atômica
+
+        Com um snapshot anexado nada é gravado: o `.idx` anterior continua
+        válido para o trecho que cobre e o snapshot guarda os offsets.
+        """
+        with self._lock:
+            if isinstance(self._offsets, OffsetIndex):
+                self._index_dirty = False
+                return
+            self._writer.flush()
+            state = {
+                'signature': file_signature(self.filepath,
+                                            self._writer.tell()),
+                'offsets': self.offsets,
+                'garbage': self.garbage,
+            }
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.index_path)
+            self._index_dirty = False
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def __iter__(self):
+        """Percorre as entradas ativas na ordem do arquivo"""
+        with self._lock:
+            self._writer.flush()
+            live = {offset: key for key, offset in self.offsets.items()}
+            end = self._writer.tell()
+        with open(self.filepath, "rb") as f:
+            offset = 0
+            for line in f:
+                if offset >= end:
+                    break
+                key = live.get(offset)
+                if key is not None:
+                    parts = self._parse(line)[1]
+                    # Reaproveita as strings da chave já indexada
+                    parts[:3] = key
+                    yield self._to_entry(parts)
+                offset += len(line)
+
+    def iter_log(self, start=0):
+        """Percorre os registros do log a partir do offset `start`
+
+        Gera (chave, Entry) para adições/edições e (chave, None) para
+        remoções, na ordem em que foram gravados.
+        """
+        self.flush()
+        with open(self.filepath, "rb") as f:
+            f.seek(start)
+            for line in f:
+                key, parts = self._parse(line)
+                if len(parts) == 5:
+                    yield key, self._to_entry(parts)
+                elif len(parts) == 3:
+                    yield key, None
+
+    def size(self):
+        """Tamanho atual do arquivo de dados, incluindo escritas pendentes"""
+        with self._lock:
+            self._writer.flush()
+            return self._writer.tell()
+
+    @staticmethod
+    def _to_entry(parts):
+        return Entry(*parts)
+
+    def get(self, key):
+        """Lê uma entrada diretamente pelo offset indexado"""
+        with self._lock:
+            offset = self.offsets.get(key)
+            if offset is None:
+                return None
+            self._writer.flush()
+            self._reader.seek(offset)
+            return self._to_entry(self._parse(self._reader.readline())[1])
+
+    def put(self, entry):
+        """Acrescenta (ou substitui) uma entrada ao final do log"""
+        self.put_many([entry])
+
+    def put_many(self, entries):
+        """Acrescenta várias entradas ao log com uma única escrita"""
+        with self._lock:
+            offset = self._writer.tell()
+            lines = []
+            for entry in entries:
+                key = entry_key(entry)
+                line = ("\t".join(entry[field] for field in ENTRY_FIELDS)
+                        + "\n").encode("utf-8")
+                if key in self.offsets:
+                    self.garbage += 1
+                self.offsets[key] = offset
+                offset += len(line)
+                lines.append(line)
+            self._writer.write(b"".join(lines))
+            self._index_dirty = True
+        self._maybe_compact()
+
+    def delete(self, key):
+        """Registra a remoção de uma entrada com uma lápide"""
+        with self._lock:
+            if self.offsets.pop(key, None) is None:
+                return False
+            self._writer.write(("\t".join(key) + "\n").encode("utf-8"))
+            self.garbage += 2
+            self._index_dirty = True
+        self._maybe_compact()
+        return True
+
+    def flush(self):
+        """Descarrega as escritas pendentes para o arquivo"""
+        with self._lock:
+            self._writer.flush()
+
+    def _maybe_compact(self):
+        """Dispara a compactação quando o lixo supera o limite"""
+        if self.garbage < COMPACT_MIN_GARBAGE or \
+                self.garbage < COMPACT_RATIO * len(self.offsets):
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+
+    def compact(self):
+        """Reescreve o arquivo apenas com as entradas ativas
+
+        A cópia principal é feita sem bloquear novas escritas; apenas a
+        cauda acrescentada durante a cópia é transferida com o lock.
+        """
+        with self._lock:
+            self._writer.flush()
+            end = self._writer.tell()
+            snapshot = sorted(self.offsets.items(), key=lambda kv: kv[1])
+        tmp = self.filepath + ".compact"
+        offsets = {}
+        with open(self.filepath, "rb") as src, open(tmp, "wb") as dst:
+            for key, offset in snapshot:
+                src.seek(offset)
+                offsets[key] = dst.tell()
+                dst.write(src.readline())
+            with self._lock:
+                self._writer.flush()
+                src.seek(end)
+                garbage = 0
+                for line in src:
+                    garbage += self._replay(dst.tell(), line, offsets)
+                    dst.write(line)
+                dst.flush()
+                os.fsync(dst.fileno())
+                self._writer.close()
+                self._reader.close()
+                os.replace(tmp, self.filepath)
+                self._writer = open(self.filepath, "ab")
+                self._reader = open(self.filepath, "rb")
+                self._offsets = offsets
+                self.garbage = garbage
+                self.save_index()
+
+    def close(self):
+        """Aguarda a compactação, salva o índice e fecha os arquivos"""
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._writer.closed:
+                return
+            if self._index_dirty:
+                self.save_index()
+            self._writer.close()
+            self._reader.close()
 
 
 class DictionaryManager:
     """Classe principal para gerenciamento do dicionário"""
 
-    def __init__(self):
-        self.entries = self.load_entries()
-        self.history = []
-        self.translator = Translator()
+    def __init__(self, filepath=FILEPATH, index_path=INDEX_PATH,
+                 trigram_path=TRIGRAM_PATH, translator=None,
+                 cache_path=CACHE_PATH, workers=TRANSLATE_WORKERS,
+                 rate=TRANSLATE_RATE, snapshot_path=SNAPSHOT_PATH,
+                 history_path=HISTORY_PATH):
+        self.closed = False
+        self.store = DictionaryStore(filepath, index_path)
+        self.snapshot_path = snapshot_path
+        # Índice chave -> entrada (EntryIndex): buscado pela tupla
+        # (palavra, origem, destino) ou pela própria Entry. A
+        # iteração preserva a ordem em que as entradas foram
+        # adicionadas/atualizadas
+        self.index = self.load_index()
+        self.trigram_path = trigram_path
+        self.load_search_index()
+        self.history = HistoryWriter(history_path)
+        self.cache = TranslationCache(cache_path)
+        # Um tradutor informado (ex.: um tradutor falso em testes) é
+        # compartilhado por todas as threads e deve ser thread-safe; sem
+        # ele, cada thread do pool cria o seu Translator
+        if translator is None:
+            factory = Translator
+            translator = Translator()
+        else:
+            factory = lambda: translator
+        self.translator = CachedTranslator(translator, self.cache)
+        self.pool = TranslationPool(factory, workers, rate)
+        # Registrado só agora: close usa histórico, cache e pool
+        atexit.register(self.close)
+
+    def load_index(self):
+        """Abre o índice de entradas sobre o snapshot mapeado em memória
 
-    def load_entries(self):
-        """Carrega entradas do arquivo"""
-        entries = []
-        if not os.path.exists(FILEPATH):
-            return entries
+        Com um snapshot válido, apenas a cauda do TSV gravada depois dele é
+        lida. Ausente ou desatualizado, o snapshot é regravado a partir do
+        TSV antes de ser mapeado; sem `snapshot_path`, todas as entradas
+        ficam em memória.
+        """
+        snapshot, self.snapshot_size = None, 0
+        self.snapshot_signature = None
+        if self.snapshot_path:
+            snapshot, self.snapshot_size = load_snapshot(self.snapshot_path,
+                                                         self.store.filepath)
+            size = self.store.size()
+            if snapshot is None and size:
+                save_snapshot(self.snapshot_path, self.store,
+                              file_signature(self.store.filepath, size))
+                snapshot, self.snapshot_size = load_snapshot(
+                    self.snapshot_path, self.store.filepath)
+        if snapshot is not None:
+            self.snapshot_signature = snapshot.signature
+            self.store.attach_snapshot(snapshot, self.snapshot_size)
+        index = EntryIndex(snapshot)
+        for key, entry in self.store.iter_log(self.snapshot_size):
+            index.pop(key, None)
+            if entry is not None:
+                index[entry] = entry
+        return index
 
-        with open(FILEPATH, "r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                parts = line.strip().split("\t")
-                if len(parts) != 5:
-                    continue
-                entries.append({
-                    'word': parts[0],
-                    'src_lang': parts[1],
-                    'target_lang': parts[2],
-                    'translation': parts[3],
-                    'timestamp': parts[4]
-                })
-        return entries
+    def load_search_index(self):
+        """Carrega os índices de pesquisa ou os reconstrói das entradas
+
+        As entradas do snapshot são pesquisadas pelas listas gravadas nele;
+        estes índices em memória cobrem apenas as demais (o overlay). Sem
+        snapshot, o índice de trigramas é persistido em `trigram_path`.
+        """
+        self.lang_index = defaultdict(set)
+        for entry in self.index.overlay.values():
+            self.lang_index[entry.src_lang].add(entry.key)
+            self.lang_index[entry.target_lang].add(entry.key)
+        self.search_dirty = False
+        if self.trigram_path and not self.snapshot_path:
+            self.text_index, size = TrigramIndex.load(self.trigram_path,
+                                                      self.store.filepath)
+            if size and size == os.path.getsize(self.store.filepath):
+                return
+        self.text_index = TrigramIndex()
+        for entry in self.index.overlay.values():
+            self.text_index.add(entry.key, entry.word)
+            self.text_index.add(entry.key, entry.translation)
+        self.search_dirty = True
+
+    def _index_search(self, entry):
+        """Inclui uma entrada nos índices de pesquisa"""
+        self.text_index.add(entry.key, entry.word)
+        self.text_index.add(entry.key, entry.translation)
+        self.lang_index[entry.src_lang].add(entry.key)
+        self.lang_index[entry.target_lang].add(entry.key)
+        self.search_dirty = True
+
+    def _unindex_search(self, entry):
+        """Retira uma entrada dos índices de pesquisa"""
+        self.text_index.remove(entry.key, entry.word)
+        self.text_index.remove(entry.key, entry.translation)
+        for lang in (entry.src_lang, entry.target_lang):
+            self.lang_index[lang].discard(entry.key)
+            if not self.lang_index[lang]:
+                del self.lang_index[lang]
+        self.search_dirty = True
+
+    def close(self):
+        """Fecha armazenamento, cache, pool e histórico e salva os índices
+
+        Pode ser chamado mais de uma vez (explicitamente e pelo atexit);
+        apenas a primeira chamada tem efeito.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self.store.close()
+        self.cache.close()
+        self.pool.close()
+        self.history.close()
+        size = os.path.getsize(self.store.filepath)
+        signature = file_signature(self.store.filepath, size)
+        # O snapshot fica obsoleto se a compactação reescreveu o trecho
+        # coberto ou se a cauda não coberta cresceu demais. As entradas são
+        # lidas do snapshot antigo, que é desmapeado antes da substituição
+        if self.snapshot_path and size and (
+                file_signature(self.store.filepath, self.snapshot_size) !=
+                self.snapshot_signature or size - self.snapshot_size >
+                SNAPSHOT_REBUILD_RATIO * self.snapshot_size):
+            count, sections = build_snapshot(self.index.values(),
+                                             self.store.offsets)
+            self.index.close()
+            write_snapshot(self.snapshot_path, count, sections, signature,
+                           self.store.garbage)
+            self.snapshot_size = size
+            self.snapshot_signature = signature
+        self.index.close()
+        if self.trigram_path and not self.snapshot_path and \
+                self.search_dirty:
+            self.text_index.save(self.trigram_path, signature)
+            self.search_dirty = False
+
+    @property
+    def entries(self):
+        """Lista das entradas na ordem de inserção"""
+        return list(self.index.values())
+
+    def load_entries(self):
+        """Carrega entradas ativas do armazenamento"""
+        return list(self.store)
 
     def save_entries(self):
-        """Salva entradas no arquivo"""
-        with open(FILEPATH, "w", encoding="utf-8") as f:
-            for entry in self.entries:
-                f.write("\t".join([
-                    entry['word'],
-                    entry['src_lang'],
-                    entry['target_lang'],
-                    entry['translation'],
-                    entry['timestamp']
-                ]) + "\n")
-
-    def add_entry(self, entry):
-        """Adiciona nova entrada com verificação de duplicatas"""
-        duplicate = next((e for e in self.entries if
-                         e['word'] == entry['word'] and
-                         e['src_lang'] == entry['src_lang'] and
-                         e['target_lang'] == entry['target_lang']), None)
+        """Garante que as alterações estejam gravadas no arquivo
+
+        Cada alteração já é acrescentada ao log no momento em que ocorre,
+        então não há mais reescrita completa do arquivo.
+        """
+        self.store.flush()
+
+    def find_entry(self, word, src_lang, target_lang):
+        """Busca exata de uma entrada pela chave"""
+        return self.index.get((word, src_lang, target_lang))
+
+    def add_entry(self, entry, overwrite=None):
+        """Adiciona nova entrada com verificação de duplicatas
+
+        `overwrite` define o que fazer com duplicatas sem perguntar ao
+        usuário (True sobrescreve, False mantém); None pergunta.
+        """
+        key = entry_key(entry)
+        duplicate = self.index.get(key)
 
         if duplicate:
-            print("Entrada duplicada encontrada:")
-            self.display_entry(duplicate)
-            choice = input("Deseja sobrescrever? (s/n): ").lower()
-            if choice != 's':
+            if overwrite is None:
+                print("Entrada duplicada encontrada:")
+                self.display_entry(duplicate)
+                choice = input("Deseja sobrescrever? (s/n): ").lower()
+                overwrite = choice == 's'
+            if not overwrite:
                 return False
-            self.entries.remove(duplicate)
+            # Remove para que a entrada volte ao fim da ordem de inserção
+            del self.index[key]
+            self._unindex_search(duplicate)
 
         entry['timestamp'] = datetime.now().isoformat()
-        self.entries.append(entry)
-        self.log_change("ADD", entry)
+        record = Entry.from_mapping(entry)
+        self.index[record] = record
+        self._index_search(record)
+        self.store.put(record)
+        self.log_change("ADD", record)
         return True
 
+    def translate_many(self, words, src_lang, target_lang,
+                       chunk_size=BATCH_CHUNK_SIZE):
+        """Traduz e adiciona várias palavras de uma só vez
+
+        Palavras repetidas ou já presentes no dicionário são ignoradas; as
+        demais passam pelo cache e, se necessário, pelo pool de tradução
+        em blocos concorrentes.
+        As novas entradas são gravadas com uma única escrita e retornadas.
+        """
+        pending = []
+        seen = set()
+        for word in words:
+            word = word.strip()
+            key = (word, src_lang, target_lang)
+            if not word or key in seen or key in self.index:
+                continue
+            seen.add(key)
+            pending.append(word)
+
+        translations = self.translator.translate_many(
+            pending, src_lang, target_lang, chunk_size, self.pool)
+        timestamp = datetime.now().isoformat()
+        entries = []
+        for word, translated in zip(pending, translations):
+            entry = Entry(word, src_lang, target_lang, translated.text,
+                          timestamp)
+            self.index[entry] = entry
+            self._index_search(entry)
+            entries.append(entry)
+
+        self.store.put_many(entries)
+        self.save_entries()
+        self.log_changes("ADD", entries)
+        return entries
+
+    def edit_entry(self, entry, **changes):
+        """Altera campos de uma entrada existente"""
+        # A entrada é a própria chave: sai dos índices antes de mudar
+        old_key = entry.key
+        del self.index[entry]
+        self._unindex_search(entry)
+        entry.update(changes)
+        if entry.key != old_key:
+            self.store.delete(old_key)
+            replaced = self.index.pop(entry, None)
+            if replaced is not None:
+                self._unindex_search(replaced)
+        entry['timestamp'] = datetime.now().isoformat()
+        self.index[entry] = entry
+        self._index_search(entry)
+        self.store.put(entry)
+        self.log_change("EDIT", entry)
+
+    def remove_entry(self, entry):
+        """Remove uma entrada do dicionário"""
+        del self.index[entry]
+        self._unindex_search(entry)
+        self.store.delete(entry.key)
+        self.log_change("REMOVE", entry)
+
     def log_change(self, action, entry):
         """Registra alterações no histórico"""
-        log_entry = f"{datetime.now()} | {action} | {entry['word']} | " \
-            f"{entry['src_lang']}-{entry['target_lang']} | " \
-            f"user: {os.getlogin()}"
-        self.history.append(log_entry)
+        self.log_changes(action, [entry])
 
-        with open(HISTORY_PATH, "a", encoding="utf-8") as f:
-            f.write(log_entry + "\n")
+    def log_changes(self, action, entries):
+        """Registra no histórico uma mesma ação sobre várias entradas"""
+        self.history.write(action, entries)
 
     def search_entries(self, term, field='all'):
-        """Pesquisa entradas por termo"""
+        """Pesquisa entradas por termo
+
+        `field` pode ser 'word', 'translation', 'lang' (origem ou destino)
+        ou 'all'. Termos com 3+ caracteres usam o índice de trigramas
+        (palavra + tradução); termos menores recaem na varredura completa.
+        """
         term = term.lower()
-        results = []
-        for entry in self.entries:
-            if field == 'all':
-                match = (term in entry['word'].lower() or
-                         term in entry['translation'].lower() or
-                         term in entry['src_lang'].lower() or
-                         term in entry['target_lang'].lower())
+        fields = {
+            'word': ['word'],
+            'translation': ['translation'],
+            'lang': [],
+            'all': ['word', 'translation'],
+        }[field]
+
+        def found(entry):
+            return any(term in entry[name].lower() for name in fields)
+
+        # Chave -> entrada: os índices de pesquisa guardam chaves, e a
+        # entrada devolvida é sempre a atual do índice
+        matches = {}
+        if field in ('lang', 'all'):
+            for lang, keys in self.lang_index.items():
+                if term in lang.lower():
+                    matches.update((k, self.index[k]) for k in keys)
+            matches.update((e.key, e)
+                           for e in self.index.lang_candidates(term))
+        if fields:
+            candidates = self.text_index.candidates(term)
+            if candidates is None:
+                matches.update((e.key, e) for e in self.index.values()
+                               if found(e))
             else:
-                match = term in entry[field].lower()
-            if match:
-                results.append(entry)
+                matches.update((e.key, e)
+                               for e in (self.index[k] for k in candidates)
+                               if found(e))
+                matches.update((e.key, e)
+                               for e in self.index.candidates(term)
+                               if found(e))
+
+        results = list(matches.values())
+        # Ordem dos timestamps; empates (ex.: entradas importadas juntas)
+        # são decididos pela chave, para a paginação ser estável
+        results.sort(key=lambda entry: (entry.timestamp, entry.key))
         return results
 
     def display_entries(self, entries, page=1):
@@ -243,6 +1744,29 @@ class UserInterface:
             else:
                 break
 
+    def show_history(self):
+        """Fluxo de consulta do histórico por período"""
+        period = []
+        for label in ("Início", "Fim"):
+            value = input(f"{label} (AAAA-MM-DD [HH:MM], Enter = sem limite): ")
+            try:
+                period.append(
+                    datetime.fromisoformat(value.strip()) if value.strip()
+                    else None)
+            except ValueError:
+                print("Data inválida.")
+                return
+
+        self.manager.history.flush()
+        found = False
+        for record in read_history(self.manager.history.path, *period):
+            print(f"{record['timestamp']} | {record['action']} | "
+                  f"{record['word']} | {record['langs']} | "
+                  f"user: {record['user']}")
+            found = True
+        if not found:
+            print("Nenhuma alteração no período.")
+
 
 def main():
     manager = DictionaryManager()
@@ -257,6 +1781,8 @@ def main():
             pass  # Implementar consulta
         elif choice == '3':
             ui.search_entries()
+        elif choice == '7':
+            ui.show_history()
         elif choice == '0':
             print("Até logo!")
             sys.exit()
@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+
+""" Exibe relatório de crianças por atividade.
+
+Imprimir a lista de crianças agrupadas por sala
+que frequenta cada uma das atividades
+
+Cada aluno de uma sala recebe um id inteiro e cada sala ou atividade é um
+bitset (um int do Python em que o bit `id` indica a matrícula). A
+interseção de uma sala com uma atividade é um único AND bit a bit. Os ids
+são atribuídos sala por sala, na ordem da sala, então os alunos de uma sala
+ocupam bits consecutivos e o resultado do AND, deslocado até o início da
+sala, é um int pequeno.
+
+O relatório é o mesmo de escola.py: em cada sala, os alunos aparecem na
+ordem da atividade (repetições incluídas), e um aluno matriculado em mais
+de uma sala é listado apenas na primeira delas.
+
+Salas e atividades também podem ser lidas de arquivos CSV (linhas
+`grupo,aluno`) ou JSON (`{"grupo": ["aluno", ...]}`):
+
+    $ escola_v4_com_bitsets.py --salas=salas.csv --atividades=a.json,b.csv
+
+Nesse caso as matrículas são guardadas em um arquivo de estado
+(`escola.state`, ou --estado=arquivo), regravado só quando mudam, e o
+relatório de cada célula (atividade x sala) em um arquivo de células
+(`escola.state.cells`), ao qual só as células novas são acrescentadas.
+Na execução seguinte, arquivos com o mesmo tamanho e data de modificação
+(ou com o mesmo hash de conteúdo) não são lidos e, nos que mudaram, só as
+salas e atividades alteradas têm suas células recalculadas. O relatório é
+o mesmo de uma execução sem estado. Linhas de CSV sem exatamente 2 colunas
+são ignoradas e relatadas na saída de erro.
+
+Com --workers=N as atividades são divididas em lotes entre N processos;
+cada processo calcula as células do seu lote e devolve os blocos do
+relatório já formatados, que são escritos na ordem original. O ganho com
+mais de um processo não foi medido em máquina com vários núcleos (veja
+`bench_escola.py workers`); com uma única CPU há apenas o custo do pool.
+"""
+__version__ = "0.2.0"
+__author__ = "Silva"
+
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+
+# Dados
+sala1 = ["Erik", "Maia", "Gustavo", "Manuel", "Sofia", "Joana"]
+sala2 = ["João", "Antonio", "Carlos", "Maria", "Isolda"]
+
+aula_ingles = ["Erik", "Maia", "Joana", "Carlos", "Antonio"]
+aula_musica = ["Erik", "Carlos", "Maria"]
+aula_danca = ["Gustavo", "Sofia", "Joana", "Antonio"]
+
+# Rótulos das salas exatamente como impressos por escola.py, que usa
+# print("sala1 ", ...) e portanto deixa dois espaços após `sala1`
+salas = [("sala1 ", sala1), ("sala2", sala2)]
+
+atividades = [("Inglês", aula_ingles), ("Dança", aula_danca),
+              ("Música", aula_musica)]
+
+# Formato do bloco de cada atividade e de cada sala no relatório
+ACTIVITY_FORMAT = "\nAlunos da atividade de {nome}\n" + "-" * 45 + "\n{salas}\n" \
+    + "#" * 45 + "\n"
+ROOM_FORMAT = "{nome} {alunos}\n"
+
+# Opções aceitas na linha de comando
+valid_options = ("salas", "atividades", "estado", "workers")
+
+# Lotes de atividades por processo no relatório paralelo
+SHARDS_PER_WORKER = 4
+
+# Arquivo de estado padrão (matrículas e células já calculadas)
+STATE_PATH = os.path.join(os.curdir, "escola.state")
+
+# Células calculadas, guardadas junto ao estado (`escola.state.cells`)
+CELLS_SUFFIX = ".cells"
+
+# O arquivo de células só é compactado a partir deste número de células
+CELLS_COMPACT_MIN = 1024
+
+# Campos do estado gravado e versão do formato
+STATE_FIELDS = ("names", "rooms", "owned", "shadows", "activities",
+                "students", "free", "hashes", "files")
+STATE_VERSION = 3
+
+# Tamanho dos blocos lidos ao calcular o hash de um arquivo
+HASH_BLOCK = 1 << 20
+
+
+def to_bitset(ids):
+    """Converte ids de alunos em um bitset."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buffer[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def bit_positions(bits):
+    """Posições dos bits ligados, em ordem crescente."""
+    # Binário invertido: o índice de cada caractere é a posição do bit
+    digits = bin(bits)[:1:-1]
+    position = digits.find("1")
+    while position >= 0:
+        yield position
+        position = digits.find("1", position + 1)
+
+
+def group_hash(students):
+    """Hash do conteúdo de uma sala ou atividade."""
+    return hashlib.blake2b("\n".join(students).encode("utf-8"),
+                           digest_size=16).digest()
+
+
+def file_hash(path):
+    """Hash do conteúdo de um arquivo, lido em blocos."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def file_stat(path):
+    """Tamanho e data de modificação (ns) do arquivo."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_groups(path, report=sys.stderr):
+    """Lê os grupos (nome, alunos) de um arquivo CSV ou JSON.
+
+    Um JSON que não seja um objeto {grupo: [alunos]} gera ValueError.
+    Linhas do CSV sem exatamente 2 colunas são ignoradas e relatadas em
+    `report`.
+    """
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not all(
+                isinstance(students, list) and
+                all(isinstance(student, str) for student in students)
+                for students in data.values()):
+            raise ValueError(f"{path}: esperado um objeto JSON "
+                             "{\"grupo\": [\"aluno\", ...]}")
+        return list(data.items())
+    groups = {}
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f, skipinitialspace=True)
+        for row in reader:
+            if len(row) == 2:
+                groups.setdefault(row[0], []).append(row[1])
+            elif row:
+                print(f"{path}: linha {reader.line_num} ignorada: "
+                      f"{len(row)} coluna(s), esperado 2", file=report)
+    return list(groups.items())
+
+
+class Enrollment:
+    """Matrículas de alunos em salas e atividades, guardadas como bitsets.
+
+    Cada aluno de uma sala ocupa uma posição (id) em um bloco contíguo da
+    sala, na ordem em que aparece nela; um aluno em duas salas ocupa uma
+    posição em cada. A atividade é um bitset com as posições de todos os
+    seus alunos. Salas alteradas recebem um bloco novo no fim; quando as
+    posições liberadas passam das ocupadas, todas são renumeradas. Como em
+    escola.py, um aluno é listado só na primeira sala em que aparece: as
+    posições em que ele aparece primeiro formam o bitset `owned` da sala.
+
+    O relatório de cada célula fica em `cells`, indexado pelo nome da sala,
+    pelos hashes do conteúdo da sala e da atividade e pelo hash dos alunos
+    da sala que já aparecem em salas anteriores (`shadows`), e portanto
+    continua válido enquanto nenhum deles mudar; `recomputed` conta as
+    células calculadas.
+    """
+
+    def __init__(self):
+        self.names = []  # posição -> nome do aluno (None se liberada)
+        self.rooms = {}  # sala -> (bitset, primeira posição)
+        # Calculados por _assign_owners (None depois que as salas mudam)
+        self.owned = {}  # sala -> posições dos alunos listados nela
+        self.shadows = {}  # sala -> hash dos alunos de salas anteriores
+        self.activities = {}  # atividade -> bitset
+        self.students = {}  # atividade -> alunos inscritos, separados por \n
+        self.free = 0  # posições liberadas
+        # Índices derivados dos campos acima, montados só quando são usados
+        # (não são gravados no estado)
+        self._positions = None  # nome do aluno -> posições (uma por sala)
+        self._enrolled = None  # nome do aluno -> atividades
+        self._orders = {}  # atividade -> nome do aluno -> índices nela
+        self.hashes = {}  # ("sala" | "atividade", nome) -> hash do conteúdo
+        self.files = {}  # (tipo, arquivo) -> (stat, hash, nomes dos grupos)
+        self.cells = {}  # cell_key(atividade, sala) -> linha do relatório
+        self.new_cells = {}  # células ainda não gravadas
+        self.stored = 0  # células gravadas no arquivo de células
+        self.stored_size = 0  # bytes válidos do arquivo de células
+        self.dirty = False  # matrículas alteradas desde a carga
+        self.recomputed = 0
+
+    def _changed(self, kind, name, students):
+        """Registra o hash do grupo; indica se o conteúdo mudou."""
+        digest = group_hash(students)
+        if self.hashes.get((kind, name)) == digest:
+            return False
+        self.hashes[kind, name] = digest
+        self.dirty = True
+        return True
+
+    @property
+    def positions(self):
+        """Posições de cada aluno, montadas a partir de `names`."""
+        if self._positions is None:
+            self._positions = {}
+            for position, student in enumerate(self.names):
+                if student is not None:
+                    self._positions.setdefault(student, []).append(position)
+        return self._positions
+
+    @property
+    def enrolled(self):
+        """Atividades de cada aluno, montadas a partir de `students`."""
+        if self._enrolled is None:
+            self._enrolled = {}
+            for activity, students in self.students.items():
+                for student in students.split("\n") if students else ():
+                    self._enrolled.setdefault(student, set()).add(activity)
+        return self._enrolled
+
+    def _place(self, name, students):
+        """Ocupa um bloco de posições no fim para os alunos da sala."""
+        positions = self.positions
+        first = len(self.names)
+        self.names.extend(students)
+        for position, student in enumerate(students, first):
+            positions.setdefault(student, []).append(position)
+        self.rooms[name] = (((1 << len(students)) - 1) << first, first)
+        self.owned = self.shadows = None
+        return first
+
+    def _release(self, name):
+        """Libera as posições da sala e as retira das atividades."""
+        positions, enrolled = self.positions, self.enrolled
+        bits, first = self.rooms.pop(name)
+        count = bits.bit_length() - first if bits else 0
+        touched = set()
+        for position in range(first, first + count):
+            student = self.names[position]
+            self.names[position] = None
+            student_positions = positions[student]
+            student_positions.remove(position)
+            if not student_positions:
+                del positions[student]
+            touched.update(enrolled.get(student, ()))
+        for activity in touched:
+            self.activities[activity] &= ~bits
+        self.free += count
+        self.owned = self.shadows = None
+
+    def _assign_owners(self):
+        """Calcula, na ordem das salas, as posições listadas em cada uma.
+
+        Como em escola.py, um aluno matriculado em mais de uma sala fica só
+        na primeira; nas seguintes, sua posição fica fora de `owned` e o
+        hash dos alunos assim omitidos vai para `shadows` (parte da chave
+        das células).
+        """
+        if self.owned is not None:
+            return
+        owned, shadows, seen = {}, {}, set()
+        for name, (bits, first) in self.rooms.items():
+            count = bits.bit_length() - first if bits else 0
+            students = self.names[first:first + count]
+            shadowed = [offset for offset, student in enumerate(students)
+                        if student in seen]
+            owned[name] = bits & ~(to_bitset(shadowed) << first)
+            shadows[name] = group_hash(
+                sorted(students[offset] for offset in shadowed)) \
+                if shadowed else b""
+            seen.update(students)
+        self.owned, self.shadows = owned, shadows
+
+    def _order(self, activity):
+        """Índices de cada aluno na lista da atividade (com repetições)."""
+        order = self._orders.get(activity)
+        if order is None:
+            order = self._orders[activity] = {}
+            students = self.students[activity]
+            for index, student in enumerate(
+                    students.split("\n") if students else ()):
+                order.setdefault(student, []).append(index)
+        return order
+
+    def add_room(self, name, students):
+        """Matricula os alunos em uma sala (se ela mudou)."""
+        if not self._changed("sala", name, students):
+            return
+        if name in self.rooms:
+            self._release(name)
+        students = list(dict.fromkeys(students))
+        first = self._place(name, students)
+        if not self.students:
+            return
+        # As atividades dos alunos passam a incluir as novas posições
+        added = {}
+        for offset, student in enumerate(students):
+            for activity in self.enrolled.get(student, ()):
+                added.setdefault(activity, []).append(offset)
+        for activity, offsets in added.items():
+            self.activities[activity] |= to_bitset(offsets) << first
+
+    def _unenroll(self, name):
+        """Desfaz as inscrições de uma atividade."""
+        enrolled = self._enrolled  # só é mantido se já foi montado
+        students = self.students.pop(name, "")
+        self._orders.pop(name, None)
+        if enrolled is None:
+            return
+        for student in dict.fromkeys(students.split("\n") if students
+                                     else ()):
+            activities = enrolled[student]
+            activities.discard(name)
+            if not activities:
+                del enrolled[student]
+
+    def add_activity(self, name, students):
+        """Inscreve os alunos em uma atividade (se ela mudou)."""
+        if not self._changed("atividade", name, students):
+            return
+        self._unenroll(name)
+        # A lista é guardada como veio: o relatório repete os alunos
+        # inscritos mais de uma vez, como escola.py
+        self.students[name] = "\n".join(students)
+        students = list(dict.fromkeys(students))
+        if self._enrolled is not None:
+            for student in students:
+                self._enrolled.setdefault(student, set()).add(name)
+        positions = self.positions
+        self.activities[name] = to_bitset(
+            position for student in students
+            for position in positions.get(student, ()))
+
+    def remove_room(self, name):
+        """Remove uma sala (suas células deixam de ser usadas)."""
+        self._release(name)
+        del self.hashes["sala", name]
+        self.dirty = True
+
+    def remove_activity(self, name):
+        """Remove uma atividade (suas células deixam de ser usadas)."""
+        self._unenroll(name)
+        del self.activities[name], self.hashes["atividade", name]
+        self.dirty = True
+
+    def renumber(self):
+        """Renumera as posições sala a sala, sem as liberadas.
+
+        As células não dependem das posições e continuam válidas.
+        """
+        rooms = [(name, self.names[first:first + bits.bit_length() - first]
+                  if bits else [])
+                 for name, (bits, first) in self.rooms.items()]
+        self.names, self._positions, self.rooms = [], {}, {}
+        self.free = 0
+        for name, students in rooms:
+            self._place(name, students)
+        positions = self.positions
+        for name, students in self.students.items():
+            self.activities[name] = to_bitset(
+                position for student in students.split("\n") if students
+                for position in positions.get(student, ()))
+        self.dirty = True
+
+    def load_files(self, room_files, activity_files, report=sys.stderr):
+        """Atualiza as matrículas a partir dos arquivos de salas e atividades.
+
+        Arquivos com o mesmo tamanho e data de modificação da execução
+        anterior não são lidos nem têm o hash recalculado; nos demais, um
+        hash de conteúdo igual também evita a leitura. Salas e atividades
+        que não aparecem mais em nenhum arquivo são removidas.
+        """
+        files = {}
+        for kind, paths, add, current, remove in (
+                ("sala", room_files, self.add_room, self.rooms,
+                 self.remove_room),
+                ("atividade", activity_files, self.add_activity,
+                 self.activities, self.remove_activity)):
+            order = []
+            for path in paths:
+                stat = file_stat(path)
+                saved = self.files.get((kind, path))
+                if saved and saved[0] == stat:
+                    files[kind, path] = saved
+                    order.extend(saved[2])
+                    continue
+                digest = file_hash(path)
+                if saved and saved[1] == digest:
+                    files[kind, path] = (stat, digest, saved[2])
+                    order.extend(saved[2])
+                    continue
+                groups = read_groups(path, report)
+                for name, students in groups:
+                    add(name, students)
+                names = [name for name, _ in groups]
+                files[kind, path] = (stat, digest, names)
+                order.extend(names)
+            # Remove os grupos ausentes e segue a ordem dos arquivos
+            for name in set(current) - set(order):
+                remove(name)
+            if list(current) != order:
+                ordered = {name: current[name] for name in order}
+                current.clear()
+                current.update(ordered)
+                self.owned = self.shadows = None
+                self.dirty = True
+        if files != self.files:
+            self.files = files
+            self.dirty = True
+        if self.free > len(self.names) - self.free:
+            self.renumber()
+
+    def save(self, path):
+        """Grava as matrículas (se mudaram) e as células novas.
+
+        As matrículas vão para `path` de forma atômica; as células, para
+        o arquivo de células `path + ".cells"`.
+        """
+        if self.dirty:
+            state = {field: getattr(self, field) for field in STATE_FIELDS}
+            state["version"] = STATE_VERSION
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self.dirty = False
+        self.save_cells(path + CELLS_SUFFIX)
+
+    def save_cells(self, path):
+        """Acrescenta as células novas ao arquivo de células.
+
+        O arquivo é uma sequência de dicts pickle, um por execução que
+        calculou células. Quando as células gravadas passam do dobro das
+        que o relatório usa, ele é reescrito só com estas.
+        """
+        live = len(self.activities) * len(self.rooms)
+        if self.stored + len(self.new_cells) > \
+                max(2 * live, CELLS_COMPACT_MIN):
+            keys = (self.cell_key(activity, room)
+                    for activity in self.activities for room in self.rooms)
+            self.cells = {key: self.cells[key] for key in keys
+                          if key in self.cells}
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(self.cells, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self.stored_size = f.tell()
+            os.replace(tmp, path)
+            self.stored = len(self.cells)
+        elif self.new_cells:
+            with open(path, "r+b" if self.stored_size else "wb") as f:
+                # Descarta um registro incompleto de uma execução interrompida
+                f.truncate(self.stored_size)
+                f.seek(self.stored_size)
+                pickle.dump(self.new_cells, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+                self.stored_size = f.tell()
+            self.stored += len(self.new_cells)
+        self.new_cells = {}
+
+    @classmethod
+    def load(cls, path):
+        """Carrega o estado salvo; um estado ausente ou inválido recomeça.
+
+        As células gravadas são carregadas mesmo sem estado: elas dependem
+        apenas do conteúdo das salas e atividades.
+        """
+        enrollment = cls()
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            if state.get("version") == STATE_VERSION:
+                for field in STATE_FIELDS:
+                    setattr(enrollment, field, state[field])
+        except (OSError, EOFError, AttributeError, KeyError,
+                pickle.UnpicklingError):
+            enrollment = cls()
+        enrollment.load_cells(path + CELLS_SUFFIX)
+        return enrollment
+
+    def load_cells(self, path):
+        """Lê os registros do arquivo de células, até o último completo."""
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    try:
+                        cells = pickle.load(f)
+                    except EOFError:
+                        break
+                    self.cells.update(cells)
+                    self.stored += len(cells)
+                    self.stored_size = f.tell()
+        except (OSError, pickle.UnpicklingError, ValueError, TypeError):
+            pass  # Registro incompleto: o restante é descartado
+
+    def members(self, activity, room):
+        """Alunos listados na sala para a atividade, na ordem da atividade."""
+        self._assign_owners()
+        first = self.rooms[room][1]
+        common = (self.activities[activity] & self.owned[room]) >> first
+        if not common:
+            return []
+        order, names = self._order(activity), self.names
+        listed = sorted((index, names[first + offset])
+                        for offset in bit_positions(common)
+                        for index in order[names[first + offset]])
+        return [student for _, student in listed]
+
+    def cell_key(self, activity, room):
+        """Chave da célula: sala, conteúdo, alunos omitidos e atividade."""
+        self._assign_owners()
+        return (room, self.hashes["sala", room], self.shadows[room],
+                self.hashes["atividade", activity])
+
+    def cell(self, activity, room):
+        """Linha do relatório da sala na atividade, calculada uma única vez."""
+        key = self.cell_key(activity, room)
+        line = self.cells.get(key)
+        if line is None:
+            line = self.cells[key] = self.new_cells[key] = ROOM_FORMAT.format(
+                nome=room, alunos=self.members(activity, room))
+            self.recomputed += 1
+        return line
+
+    def render(self, activities):
+        """Blocos do relatório das atividades informadas."""
+        return "".join(
+            ACTIVITY_FORMAT.format(nome=activity, salas="".join(
+                self.cell(activity, room) for room in self.rooms))
+            for activity in activities)
+
+    def iter_report(self, workers=1):
+        """Gera o relatório completo em blocos, na ordem das atividades.
+
+        Com mais de um worker, lotes de atividades são renderizados em um
+        pool de processos; as células calculadas por eles voltam para
+        `cells`. O relatório é o mesmo para qualquer número de workers.
+        """
+        activities = list(self.activities)
+        self._assign_owners()  # calculado antes de os processos herdarem
+        if workers == 1 or len(activities) < 2:
+            yield self.render(activities)
+            return
+        size = -(-len(activities) // (workers * SHARDS_PER_WORKER))
+        shards = [activities[i:i + size]
+                  for i in range(0, len(activities), size)]
+        # No Linux (fork) o estado é herdado pelos processos sem cópia
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(self,)) as pool:
+            for text, cells in pool.imap(_render_shard, shards):
+                self.cells.update(cells)
+                self.new_cells.update(cells)
+                self.recomputed += len(cells)
+                yield text
+
+    def report(self, workers=1):
+        """Relatório completo (atividade x sala) em uma única passada."""
+        return "".join(self.iter_report(workers))
+
+
+# Matrículas usadas pelos processos do relatório paralelo
+_worker_enrollment = None
+
+
+def _init_worker(enrollment):
+    """Inicializa um processo do relatório paralelo."""
+    global _worker_enrollment
+    _worker_enrollment = enrollment
+
+
+def _render_shard(activities):
+    """Renderiza um lote de atividades; retorna o texto e as células novas."""
+    enrollment = _worker_enrollment
+    enrollment.new_cells = {}
+    text = enrollment.render(activities)
+    return text, enrollment.new_cells
+
+
+def load(rooms, activities):
+    """Cria as matrículas: primeiro as salas, depois as atividades."""
+    enrollment = Enrollment()
+    for name, students in rooms:
+        enrollment.add_room(name, students)
+    for name, students in activities:
+        enrollment.add_activity(name, students)
+    return enrollment
+
+
+def main(arguments):
+    # Opções `--chave=valor`; listas de arquivos separadas por vírgula
+    options = {}
+    for arg in arguments:
+        key, _, value = arg[2:].partition("=")
+        if not arg.startswith("--") or key not in valid_options:
+            print(f"Opção inválida `{arg}`")
+            print(f"Opções válidas: {valid_options}")
+            sys.exit(1)
+        options[key] = value
+
+    workers = options.get("workers") or "1"
+    if not workers.isdigit() or int(workers) < 1:
+        print("Erro: --workers deve ser um número inteiro positivo.")
+        sys.exit(1)
+    workers = int(workers)
+
+    if "salas" not in options and "atividades" not in options:
+        # Listar alunos em cada atividade por sala, com uma única escrita.
+        sys.stdout.write(load(salas, atividades).report(workers))
+        return
+
+    room_files = [p for p in options.get("salas", "").split(",") if p]
+    activity_files = [p for p in options.get("atividades", "").split(",") if p]
+    state_path = options.get("estado") or STATE_PATH
+
+    enrollment = Enrollment.load(state_path)
+    try:
+        enrollment.load_files(room_files, activity_files)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler as matrículas: {e}")
+        sys.exit(1)
+    for block in enrollment.iter_report(workers):
+        sys.stdout.write(block)
+    enrollment.save(state_path)
+    total = len(enrollment.rooms) * len(enrollment.activities)
+    print(f"{enrollment.recomputed} de {total} célula(s) recalculada(s).",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,108 @@
+"""Índices sobre arquivos de texto, compartilhados pelos scripts
+
+Usa apenas a biblioteca padrão, para que scripts sem as dependências dos
+demais (como notes.py sem o googletrans) possam importá-lo.
+
+- `file_signature`: detecta se o trecho já indexado de um arquivo que só
+  cresce (log append-only) continua igual, sem relê-lo por completo.
+- `read_line_at`: lê a linha que começa em um offset indexado.
+- `TrigramIndex`: índice invertido de trigramas para pesquisa por
+  substring.
+"""
+
+import os
+import pickle
+import zlib
+from collections import defaultdict
+
+
+def file_signature(path, size):
+    """Assinatura dos primeiros `size` bytes: tamanho + CRC dos 4 KiB finais
+
+    Vale apenas para arquivos alterados por acréscimos ao final: quem
+    reescreve o arquivo (mesmo com o mesmo tamanho) deve descartar os
+    índices associados a ele.
+    """
+    with open(path, "rb") as f:
+        f.seek(max(0, size - 4096))
+        return size, zlib.crc32(f.read(min(size, 4096)))
+
+
+def read_line_at(file, offset):
+    """Lê a linha que começa no offset informado"""
+    file.seek(offset)
+    return file.readline()
+
+
+class TrigramIndex:
+    """Índice invertido de trigramas para pesquisa por substring
+
+    Cada trigrama do texto (em minúsculas) aponta para o conjunto de ids
+    que o contêm. Um termo com 3+ caracteres só pode ocorrer nos ids
+    presentes em todas as listas dos seus trigramas; os candidatos ainda
+    devem ser confirmados, pois trigramas em comum não garantem a substring.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(set)
+
+    @staticmethod
+    def trigrams(text):
+        """Conjunto de trigramas de um texto já em minúsculas"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, doc_id, text):
+        """Indexa o texto de um documento"""
+        for gram in self.trigrams(text.lower()):
+            self.postings[gram].add(doc_id)
+
+    def remove(self, doc_id, text):
+        """Remove o documento das listas dos trigramas do texto"""
+        for gram in self.trigrams(text.lower()):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def candidates(self, term):
+        """Ids que podem conter o termo, ou None se ele for curto demais"""
+        grams = self.trigrams(term)
+        if not grams:
+            return None
+        lists = sorted((self.postings.get(g, ()) for g in grams), key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(ids)
+        return result
+
+    def save(self, path, signature):
+        """Salva o índice junto com a assinatura dos dados indexados"""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({'signature': signature,
+                         'postings': dict(self.postings)},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, datapath):
+        """Carrega o índice salvo se os dados indexados não mudaram
+
+        Retorna o índice e quantos bytes de `datapath` ele já cobre; em caso
+        de índice ausente ou desatualizado, retorna um índice vazio e 0.
+        """
+        index = cls()
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+            size = saved['signature'][0]
+            if size <= os.path.getsize(datapath) and \
+                    file_signature(datapath, size) == saved['signature']:
+                index.postings.update(saved['postings'])
+                return index, size
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+            pass
+        return index, 0
@@ -1,52 +1,813 @@
 #!/usr/bin/env python3
+"""Mala direta: gera um email por destinatário a partir de um template.
+
+Uso:
+    interpolacao.py [opções] [arquivo_de_emails] [arquivo_de_template]
+
+Opções:
+    --backend=stdout            exibe cada email na saída padrão (padrão)
+    --backend=mbox:[arquivo]    acrescenta os emails a um arquivo mbox
+    --backend=maildir:[pasta]   grava os emails em uma pasta Maildir
+    --backend=smtp:[host:porta] envia por SMTP (porta padrão 25)
+    --workers=[N]               envios simultâneos (SMTP e Maildir); no SMTP
+                                é também o número de conexões reutilizadas
+    --retries=[N]               novas tentativas para os envios que falharam
+                                (padrão 3, com espera exponencial)
+    --columns=[c1,c2,...]       nomes das colunas do CSV (padrão nome,email)
+    --header                    lê os nomes das colunas da primeira linha
+    --bloom=[N]                 deduplica os endereços com um filtro de Bloom
+                                dimensionado para N endereços (1% de falsos
+                                positivos) em vez de um conjunto de hashes
+    --checkpoint[=arquivo]      registra o progresso periodicamente e, em
+                                uma nova execução, continua de onde parou
+                                (padrão `[arquivo_de_emails].checkpoint`)
+    --restart                   ignora o checkpoint existente e recomeça
+
+    $ interpolacao.py --backend=smtp:localhost:1025 --workers=8 \\
+          emails.txt email_tmpl.txt
+
+O arquivo de emails é um CSV com uma linha por destinatário (campos com
+vírgula devem estar entre aspas). Cada coluna vira um campo do template,
+que usa a formatação `%` do Python (`%(nome)s`, `%(preco).2f`, ...); a
+coluna `email` é obrigatória. Campos sem coluna usam os valores fixos da
+campanha. Linhas inválidas (colunas a mais ou a menos, email inválido ou
+valor incompatível com o formato do campo) são ignoradas e relatadas na
+saída de erro.
+
+    $ cat clientes.csv
+    nome,email,produto,preco
+    "Silva, Maria",maria@hotmail.com,lápis,2.5
+    $ interpolacao.py --header clientes.csv email_tmpl.txt
+
+Endereços repetidos (sem diferenciar maiúsculas) recebem um único email.
+O conjunto de endereços já vistos guarda apenas um hash de 8 bytes de cada
+um; para listas enormes, o filtro de Bloom usa cerca de 1,2 byte por
+endereço, ao custo de ignorar ~1% de endereços novos.
+
+Com --checkpoint, o offset (em bytes) até onde todos os destinatários
+foram resolvidos e os hashes dos endereços já resolvidos são gravados a
+cada 5 segundos e ao final. Uma nova execução posiciona a leitura
+diretamente nesse offset e pula os endereços já resolvidos. Um email só
+é marcado depois de entregue, e o checkpoint só é gravado depois que a
+saída do backend é esvaziada (stdout) ou sincronizada com o disco (mbox).
+Os emails que falharam e ainda aguardavam uma nova tentativa quando a
+execução foi interrompida são reenviados (entrega "pelo menos uma vez"). As falhas definitivas, após todas as tentativas,
+são gravadas em `[checkpoint].failed`.
+
+O template é lido e compilado uma única vez; os destinatários são lidos sob
+demanda e a saída passa por um buffer grande, então a memória usada não
+depende do tamanho da lista.
+"""
 
 # Importa os módulos necessários
+import csv
+import hashlib
+import json
+import mailbox
+import math
 import os
+import queue
+import re
+import smtplib
 import sys
+import threading
+import time
+
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+from indexacao import file_signature
+
+# Valores fixos da campanha, iguais para todos os destinatários
+campaign = {
+    "produto": "caneta",
+    "texto": "Escrever muito bem",
+    "link": "https://canetaslegais.com",
+    "quantidade": 1,
+    "preco": 50.5,
+}
+
+# Remetente e assunto dos emails entregues (mbox, Maildir e SMTP)
+SENDER = "vendas@canetaslegais.com"
+SUBJECT = "Promoção: %(produto)s" % campaign
+
+# Opções aceitas na linha de comando
+valid_options = ("backend", "workers", "retries", "columns", "header",
+                 "bloom", "checkpoint", "restart")
+
+# Colunas do arquivo de emails quando não informadas
+DEFAULT_COLUMNS = ("nome", "email")
+
+# Buffer de leitura do arquivo de emails
+INPUT_BUFFER = 1 << 20
+
+# Intervalo (segundos) entre checkpoints
+CHECKPOINT_INTERVAL = 5
+
+# Taxa de falsos positivos do filtro de Bloom
+BLOOM_ERROR = 0.01
+
+# Novas tentativas dos envios que falharam e espera inicial (segundos)
+RETRIES = 3
+RETRY_BACKOFF = 1.0
+
+# Tempo limite (segundos) das operações SMTP
+SMTP_TIMEOUT = 30
+
+# Separador exibido após cada email
+SEPARATOR = "-" * 50
+
+# Formato de cada email na saída (escrito de uma só vez)
+OUTPUT_FORMAT = "Enviando email para: {email}\n\n{body}\n" + SEPARATOR + "\n"
+
+# Tamanho do buffer da saída
+OUTPUT_BUFFER = 1 << 20
+
+# Campos do template: `%(chave)formato` ou o escape `%%`
+FIELD_PATTERN = re.compile(
+    r"%\((\w+)\)[#0 +-]*\d*(?:\.\d+)?[diouxXeEfFgGcrsa]|%%")
+
+# Endereço de email aceito: um único `@` e nenhum espaço
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+")
+
+# Conversão dos valores do CSV conforme o formato do campo no template
+conversions = {
+    **dict.fromkeys("diouxX", int),
+    **dict.fromkeys("eEfFgG", float),
+}
+
+
+def compile_template(text, constants):
+    """Pré-compila o template substituindo os campos constantes.
+
+    Retorna um template `%` que contém apenas os campos que variam por
+    destinatário; a formatação dos campos constantes é feita uma única vez.
+    """
+    def substitute(match):
+        key = match.group(1)
+        if key not in constants:
+            return match.group(0)
+        # Um `%` no valor não pode ser confundido com um campo
+        return (match.group(0) % constants).replace("%", "%%")
+
+    return FIELD_PATTERN.sub(substitute, text)
+
+
+def load_template(templatepath, constants=campaign):
+    """Lê e compila o template uma única vez."""
+    with open(templatepath, encoding="utf-8") as file:
+        return compile_template(file.read(), constants)
+
+
+def template_fields(template):
+    """Campos do template compilado e a conversão de cada um."""
+    return {match.group(1): conversions.get(match.group(0)[-1], str)
+            for match in FIELD_PATTERN.finditer(template) if match.group(1)}
+
+
+def address_digest(email):
+    """Hash de 64 bits do endereço, sem diferenciar maiúsculas."""
+    return int.from_bytes(hashlib.blake2b(
+        email.lower().encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class AddressSet:
+    """Conjunto exato de endereços, guardados como hashes de 64 bits.
+
+    Tabela de endereçamento aberto em um array de 8 bytes por posição
+    (ocupação máxima de 50%), bem menor que um `set` de objetos int.
+    """
+
+    def __init__(self, capacity=1024):
+        self.table = array("Q", bytes(8 * capacity))
+        self.mask = capacity - 1
+        self.count = 0
+
+    def add(self, digest):
+        """Acrescenta o hash; retorna False se ele já estava no conjunto."""
+        digest = digest or 1  # 0 marca uma posição vazia
+        table, mask = self.table, self.mask
+        i = digest & mask
+        while True:
+            slot = table[i]
+            if not slot:
+                break
+            if slot == digest:
+                return False
+            i = (i + 1) & mask
+        table[i] = digest
+        self.count += 1
+        if self.count * 2 > len(table):
+            self._grow()
+        return True
+
+    def _grow(self):
+        """Dobra a tabela, reinserindo os hashes"""
+        old = self.table
+        self.table = array("Q", bytes(16 * len(old)))
+        self.mask = 2 * len(old) - 1
+        self.count = 0
+        for digest in old:
+            if digest:
+                self.add(digest)
+
+
+class BloomFilter:
+    """Filtro de Bloom para `capacity` endereços com a taxa de erro dada.
+
+    Ocupa uma fração da memória do AddressSet, mas um endereço novo pode
+    ser tomado por repetido (falso positivo) com probabilidade `error`.
+    """
+
+    def __init__(self, capacity, error=BLOOM_ERROR):
+        self.size = max(8, int(-capacity * math.log(error) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest):
+        """Acrescenta o hash; retorna False se ele (provavelmente) já estava."""
+        # Dupla dispersão: as k posições derivam das duas metades do hash
+        h1, h2 = digest & 0xFFFFFFFF, digest >> 32 | 1
+        bits = self.bits
+        new = False
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        return new
+
+
+class Checkpoint:
+    """Progresso de uma campanha, gravado periodicamente em disco.
+
+    `path` guarda o offset e a linha até onde todos os destinatários já
+    foram resolvidos e quantos hashes de endereços resolvidos estão em
+    `path + ".seen"`; este arquivo só recebe os hashes novos a cada
+    gravação. Um destinatário é resolvido quando seu email é entregue ou
+    quando se desiste dele após todas as tentativas; essas falhas vão para
+    `path + ".failed"` (linha, email e erro, separados por tabulação).
+
+    A entrega é "pelo menos uma vez": um email que falhou e aguarda nova
+    tentativa segura o offset gravado no ponto anterior a ele até ser
+    resolvido, e uma execução interrompida volta a ler a partir desse
+    ponto, pulando os endereços já entregues. Antes de cada gravação,
+    `flush` (a do backend) torna duráveis os emails marcados como
+    entregues.
+    """
+
+    def __init__(self, path, datapath, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.seen_path = path + ".seen"
+        self.failures_path = path + ".failed"
+        self.datapath = datapath
+        self.interval = interval
+        self.offset = 0
+        self.line = 0
+        self.count = 0
+        self.pending = array("Q")
+        # Emails que aguardam nova tentativa, na ordem do arquivo:
+        # offset do email -> (offset, linha) anteriores a ele
+        self.held = {}
+        self.flush = None
+        self.failures_mode = "w"
+        self.saved_at = time.monotonic()
+
+    def load(self):
+        """Carrega o progresso salvo; retorna os hashes já vistos.
+
+        Um checkpoint de outro arquivo de emails (ou de um arquivo alterado
+        antes do offset salvo) é ignorado.
+        """
+        digests = array("Q")
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if file_signature(self.datapath, saved["offset"]) != \
+                    tuple(saved["signature"]):
+                return digests
+            with open(self.seen_path, "rb") as f:
+                digests.fromfile(f, saved["count"])
+        except (OSError, EOFError, ValueError, KeyError):
+            return array("Q")
+        self.offset = saved["offset"]
+        self.line = saved["line"]
+        self.count = saved["count"]
+        self.failures_mode = "a"
+        return digests
+
+    def done(self, mail):
+        """Registra um email entregue, gravando se o intervalo passou."""
+        self.pending.append(address_digest(mail.email))
+        self.held.pop(mail.offset, None)
+        self._advance(mail)
+        if time.monotonic() - self.saved_at >= self.interval:
+            self.save()
+
+    def _advance(self, mail):
+        """Avança a posição lida até o fim do email (nunca recua)."""
+        if mail.offset > self.offset:
+            self.offset, self.line = mail.offset, mail.line
+
+    def failed(self, mail, error, final):
+        """Registra uma falha de entrega.
+
+        Uma falha que ainda será repetida segura o offset gravado no ponto
+        anterior ao email até que ele seja resolvido. Uma falha definitiva
+        é gravada em `failures_path` e conta como resolvida.
+        """
+        if not final:
+            self.held.setdefault(mail.offset, (self.offset, self.line))
+            self._advance(mail)
+            return
+        with open(self.failures_path, self.failures_mode,
+                  encoding="utf-8") as f:
+            f.write(f"{mail.line}\t{mail.email}\t{error}\n")
+        self.failures_mode = "a"
+        self.done(mail)
+
+    def save(self):
+        """Acrescenta os hashes novos e grava o offset de forma atômica.
+
+        O offset gravado é o anterior ao primeiro email que aguarda nova
+        tentativa, se houver algum.
+        """
+        if self.flush:
+            self.flush()
+        offset, line = next(iter(self.held.values()),
+                            (self.offset, self.line))
+        with open(self.seen_path, "r+b" if self.count else "wb") as f:
+            # Descarta hashes gravados após o último checkpoint válido
+            f.truncate(self.count * self.pending.itemsize)
+            f.seek(0, os.SEEK_END)
+            self.pending.tofile(f)
+        self.count += len(self.pending)
+        self.pending = array("Q")
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"offset": offset, "line": line, "count": self.count,
+                       "signature": file_signature(self.datapath, offset)}, f)
+        os.replace(tmp, self.path)
+        self.saved_at = time.monotonic()
+
+
+class RecipientReader:
+    """Lê os destinatários de um arquivo CSV, uma linha por vez.
+
+    Cada destinatário é um dicionário coluna -> valor, já convertido para
+    o tipo esperado pelo template (`fields`). Linhas inválidas são ignoradas
+    e relatadas em `report`; `skipped` conta quantas foram. Com um conjunto
+    `seen` (AddressSet ou BloomFilter), endereços repetidos são ignorados e
+    contados em `duplicates`. `offset` e `line` indicam a posição logo após
+    o último destinatário lido.
+    """
+
+    def __init__(self, filepath, columns=None, fields=None, seen=None,
+                 report=sys.stderr):
+        # O módulo csv recebe as linhas lidas em blocos pelo buffer de
+        # leitura; o arquivo é binário para que o offset seja conhecido
+        self.file = open(filepath, "rb", buffering=INPUT_BUFFER)
+        self.consumed = 0
+        self.line_base = 0
+        self.reader = csv.reader(self._lines(), skipinitialspace=True)
+        if columns is None:
+            # Nomes das colunas na primeira linha
+            columns = [column.strip() for column in next(self.reader, ())]
+        self.columns = tuple(columns)
+        self.fields = fields or {}
+        self.seen = seen
+        self.report = report
+        self.skipped = 0
+        self.duplicates = 0
+        self.offset = self.consumed
+        self.line = self.reader.line_num
+
+    def _lines(self):
+        """Gera as linhas do arquivo, contando os bytes consumidos."""
+        for line in self.file:
+            self.consumed += len(line)
+            yield line.decode("utf-8")
+
+    def resume(self, offset, line):
+        """Continua a leitura a partir de um offset salvo em checkpoint."""
+        if offset > self.consumed:
+            self.file.seek(offset)
+            self.consumed = self.offset = offset
+            self.line_base = line - self.reader.line_num
+            self.line = line
+
+    def parse(self, row, converted=()):
+        """Converte uma linha do CSV em destinatário; ValueError se inválida.
+
+        `converted` lista os campos (chave, conversão) que não são texto.
+        """
+        if len(row) != len(self.columns):
+            raise ValueError(
+                f"{len(row)} coluna(s), esperado {len(self.columns)}")
+        recipient = dict(zip(self.columns, row))
+        email = recipient["email"] = recipient["email"].strip()
+        if EMAIL_PATTERN.fullmatch(email) is None:
+            raise ValueError(f"email inválido `{email}`")
+        for key, convert in converted:
+            try:
+                recipient[key] = convert(recipient[key])
+            except ValueError:
+                raise ValueError(f"valor inválido para `{key}`: "
+                                 f"`{recipient[key]}`") from None
+        return recipient
+
+    def __iter__(self):
+        converted = [(key, convert) for key, convert in self.fields.items()
+                     if convert is not str and key in self.columns]
+        seen = self.seen
+        for row in self.reader:
+            self.offset = self.consumed
+            self.line = self.line_base + self.reader.line_num
+            if not row:
+                continue  # Linha em branco
+            try:
+                recipient = self.parse(row, converted)
+            except ValueError as e:
+                self.skipped += 1
+                print(f"Linha {self.line} ignorada: {e}", file=self.report)
+                continue
+            if seen is not None and \
+                    not seen.add(address_digest(recipient["email"])):
+                self.duplicates += 1
+                continue
+            yield recipient
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Um email pronto para entrega; `offset` e `line` indicam a posição logo
+# após o destinatário no arquivo de emails
+Mail = namedtuple("Mail", ["name", "email", "body", "offset", "line"],
+                  defaults=(None, None))
+
+
+def render(template, recipients):
+    """Gera o email de cada destinatário lido por um RecipientReader."""
+    for recipient in recipients:
+        yield Mail(recipient.get("nome", ""), recipient["email"],
+                   template % recipient, recipients.offset, recipients.line)
+
+
+def to_message(mail):
+    """Converte um email renderizado em uma mensagem MIME."""
+    message = EmailMessage()
+    message["From"] = SENDER
+    message["To"] = mail.email
+    message["Subject"] = SUBJECT
+    message.set_content(mail.body)
+    return message
+
+
+class StdoutBackend:
+    """Exibe cada email na saída padrão, na ordem da lista."""
+
+    concurrent = False
+
+    def __init__(self):
+        self.out = open_output()
+
+    def send(self, mail):
+        self.out.write(OUTPUT_FORMAT.format(email=mail.email, body=mail.body))
+
+    def flush(self):
+        """Esvazia o buffer da saída."""
+        self.out.flush()
+
+    def close(self):
+        self.out.close()
+
+
+class MboxBackend:
+    """Acrescenta os emails a um arquivo mbox (um único escritor)."""
+
+    concurrent = False
+
+    def __init__(self, path):
+        self.mailbox = mailbox.mbox(path)
+        self.mailbox.lock()
+
+    def send(self, mail):
+        self.mailbox.add(to_message(mail))
+
+    def flush(self):
+        """Grava no disco (fsync) os emails acrescentados."""
+        self.mailbox.flush()
+
+    def close(self):
+        self.mailbox.flush()
+        self.mailbox.unlock()
+        self.mailbox.close()
+
+
+class MaildirBackend:
+    """Grava cada email como um arquivo em uma pasta Maildir."""
+
+    concurrent = True
+
+    def __init__(self, path):
+        self.mailbox = mailbox.Maildir(path, create=True)
+
+    def send(self, mail):
+        self.mailbox.add(to_message(mail))
+
+    def flush(self):
+        """Nada a fazer: cada email é gravado no seu arquivo ao ser entregue."""
+
+    def close(self):
+        self.mailbox.close()
+
+
+class SMTPBackend:
+    """Envia os emails por SMTP com um pool de conexões reutilizadas.
+
+    São abertas no máximo `size` conexões, sob demanda; cada envio usa uma
+    conexão livre e a devolve ao pool. Conexões perdidas são descartadas e
+    recriadas no próximo envio.
+    """
+
+    concurrent = True
+
+    def __init__(self, host, port=25, size=1):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.created = 0
+        self.pool = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        """Retorna uma conexão livre, abrindo uma nova se houver espaço"""
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self.created < self.size
+            if create:
+                self.created += 1
+        if not create:
+            return self.pool.get()
+        try:
+            return smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        except OSError:
+            self._discard(None)
+            raise
+
+    def _discard(self, connection):
+        """Descarta uma conexão com problema, liberando sua vaga no pool"""
+        with self._lock:
+            self.created -= 1
+        if connection is not None:
+            connection.close()
+
+    def send(self, mail):
+        connection = self._acquire()
+        try:
+            connection.send_message(to_message(mail))
+        except smtplib.SMTPServerDisconnected:
+            self._discard(connection)
+            raise
+        except smtplib.SMTPException:
+            # Recusa apenas deste email: a conexão continua válida
+            self.pool.put(connection)
+            raise
+        except OSError:
+            self._discard(connection)
+            raise
+        self.pool.put(connection)
+
+    def flush(self):
+        """Nada a fazer: o servidor confirma cada email ao recebê-lo."""
+
+    def close(self):
+        while True:
+            try:
+                connection = self.pool.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+
+def open_backend(spec, workers=1):
+    """Cria o backend de entrega descrito por `spec` (ex.: "mbox:saida.mbox")."""
+    kind, _, target = spec.partition(":")
+    if kind == "stdout" and not target:
+        return StdoutBackend()
+    if kind == "mbox" and target:
+        return MboxBackend(target)
+    if kind == "maildir" and target:
+        return MaildirBackend(target)
+    if kind == "smtp" and target:
+        host, _, port = target.partition(":")
+        return SMTPBackend(host, int(port or 25), size=workers)
+    raise ValueError(f"Backend inválido: {spec}")
+
+
+def send_all(backend, mails, workers=1, on_done=None, on_failed=None):
+    """Entrega os emails; retorna quantos foram entregues e as falhas.
+
+    Backends concorrentes usam `workers` threads, com no máximo 2 envios
+    pendentes por thread para manter a memória constante. `on_done` é
+    chamada com cada email entregue e `on_failed` com cada falha (email,
+    erro), sempre na ordem da lista.
+    """
+    sent = 0
+    failed = []
+
+    def collect(mail, send):
+        nonlocal sent
+        try:
+            send()
+        except (OSError, mailbox.Error) as e:
+            failed.append((mail, e))
+            if on_failed:
+                on_failed(mail, e)
+            return
+        sent += 1
+        if on_done:
+            on_done(mail)
+
+    if workers == 1 or not backend.concurrent:
+        for mail in mails:
+            collect(mail, lambda: backend.send(mail))
+        return sent, failed
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for mail in mails:
+            future = executor.submit(backend.send, mail)
+            pending.append((mail, future.result))
+            if len(pending) >= 2 * workers:
+                collect(*pending.popleft())
+        while pending:
+            collect(*pending.popleft())
+    return sent, failed
+
+
+def deliver(backend, mails, workers=1, retries=RETRIES, backoff=RETRY_BACKOFF,
+            on_done=None, on_failed=None):
+    """Entrega os emails e repete as falhas com espera exponencial.
+
+    Retorna quantos foram entregues e as falhas restantes (email, erro).
+    `on_done` é chamada com cada email entregue (em qualquer passada) e
+    `on_failed` com (email, erro, definitiva) a cada falha; `definitiva`
+    indica que não haverá nova tentativa.
+    """
+    def failed_in(attempt):
+        if on_failed:
+            return lambda mail, e: on_failed(mail, e, attempt == retries)
+
+    sent, failed = send_all(backend, mails, workers, on_done, failed_in(0))
+    for attempt in range(retries):
+        if not failed:
+            break
+        time.sleep(backoff * 2 ** attempt)
+        retried, failed = send_all(
+            backend, [mail for mail, _ in failed], workers, on_done,
+            failed_in(attempt + 1))
+        sent += retried
+    return sent, failed
+
+
+def open_output():
+    """Abre a saída padrão com um buffer grande."""
+    sys.stdout.flush()
+    return open(sys.stdout.fileno(), "w", encoding="utf-8",
+                buffering=OUTPUT_BUFFER, closefd=False)
+
+
+def main(arguments):
+    # Separa as opções (`--chave=valor`) dos arquivos
+    options = {}
+    terms = []
+    for arg in arguments:
+        if arg.startswith("--"):
+            key, _, value = arg[2:].partition("=")
+            if key not in valid_options:
+                print(f"Opção inválida `{key}`")
+                print(f"Opções válidas: {valid_options}")
+                sys.exit(1)
+            options[key] = value
+        else:
+            terms.append(arg)
+    arguments = terms
+
+    for key, default in (("workers", "1"), ("retries", str(RETRIES)),
+                         ("bloom", "0")):
+        if not options.setdefault(key, default).isdigit():
+            print(f"Erro: --{key} deve ser um número inteiro.")
+            sys.exit(1)
+    workers = max(1, int(options["workers"]))
+    retries = int(options["retries"])
+
+    # Verifica se os argumentos foram fornecidos
+    if len(arguments) < 2:
+        print("Informe o nome do arquivo de emails e o do template")
+        sys.exit(1)
+
+    # Define o caminho do diretório atual
+    path = os.curdir
+
+    # Cria os caminhos completos para os arquivos de emails e template
+    filepath = os.path.join(path, arguments[0])
+    templatepath = os.path.join(path, arguments[1])
+
+    if "header" in options:
+        columns = None
+    elif options.get("columns"):
+        columns = [column.strip() for column in options["columns"].split(",")]
+    else:
+        columns = DEFAULT_COLUMNS
+
+    # Endereços já vistos: conjunto de hashes ou filtro de Bloom
+    bloom = int(options["bloom"])
+    seen = BloomFilter(bloom) if bloom else AddressSet()
+
+    checkpoint = None
+    if "checkpoint" in options:
+        checkpoint = Checkpoint(options["checkpoint"] or
+                                filepath + ".checkpoint", filepath)
+        if "restart" not in options:
+            for digest in checkpoint.load():
+                seen.add(digest)
+
+    with RecipientReader(filepath, columns, seen=seen) as recipients:
+        if checkpoint and checkpoint.offset:
+            recipients.resume(checkpoint.offset, checkpoint.line)
+            print(f"Continuando a partir da linha {checkpoint.line + 1}.",
+                  file=sys.stderr)
+        if "email" not in recipients.columns:
+            print("Erro: o arquivo de emails deve ter a coluna `email`")
+            sys.exit(1)
+        # Colunas do CSV têm prioridade sobre os valores fixos da campanha
+        template = load_template(templatepath, {
+            key: value for key, value in campaign.items()
+            if key not in recipients.columns})
+        recipients.fields = template_fields(template)
+        missing = recipients.fields.keys() - set(recipients.columns)
+        if missing:
+            print(f"Erro: campos do template sem coluna: {sorted(missing)}")
+            sys.exit(1)
+
+        try:
+            backend = open_backend(options.get("backend") or "stdout", workers)
+        except (ValueError, OSError, mailbox.Error) as e:
+            print(f"Erro: {e}")
+            sys.exit(1)
+        if checkpoint:
+            checkpoint.flush = backend.flush
+        try:
+            sent, failed = deliver(backend, render(template, recipients),
+                                   workers, retries,
+                                   on_done=checkpoint and checkpoint.done,
+                                   on_failed=checkpoint and checkpoint.failed)
+            if checkpoint:
+                # Arquivo lido até o fim (inclusive linhas ignoradas)
+                checkpoint.offset = recipients.offset
+                checkpoint.line = recipients.line
+        finally:
+            # O checkpoint final é gravado com os emails ainda pendentes no
+            # backend já duráveis (checkpoint.flush); o backend fecha depois
+            try:
+                if checkpoint:
+                    checkpoint.save()
+            finally:
+                backend.close()
+
+    if recipients.skipped:
+        print(f"{recipients.skipped} linha(s) inválida(s) ignorada(s).",
+              file=sys.stderr)
+    if recipients.duplicates:
+        print(f"{recipients.duplicates} endereço(s) repetido(s) ignorado(s).",
+              file=sys.stderr)
+
+    for mail, error in failed:
+        print(f"Falha ao enviar para {mail.email}: {error}",
+              file=sys.stderr)
+    if not isinstance(backend, StdoutBackend):
+        print(f"{sent} email(s) entregue(s), {len(failed)} falha(s).")
+    if failed:
+        sys.exit(1)
+
 
-# Captura os argumentos passados na linha de comando, excluindo o nome do script
-arguments = sys.argv[1:]
-
-# Verifica se os argumentos foram fornecidos
-if not arguments:
-    print("Informe o nome do arquivo de emails")  # Mensagem de erro
-    sys.exit()  # Encerra a execução do script
-
-# Atribui os argumentos às variáveis
-filename = arguments[0]
-templatename = arguments[1]
-
-# Define o caminho do diretório atual
-path = os.curdir
-
-# Cria os caminhos completos para os arquivos de emails e template
-filepath = os.path.join(path, filename)
-# Caminho do arquivo de template
-templatepath = os.path.join(path, templatename)
-
-# Lista para armazenar os clientes (não utilizada no código atual)
-clientes = []
-
-# Abre o arquivo de emails e processa cada linha
-for line in open(filepath):
-    # Divide a linha em nome e email usando a vírgula como separador
-    name, email = line.split(",")
-
-    # Simula o envio de um email para o cliente
-    print(f"Enviando email para: {email}")
-    print()  # Linha em branco para melhorar a legibilidade
-
-    # Lê o conteúdo do template e substitui os placeholders pelos valores correspondentes
-    print(
-        open(templatepath).read() % {
-            "nome": name,
-            "produto": "caneta",
-            "texto": "Escrever muito bem",
-            "link": "https://canetaslegais.com",
-            "quantidade": 1,
-            "preco": 50.5,
-        }
-    )
-
-    # Exibe uma linha de separação para melhorar a visualização
-    print("-" * 50)
+if __name__ == "__main__":
+    # Captura os argumentos passados na linha de comando, excluindo o nome do script
+    main(sys.argv[1:])
@@ -9,12 +9,13 @@ Funcionalidades:
     - Listagem completa das entradas (comando "list")
     - Remoção de entradas (comando "remove")
     - Edição de entradas (comando "edit")
+    - Tradução em lote a partir de arquivo ou stdin (comando "batch")
 
 Uso:
     Para adicionar uma nova tradução:
         python3 offline_dict.py new <palavra> [<código_do_idioma>]
-    Para consultar uma tradução exata:
-        python3 offline_dict.py read <palavra>
+    Para consultar uma tradução exata (com idioma, para na primeira):
+        python3 offline_dict.py read <palavra> [<código_do_idioma>]
     Para pesquisar por parte do texto ou tradução:
         python3 offline_dict.py search <termo>
     Para listar todas as entradas:
@@ -23,36 +24,54 @@ Uso:
         python3 offline_dict.py remove <palavra>
     Para editar uma entrada:
         python3 offline_dict.py edit <palavra>
+    Para traduzir em lote (uma palavra por linha; "-" lê da entrada padrão):
+        python3 offline_dict.py batch <arquivo|-> <código_do_idioma>
 """
 
+import itertools
 import os
+import pickle
+import struct
 import sys
-from googletrans import Translator
+
+from indexacao import TrigramIndex, file_signature, read_line_at
 
 # Comandos aceitos
-cmds = ("read", "new", "list", "remove", "edit", "search")
+cmds = ("read", "new", "list", "remove", "edit", "search", "batch")
 
 # Caminho do arquivo que armazenará as traduções (dicionário offline)
 path = os.curdir
 filepath = os.path.join(path, "notes.txt")
+# Índice de trigramas usado pelo comando "search"
+indexpath = os.path.join(path, "notes.tri")
+# O índice é dividido em segmentos, cada um cobrindo até SEGMENT_SIZE bytes
+# de notes.txt; a pesquisa carrega um segmento por vez
+SEGMENT_SIZE = 1 << 20
+# Cabeçalho de cada segmento: início e fim do trecho coberto, CRC da
+# assinatura do arquivo no fim do trecho e tamanho dos postings
+SEGMENT_HEADER = struct.Struct("<QQIQ")
 
+# Formato de exibição de uma entrada (escrito de uma só vez)
+ENTRY_FORMAT = "Palavra: {word}\nIdioma: {lang}\nTradução: {translation}\n" + \
+    "-" * 30 + "\n"
+# Tamanho do buffer da saída das listagens
+OUTPUT_BUFFER = 1 << 20
 
-def load_entries():
-    """Carrega todas as entradas do arquivo e retorna uma lista de dicionários."""
-    entries = []
+
+def iter_entries():
+    """Gera as entradas do arquivo sob demanda, uma linha por vez."""
     if not os.path.exists(filepath):
-        return entries
+        return
     with open(filepath, "r", encoding="utf-8") as file:
         for line in file:
-            if not line.strip():
-                continue  # Ignora linhas vazias
-            parts = line.strip().split("\t")
-            if len(parts) != 3:
-                continue  # Ignora linhas malformadas
-            entry = {"word": parts[0], "lang": parts[1],
-                     "translation": parts[2]}
-            entries.append(entry)
-    return entries
+            entry = parse_entry(line)
+            if entry:  # Ignora linhas vazias e malformadas
+                yield entry
+
+
+def load_entries():
+    """Carrega todas as entradas do arquivo e retorna uma lista de dicionários."""
+    return list(iter_entries())
 
 
 def save_entries(entries):
@@ -61,36 +80,184 @@ def save_entries(entries):
         for entry in entries:
             file.write(
                 "\t".join([entry["word"], entry["lang"], entry["translation"]]) + "\n")
+    # Os offsets do índice de trigramas só valem para acréscimos ao final:
+    # após reescrever o arquivo (mesmo com o mesmo tamanho) ele é refeito
+    if os.path.exists(indexpath):
+        os.remove(indexpath)
 
 
 def add_entry(word, target_lang, translation_text):
     """Adiciona uma nova entrada ao arquivo."""
+    add_entries([(word, target_lang, translation_text)])
+
+
+def add_entries(rows):
+    """Adiciona várias entradas ao arquivo com uma única escrita."""
     with open(filepath, "a", encoding="utf-8") as file:
-        file.write("\t".join([word, target_lang, translation_text]) + "\n")
+        file.write("".join("\t".join(row) + "\n" for row in rows))
+
+
+def parse_entry(line):
+    """Converte uma linha do arquivo em entrada; None se malformada."""
+    parts = line.strip().split("\t")
+    if len(parts) != 3:
+        return None
+    return {"word": parts[0], "lang": parts[1], "translation": parts[2]}
+
+
+def read_segments(index_file):
+    """Lê os cabeçalhos dos segmentos do índice.
+
+    Retorna uma lista de (posição no índice, início, fim, CRC, tamanho dos
+    postings), parando no primeiro segmento incompleto.
+    """
+    segments = []
+    end_of_index = index_file.seek(0, os.SEEK_END)
+    position = index_file.seek(0)
+    while position + SEGMENT_HEADER.size <= end_of_index:
+        start, end, crc, length = SEGMENT_HEADER.unpack(
+            index_file.read(SEGMENT_HEADER.size))
+        if position + SEGMENT_HEADER.size + length > end_of_index:
+            break
+        segments.append((position, start, end, crc, length))
+        position = index_file.seek(length, os.SEEK_CUR)
+    return segments
+
+
+def index_segment(file, index_file, start, stop):
+    """Indexa as linhas de notes.txt a partir de `start` em um segmento.
+
+    Lê linhas até passar de `stop`; retorna o offset final do segmento.
+    Os ids do índice são os offsets (em bytes) de cada linha.
+    """
+    index = TrigramIndex()
+    file.seek(start)
+    offset = start
+    while offset < stop:
+        line = file.readline()
+        if not line:
+            break
+        entry = parse_entry(line.decode("utf-8"))
+        if entry:
+            index.add(offset, entry["word"])
+            index.add(offset, entry["translation"])
+        offset += len(line)
+    postings = pickle.dumps(dict(index.postings),
+                            protocol=pickle.HIGHEST_PROTOCOL)
+    crc = file_signature(filepath, offset)[1]
+    index_file.write(SEGMENT_HEADER.pack(start, offset, crc, len(postings)))
+    index_file.write(postings)
+    return offset
+
+
+def update_search_index():
+    """Atualiza o índice de trigramas, indexando apenas linhas novas.
+
+    Retorna os segmentos do índice (ver `read_segments`). Um índice que
+    não corresponde mais ao arquivo é refeito; um último segmento ainda
+    pequeno é refeito junto com as linhas novas, para que acréscimos
+    frequentes não criem muitos segmentos minúsculos.
+    """
+    size = os.path.getsize(filepath)
+    mode = "r+b" if os.path.exists(indexpath) else "w+b"
+    with open(indexpath, mode) as index_file:
+        segments = read_segments(index_file)
+        if segments:
+            _, _, end, crc, _ = segments[-1]
+            if end > size or file_signature(filepath, end) != (end, crc):
+                segments = []
+        if segments and segments[-1][2] == size:
+            return segments
+        if segments and segments[-1][2] - segments[-1][1] < SEGMENT_SIZE // 2:
+            segments.pop()
+        # Descarta os segmentos inválidos ou que serão refeitos
+        indexed = kept = 0
+        if segments:
+            position, _, indexed, _, length = segments[-1]
+            kept = position + SEGMENT_HEADER.size + length
+        index_file.truncate(kept)
+        index_file.seek(kept)
+        with open(filepath, "rb") as file:
+            while indexed < size:
+                indexed = index_segment(file, index_file, indexed,
+                                        indexed + SEGMENT_SIZE)
+        return read_segments(index_file)
+
+
+def search_entries(term):
+    """Gera as entradas cuja palavra ou tradução contém o termo.
+
+    Apenas um segmento do índice fica em memória por vez: o pico de
+    memória depende de SEGMENT_SIZE, e não do tamanho de notes.txt.
+    """
+    if not os.path.exists(filepath):
+        return
+    if len(term) < 3:
+        # Termo curto demais para o índice: varredura completa
+        segments = None
+    else:
+        segments = update_search_index()
+    with open(filepath, "rb") as file:
+        if segments is None:
+            lines = iter(file)
+        else:
+            lines = segment_lines(file, segments, term)
+        for line in lines:
+            entry = parse_entry(line.decode("utf-8"))
+            if entry and (term in entry["word"].lower() or
+                          term in entry["translation"].lower()):
+                yield entry
 
 
-def display_entry(entry):
+def segment_lines(file, segments, term):
+    """Gera as linhas candidatas a conter o termo, segmento a segmento."""
+    with open(indexpath, "rb") as index_file:
+        for position, _, _, _, length in segments:
+            index_file.seek(position + SEGMENT_HEADER.size)
+            index = TrigramIndex()
+            index.postings.update(pickle.loads(index_file.read(length)))
+            offsets = sorted(index.candidates(term))
+            del index
+            for offset in offsets:
+                yield read_line_at(file, offset)
+
+
+def display_entry(entry, out=None):
     """Exibe uma entrada formatada."""
-    print(f"Palavra: {entry['word']}")
-    print(f"Idioma: {entry['lang']}")
-    print(f"Tradução: {entry['translation']}")
-    print("-" * 30)
+    (out or sys.stdout).write(ENTRY_FORMAT.format_map(entry))
+
+
+def open_output():
+    """Abre a saída padrão com um buffer grande para listagens longas.
+
+    Em um terminal a saída continua por linha, para que os primeiros
+    resultados apareçam imediatamente.
+    """
+    sys.stdout.flush()
+    buffering = 1 if sys.stdout.isatty() else OUTPUT_BUFFER
+    return open(sys.stdout.fileno(), "w", encoding="utf-8",
+                buffering=buffering, closefd=False)
+
+
+def display_entries(entries):
+    """Exibe as entradas à medida que são geradas; retorna quantas foram."""
+    count = 0
+    with open_output() as out:
+        for count, entry in enumerate(entries, 1):
+            display_entry(entry, out)
+    return count
 
 
 def list_entries():
     """Lista todas as entradas do dicionário offline."""
-    entries = load_entries()
-    if not entries:
+    if not display_entries(iter_entries()):
         print("Nenhuma entrada encontrada.")
-        return
-    for entry in entries:
-        display_entry(entry)
 
 
 # Captura dos argumentos da linha de comando
 arguments = sys.argv[1:]
 if not arguments:
-    print(f"Uso: {sys.argv[0]} [read|new|list|remove|edit|search] [args]")
+    print(f"Uso: {sys.argv[0]} [{'|'.join(cmds)}] [args]")
     sys.exit(1)
 
 command = arguments[0]
@@ -104,13 +271,16 @@ if command == "read":
         print("Erro: Informe a palavra para consulta.")
         sys.exit(1)
     query = arguments[1].lower()
-    entries = load_entries()
-    found = False
-    for entry in entries:
-        if entry["word"].lower() == query:
-            display_entry(entry)
-            found = True
-    if not found:
+    lang = arguments[2] if len(arguments) >= 3 else None
+    # Sem idioma, a palavra pode ter uma entrada por idioma: a leitura vai
+    # até o fim do arquivo, mas cada entrada é exibida assim que encontrada
+    matches = (entry for entry in iter_entries()
+               if entry["word"].lower() == query and
+               lang in (None, entry["lang"]))
+    if lang:
+        # Palavra e idioma identificam a entrada: para na primeira
+        matches = itertools.islice(matches, 1)
+    if not display_entries(matches):
         print("Nenhuma entrada encontrada para a palavra informada.")
 
 # Comando: Adicionar uma nova tradução
@@ -125,7 +295,14 @@ elif command == "new":
         target_lang = input(
             "Código do idioma para tradução (ex: en para inglês): ").strip()
 
-    translator = Translator()
+    # O googletrans só é necessário para traduzir: os demais comandos
+    # funcionam sem ele
+    from googletrans import Translator
+    from dicionario import CachedTranslator, TranslationCache
+
+    # Traduções repetidas são servidas pelo cache, sem acessar a rede
+    cache = TranslationCache()
+    translator = CachedTranslator(Translator(), cache)
     try:
         translation_obj = translator.translate(
             word, src="pt", dest=target_lang)
@@ -134,6 +311,8 @@ elif command == "new":
     except Exception as e:
         print("Erro ao traduzir:", e)
         sys.exit(1)
+    finally:
+        cache.close()
 
     add_entry(word, target_lang, translation_text)
 
@@ -196,11 +375,41 @@ elif command == "search":
         print("Erro: Informe o termo para pesquisa.")
         sys.exit(1)
     search_term = arguments[1].lower()
-    entries = load_entries()
-    found = False
-    for entry in entries:
-        if search_term in entry["word"].lower() or search_term in entry["translation"].lower():
-            display_entry(entry)
-            found = True
-    if not found:
+    if not display_entries(search_entries(search_term)):
         print("Nenhuma entrada encontrada contendo o termo informado.")
+
+# Comando: Tradução em lote (uma palavra por linha)
+elif command == "batch":
+    if len(arguments) < 3:
+        print("Erro: Informe o arquivo de palavras (ou '-') e o idioma.")
+        sys.exit(1)
+    source, target_lang = arguments[1], arguments[2]
+    if source == "-":
+        # A entrada padrão não é fechada
+        lines = sys.stdin.readlines()
+    else:
+        with open(source, encoding="utf-8") as file:
+            lines = file.readlines()
+    words = list(dict.fromkeys(line.strip() for line in lines if line.strip()))
+
+    # Ignora palavras que já possuem tradução para o idioma
+    existing = {(entry["word"], entry["lang"]) for entry in iter_entries()}
+    words = [word for word in words if (word, target_lang) not in existing]
+
+    from googletrans import Translator
+    from dicionario import CachedTranslator, TranslationCache
+
+    cache = TranslationCache()
+    translator = CachedTranslator(Translator(), cache)
+    try:
+        translations = translator.translate_many(
+            words, src="pt", dest=target_lang)
+    except Exception as e:
+        print("Erro ao traduzir:", e)
+        sys.exit(1)
+    finally:
+        cache.close()
+
+    add_entries([(word, target_lang, translation.text)
+                 for word, translation in zip(words, translations)])
+    print(f"{len(words)} nova(s) tradução(ões) adicionada(s).")
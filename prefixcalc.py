@@ -3,15 +3,64 @@
 Calculadora Prefixada.
 
 Funcionamento:
-A calculadora aceita operações prefixadas, onde a operação é especificada antes dos operandos. 
+A calculadora aceita operações prefixadas, onde a operação é especificada antes dos operandos.
 Ela pode ser usada tanto via linha de comando quanto de forma interativa.
+As expressões podem ser aninhadas: cada operando pode ser outra operação.
 
 Uso via linha de comando:
     [operação] [n1] [n2]
+    [operação] [operação] [n1] [n2] [n3] ...
 
 Uso interativo:
     Quando executada sem argumentos, a calculadora solicitará a operação e os valores.
 
+Uso em lote (streaming):
+    --stream            lê uma operação por linha da entrada padrão
+    --stream=[arquivo]  lê uma operação por linha do arquivo
+
+    Cada linha da entrada produz uma linha na saída, na mesma ordem. Linhas
+    inválidas produzem uma linha vazia e são relatadas na saída de erro,
+    sem interromper o processamento. Em cada lote, expressões aninhadas com
+    a mesma forma (`sum 1 mul 2 3`, `sum 4 mul 5 6`, ...) são compiladas
+    uma única vez e avaliadas juntas (ver "Uso como módulo").
+
+    $ printf "sum 5 2\\nmul 2 3\\n" | prefixcalc.py --stream
+    7
+    6
+
+    --workers=[N]       distribui os lotes entre N processos (implica
+                        --stream); a saída e o log continuam na ordem
+                        da entrada e o log tem um único escritor
+
+    $ prefixcalc.py --stream=operacoes.txt --workers=4
+    $ prefixcalc.py --stream=operacoes.txt --workers 4
+
+    As opções com valor obrigatório (--workers, --numeric, --from, --to e
+    --user) também aceitam o valor como argumento seguinte.
+
+Precisão numérica:
+    --numeric=[modo]    tipo numérico usado em toda a execução:
+        auto      int para inteiros e float para decimais (padrão)
+        int       apenas inteiros; `div` é a divisão inteira (//)
+        float     ponto flutuante
+        decimal   decimal.Decimal, exato em base 10 (valores monetários)
+        fraction  fractions.Fraction, racionais exatos
+
+    $ prefixcalc.py --numeric=decimal sum 0.1 0.2
+    O resultado é 0.3
+
+    Operandos aceitam sinal e expoente: -5, 2.5, 1e3, -1.5E-2
+
+Cache de resultados:
+    --cache             guarda os resultados em `prefixcal.cache`
+    --cache=[arquivo]   guarda os resultados no arquivo informado
+
+    O cache é indexado pela expressão normalizada e pelo modo numérico e
+    guarda no máximo 100.000 resultados (os menos usados são
+    descartados). Acertos não são analisados nem avaliados, mas continuam
+    registrados no log. A taxa de acertos é exibida na saída de erro ao
+    final da execução. Não pode ser combinado com --workers.
+
 Operações suportadas:
     sum -> Soma (+)
     sub -> Subtração (-)
@@ -25,99 +74,971 @@ Exemplos de uso:
     $ prefixcalc.py mul 10 5
     50
 
+    $ prefixcalc.py sum 1 mul 2 3
+    7
+
     $ prefixcalc.py
     operação: sum
     n1: 5
     n2: 4
     9
 
+Uso como módulo (avaliação vetorizada):
+    Uma expressão é compilada uma única vez em uma árvore de avaliação e pode
+    ser avaliada sobre colunas inteiras de operandos. Nomes que não são
+    operações nem números são variáveis:
+
+    >>> expression = compile_expression("sum x mul 2 y")
+    >>> expression.evaluate_many({"x": [1, 2], "y": [3, 4]})
+    [7, 10]
+
+    Com o NumPy instalado, colunas do tipo `numpy.ndarray` são avaliadas
+    diretamente pelo NumPy.
+
 Resultados:
     Os resultados das operações são salvos em um arquivo de log chamado `Prefixcal.log` no diretório atual.
 
+    O log é rotacionado ao atingir 64 MiB ou 7 dias; são mantidos os 10
+    arquivos rotacionados mais recentes
+    (`prefixcal.log.AAAAMMDDTHHMMSSffffff`). A idade conta a partir do
+    início do log atual, guardado em `prefixcal.log.start` quando o log é
+    criado ou rotacionado; um log que já existia sem esse arquivo (como o
+    do repositório) conta a partir da primeira escrita. Cada arquivo de
+    log tem um índice (`.idx`) por data/hora e por usuário, atualizado de
+    forma incremental a cada consulta.
+
+Histórico:
+    history [--from=data] [--to=data] [--user=nome]
+
+    Lista os registros do log (inclusive dos arquivos rotacionados) no
+    intervalo [from, to) e/ou do usuário informado. Datas no formato ISO
+    (2026-10-16 ou 2026-10-16T14:30). Registros no formato antigo
+    (`mul, 8, 99 = 792`) não têm data nem usuário e só aparecem sem filtros.
+
+    $ prefixcalc.py history --user=maria --from=2026-10-16 --to=2026-10-17
+
 Versão:
-    Versão atual: 0.1.0
+    Versão atual: 0.2.0
 """
 
 # Importações necessárias
+import glob
+import multiprocessing
+import operator
 import os
+import pickle
+import re
 import sys
+import time
 
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
 from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+from itertools import islice, repeat
+
+from indexacao import file_signature, read_line_at
+
+# O NumPy é opcional: se instalado, colunas numpy são avaliadas por ele
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Versão do programa
-__version__ = "0.1.0"
-
-# Obtém os argumentos passados na linha de comando, ignorando o primeiro (nome do script)
-arguments = sys.argv[1:]
-
-# Verifica se não há argumentos passados
-if not arguments:
-    # Se não houver, solicita ao usuário que insira a operação e os números
-    operation = input("Operação: ")
-    n1 = input("n1: ")
-    n2 = input("n2: ")
-    # Armazena os valores inseridos em uma lista chamada `arguments`
-    arguments = [operation, n1, n2]
-# Verifica se o número de argumentos é diferente de 3
-elif len(arguments) != 3:
-    # Se for diferente, exibe uma mensagem de erro e encerra o programa
-    print("Número de argumentos inválidos")
-    print("Exemplo de uso: `sum 5 5`")
-    sys.exit(1)  # Encerra o programa com código de erro 1
-
-# Separa a operação e os números da lista de argumentos
-operation, *nums = arguments
+__version__ = "0.2.0"
 
 # Lista de operações válidas
 valid_operations = ("sum", "sub", "mul", "div")
 
-# Verifica se a operação fornecida está na lista de operações válidas
-if operation not in valid_operations:
-    print("Operação inválida")
-    print(f"Operações válidas: {valid_operations}")
-    sys.exit(1)  # Encerra o programa com código de erro 1
+# Função que implementa cada operação válida
+operations = {
+    "sum": operator.add,  # Soma
+    "sub": operator.sub,  # Subtração
+    "mul": operator.mul,  # Multiplicação
+    "div": operator.truediv,  # Divisão
+}
 
-# Lista para armazenar os números validados
-validated_nums = []
+# No modo int a divisão também deve resultar em um inteiro
+backend_operations = {"int": {**operations, "div": operator.floordiv}}
 
-# Itera sobre os números fornecidos
-for num in nums:
-    # Verifica se o número é válido (permite números inteiros ou decimais)
-    if not num.replace(".", "").isdigit():
-        print(f"Número inválido: {num}")
-        sys.exit(1)  # Encerra o programa com código de erro 1
+# Construtor do número em cada modo numérico ("auto" escolhe int ou float)
+numeric_backends = {
+    "auto": None,
+    "int": int,
+    "float": float,
+    "decimal": Decimal,
+    "fraction": Fraction,
+}
 
-    # Converte o número para float (se tiver ponto decimal) ou int (caso contrário)
-    if "." in num:
-        num = float(num)
-    else:
-        num = int(num)
-    # Adiciona o número validado à lista `validated_nums`
-    validated_nums.append(num)
-
-# Atribui os números validados às variáveis n1 e n2
-n1, n2 = validated_nums
-
-# Realiza a operação matemática com base na operação fornecida
-if operation == "sum":
-    result = n1 + n2  # Soma
-elif operation == "sub":
-    result = n1 - n2  # Subtração
-elif operation == "mul":
-    result = n1 * n2  # Multiplicação
-elif operation == "div":
-    result = n1 / n2  # Divisão
+# Operando numérico: sinal, parte decimal (grupo 1) e expoente (grupo 2).
+# Apenas dígitos ASCII: "²" ou "٣" não são operandos válidos
+NUMBER_PATTERN = re.compile(
+    r"[+-]?(?:\d+|(?=\.?\d)(\d*\.\d*))([eE][+-]?\d+)?", re.ASCII)
+
+# Limites de um operando, verificados antes da conversão: quantidade de
+# dígitos (o mesmo limite padrão do int do Python) e valor do expoente
+NUMBER_MAX_DIGITS = 4300
+NUMBER_MAX_EXPONENT = 4300
+
+# Opções aceitas na linha de comando
+valid_options = ("stream", "workers", "numeric", "cache", "from", "to", "user")
+# Opções que sempre têm valor: aceitam `--chave=valor` e `--chave valor`
+value_options = ("workers", "numeric", "from", "to", "user")
+
+# Subcomandos
+valid_commands = ("history",)
+
+# Modo streaming: quantidade de linhas avaliadas (e registradas no log) por lote
+STREAM_CHUNK = 10_000
 
 # Define o caminho do arquivo de log
 path = os.curdir
 filepath = os.path.join(path, "prefixcal.log")
-timestamp = datetime.now().isoformat()
-user = os.getenv("USER", "anonymous")
+# Cache de resultados (opção --cache)
+cachepath = os.path.join(path, "prefixcal.cache")
+
+# Quantidade máxima de resultados guardados no cache
+CACHE_MAX_ENTRIES = 100_000
+
+# Rotação do log: tamanho máximo, idade máxima (segundos) desde o início
+# do log atual e quantidade de arquivos rotacionados mantidos
+LOG_MAX_BYTES = 64 * 1024 * 1024
+LOG_MAX_AGE = 7 * 24 * 60 * 60
+LOG_BACKUPS = 10
+
+
+class ExpressionError(ValueError):
+    """Erro de validação de uma expressão prefixada."""
+
+
+def is_column(value):
+    """Indica se o valor é uma coluna de operandos (e não um escalar)."""
+    return hasattr(value, "__len__") and not isinstance(value, str)
+
+
+class Number:
+    """Nó folha com um número constante."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, env):
+        return self.value
+
+    def columns(self, env):
+        # Constantes continuam escalares; são "repetidas" só quando usadas
+        return self.value
+
+    def __str__(self):
+        return str(self.value)
+
+
+class Variable:
+    """Nó folha com um operando nomeado, informado na avaliação."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def evaluate(self, env):
+        try:
+            return env[self.name]
+        except (KeyError, TypeError):
+            raise ExpressionError(f"Número inválido: {self.name}") from None
+
+    def columns(self, env):
+        return self.evaluate(env)
+
+    def __str__(self):
+        return self.name
+
+
+class Operation:
+    """Nó interno: aplica uma operação válida aos dois operandos."""
+
+    __slots__ = ("operation", "function", "left", "right")
+
+    def __init__(self, operation, left, right, numeric="auto"):
+        self.operation = operation
+        self.function = operations_for(numeric)[operation]
+        self.left = left
+        self.right = right
+
+    def evaluate(self, env):
+        return self.function(self.left.evaluate(env), self.right.evaluate(env))
+
+    def columns(self, env):
+        left = self.left.columns(env)
+        right = self.right.columns(env)
+        # Dois escalares: o nó inteiro é constante
+        if not is_column(left) and not is_column(right):
+            return self.function(left, right)
+        # Arrays do NumPy já operam elemento a elemento
+        if numpy is not None and (isinstance(left, numpy.ndarray) or
+                                  isinstance(right, numpy.ndarray)):
+            return self.function(left, right)
+        # Uma passada sobre a coluna inteira, com escalares repetidos
+        return list(map(
+            self.function,
+            left if is_column(left) else repeat(left),
+            right if is_column(right) else repeat(right),
+        ))
+
+    def __str__(self):
+        # Mesmo formato usado no log: "sum, 5, 2"
+        return f"{self.operation}, {self.left}, {self.right}"
+
+
+class Expression:
+    """Expressão compilada, reutilizável para quantos operandos for preciso."""
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def evaluate(self, env=None):
+        """Avalia a expressão para um único conjunto de variáveis."""
+        return self.tree.evaluate(env)
+
+    def evaluate_many(self, columns=None):
+        """Avalia a expressão sobre colunas de operandos em uma passada.
+
+        `columns` mapeia o nome de cada variável para uma sequência de
+        valores; todas devem ter o mesmo tamanho.
+        """
+        result = self.tree.columns(columns or {})
+        if is_column(result):
+            return result
+        # Expressão sem variáveis: o mesmo resultado para cada linha
+        size = len(next(iter(columns.values()))) if columns else 1
+        return [result] * size
+
+    def __str__(self):
+        return str(self.tree)
+
+
+def operations_for(numeric):
+    """Funções das operações no modo numérico informado."""
+    return backend_operations.get(numeric, operations)
+
+
+def parse_number(num, numeric="auto"):
+    """Valida e converte um operando numérico no modo informado."""
+    # Inteiros sem sinal são o caso mais comum
+    if numeric == "auto" and num.isdigit() and num.isascii() and \
+            len(num) <= NUMBER_MAX_DIGITS:
+        return int(num)
+    # Verifica se o número é válido (sinal, parte decimal e expoente)
+    match = NUMBER_PATTERN.fullmatch(num)
+    if match is None:
+        raise ExpressionError(f"Número inválido: {num}")
+    # Limita o tamanho antes de construir int, Fraction ou Decimal
+    exponent = match.group(2) or ""
+    mantissa = num[:len(num) - len(exponent)]
+    if len(mantissa.lstrip("+-").replace(".", "")) > NUMBER_MAX_DIGITS:
+        raise ExpressionError(
+            f"Número inválido: mais de {NUMBER_MAX_DIGITS} dígitos")
+    if exponent and (len(exponent) > len(str(NUMBER_MAX_EXPONENT)) + 2 or
+                     abs(int(exponent[1:])) > NUMBER_MAX_EXPONENT):
+        raise ExpressionError(
+            f"Número inválido: expoente maior que {NUMBER_MAX_EXPONENT}")
+    integral = match.lastindex is None
+    if numeric == "auto":
+        # Converte para int (se for inteiro) ou float (caso contrário)
+        return int(num) if integral else float(num)
+    if numeric == "int" and not integral:
+        raise ExpressionError(f"Número inválido no modo int: {num}")
+    return numeric_backends[numeric](num)
+
+
+def parse_operand(token, numeric="auto"):
+    """Converte um token que não é operação em número ou variável."""
+    if token.isidentifier():
+        return Variable(token)
+    return Number(parse_number(token, numeric))
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(text, numeric="auto"):
+    """Compila uma expressão prefixada em uma árvore de avaliação.
+
+    A leitura é feita da direita para a esquerda com uma pilha: operandos
+    são empilhados e cada operação consome os dois do topo. Os números
+    são convertidos para o modo numérico `numeric`.
+    """
+    tokens = text.split()
+    # A expressão deve começar por uma operação válida
+    if not tokens or tokens[0] not in operations:
+        raise ExpressionError(
+            f"Operação inválida\nOperações válidas: {valid_operations}")
+
+    stack = []
+    for token in reversed(tokens):
+        if token in operations:
+            if len(stack) < 2:
+                break
+            left = stack.pop()
+            right = stack.pop()
+            stack.append(Operation(token, left, right, numeric))
+        else:
+            stack.append(parse_operand(token, numeric))
+    else:
+        if len(stack) == 1:
+            return Expression(stack[0])
+    raise ExpressionError(
+        "Número de argumentos inválidos\nExemplo de uso: `sum 5 5`")
+
+
+class ResultCache:
+    """Cache LRU de resultados, persistido em disco entre execuções.
+
+    As chaves são (expressão normalizada, modo numérico) e os valores são
+    (expressão como texto, resultado como texto), exatamente como vão para
+    a saída e para o log.
+    """
+
+    def __init__(self, path=cachepath, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.results = OrderedDict()
+        try:
+            with open(path, "rb") as f:
+                self.results = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass  # Cache ausente ou corrompido: começa vazio
+
+    def get(self, key):
+        """Retorna o resultado em cache ou None."""
+        value = self.results.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.results.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        """Guarda um resultado, descartando os menos usados."""
+        self.results[key] = value
+        self.results.move_to_end(key)
+        while len(self.results) > self.max_entries:
+            self.results.popitem(last=False)
+
+    def save(self):
+        """Grava o cache no disco de forma atômica."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self.results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def stats(self):
+        """Resumo dos acertos e falhas do cache."""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0
+        return (f"Cache: {self.hits} acertos, {self.misses} falhas "
+                f"({rate:.1%}), {len(self.results)} resultados guardados")
+
+
+def evaluate_line(line, numeric="auto"):
+    """Avalia uma linha; retorna a expressão (como texto) e o resultado."""
+    return evaluate_tokens(line.split(), numeric)
+
+
+def evaluate_tokens(tokens, numeric="auto"):
+    """Avalia os termos de uma linha já separados (ver `evaluate_line`)."""
+    # Caminho rápido para o caso mais comum: `operação n1 n2`
+    if len(tokens) == 3 and tokens[0] in operations:
+        operation, n1, n2 = tokens
+        n1 = parse_number(n1, numeric)
+        n2 = parse_number(n2, numeric)
+        function = operations_for(numeric)[operation]
+        return f"{operation}, {n1}, {n2}", function(n1, n2)
+    expression = compile_expression(" ".join(tokens), numeric)
+    return str(expression), expression.evaluate()
+
+
+def evaluate_checked(tokens, lineno, numeric="auto"):
+    """Avalia os termos de uma linha; retorna (expressão, resultado, erro).
+
+    Em caso de erro, expressão e resultado são None e `erro` é a mensagem
+    relatada para a linha (None também para uma linha em branco).
+    """
+    try:
+        expression, result = evaluate_tokens(tokens, numeric)
+        return expression, str(result), None
+    except ExpressionError as e:
+        if not tokens:
+            return None, None, None
+        message = str(e).replace("\n", ". ")
+        return None, None, f"linha {lineno}: {message}"
+    except ZeroDivisionError:
+        return None, None, f"linha {lineno}: Divisão por zero"
+    except (ArithmeticError, ValueError) as e:
+        # Valores fora dos limites: OverflowError ao converter para
+        # float, ValueError no limite de dígitos de int -> str
+        return None, None, f"linha {lineno}: Valor fora dos limites ({e})"
+
+
+def expression_shape(tokens, numeric="auto"):
+    """Forma de uma expressão e seus operandos já convertidos.
+
+    A forma é a sequência de termos com cada número trocado por "".
+    Retorna None se algum operando não for um número válido.
+    """
+    try:
+        operands = [parse_number(token, numeric) for token in tokens
+                    if token not in operations]
+    except ExpressionError:
+        return None
+    return tuple(token if token in operations else "" for token in tokens), \
+        operands
+
+
+def compile_shape(shape, numeric="auto"):
+    """Compila uma forma com uma variável (`_0`, `_1`, ...) por operando.
+
+    Retorna a expressão, os nomes das variáveis e o formato da expressão
+    no log, com um `{}` por operando. Gera ExpressionError se a forma for
+    inválida.
+    """
+    names = [f"_{i}" for i in range(shape.count(""))]
+    variables = iter(names)
+    expression = compile_expression(
+        " ".join(token or next(variables) for token in shape), numeric)
+    operands = set(names)
+    template = ", ".join("{}" if term in operands else term
+                         for term in str(expression).split(", "))
+    return expression, names, template
+
+
+def evaluate_lines(lines, first_lineno=1, numeric="auto", cache=None):
+    """Avalia um bloco de linhas no modo numérico `numeric`.
+
+    Retorna o texto de saída (uma linha por linha de entrada), as mensagens
+    de erro e as linhas de log do bloco. Com um `cache`, linhas já
+    avaliadas não são analisadas novamente.
+
+    Expressões `operação n1 n2` são avaliadas uma a uma. As aninhadas são
+    agrupadas pela forma (`expression_shape`), e cada forma é compilada
+    uma única vez e avaliada sobre as colunas de operandos do grupo por
+    `Expression.evaluate_many`. Um grupo em que alguma linha falha é
+    dividido ao meio até isolá-la; ela é então avaliada sozinha, para que
+    o erro seja relatado na linha certa.
+    """
+    timestamp = datetime.now().isoformat()
+    user = os.getenv("USER", "anonymous")
+    prefix = f"{timestamp} - {user} - "
+    output = []
+    errors = []
+    log = []
+    # Expressões aninhadas por forma: (posições na saída e no log, número
+    # da linha, termos, chave do cache) de cada linha e colunas de operandos
+    shapes = {}
+    # Referências locais: este laço roda milhões de vezes
+    append_output = output.append
+    append_log = log.append
+    for lineno, line in enumerate(lines, first_lineno):
+        tokens = line.split()
+        key = None
+        if cache is not None:
+            key = (" ".join(tokens), numeric)
+            hit = cache.get(key)
+            if hit is not None:
+                expression, result = hit
+                append_output(result)
+                append_log(f"{prefix}{expression} = {result}")
+                continue
+        if len(tokens) > 3:
+            shape = expression_shape(tokens, numeric)
+            if shape is not None:
+                shape, operands = shape
+                group = shapes.get(shape)
+                if group is None:
+                    group = shapes[shape] = ([], [[] for _ in operands])
+                group[0].append((len(output), len(log), lineno, tokens, key))
+                for column, operand in zip(group[1], operands):
+                    column.append(operand)
+                append_output("")
+                append_log(None)
+                continue
+        expression, result, error = evaluate_checked(tokens, lineno, numeric)
+        if result is None:
+            if error:
+                errors.append(error)
+            append_output("")
+            continue
+        if cache is not None:
+            cache.set(key, (expression, result))
+        append_output(result)
+        append_log(f"{prefix}{expression} = {result}")
+
+    failed = False
+    for shape, (rows, columns) in shapes.items():
+        try:
+            expression, names, template = compile_shape(shape, numeric)
+        except ExpressionError:
+            pending = []  # Forma inválida (`sum 1 2 3 4`): linha a linha
+            single = rows
+        else:
+            pending = [(rows, columns)]
+            single = []
+        while pending:
+            rows, columns = pending.pop()
+            try:
+                results = list(map(str, expression.evaluate_many(
+                    dict(zip(names, columns)))))
+            except (ArithmeticError, ValueError):
+                # Uma linha falhou: o grupo é dividido ao meio até isolá-la
+                if len(rows) == 1:
+                    single.extend(rows)
+                    continue
+                half = len(rows) // 2
+                pending.append((rows[half:],
+                                [column[half:] for column in columns]))
+                pending.append((rows[:half],
+                                [column[:half] for column in columns]))
+                continue
+            for (out, entry, _, _, key), result, *operands in zip(
+                    rows, results, *columns):
+                text = template.format(*operands)
+                if cache is not None:
+                    cache.set(key, (text, result))
+                output[out] = result
+                log[entry] = f"{prefix}{text} = {result}"
+        for out, entry, lineno, tokens, key in single:
+            text, result, error = evaluate_checked(tokens, lineno, numeric)
+            if result is None:
+                if error:
+                    errors.append(error)
+                failed = True
+                continue
+            if cache is not None:
+                cache.set(key, (text, result))
+            output[out] = result
+            log[entry] = f"{prefix}{text} = {result}"
+    if failed:
+        log = [entry for entry in log if entry is not None]
+    if shapes and errors:
+        # Erros dos grupos vêm depois: volta à ordem das linhas
+        errors.sort(key=lambda error: int(error.split(":", 1)[0][6:]))
+    output.append("")
+    return "\n".join(output), errors, log
+
+
+def read_chunks(file_, size=STREAM_CHUNK):
+    """Gera listas de até `size` linhas do arquivo."""
+    while True:
+        chunk = list(islice(file_, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_results(results):
+    """Escreve a saída, os erros e o log de um lote avaliado."""
+    output, errors, log = results
+    sys.stdout.write(output)
+    if errors:
+        sys.stderr.write("".join(e + "\n" for e in errors))
+    # Uma única escrita no log por lote
+    write_log(log)
+
+
+def run_stream(source, workers=1, numeric="auto", cache=None):
+    """Avalia uma operação por linha de `source` ("-" para stdin).
+
+    Só o arquivo aberto aqui é fechado ao final; a entrada padrão continua
+    aberta.
+    """
+    if source == "-":
+        stream_file(sys.stdin, workers, numeric, cache)
+        return
+    with open(source) as file_:
+        stream_file(file_, workers, numeric, cache)
+
+
+def stream_file(file_, workers=1, numeric="auto", cache=None):
+    """Avalia uma operação por linha de um arquivo já aberto.
+
+    Com mais de um worker, os lotes são avaliados em um pool de processos.
+    Apenas este processo escreve a saída e o log, sempre na ordem dos
+    lotes; no máximo 2 lotes por worker ficam pendentes, limitando a
+    memória usada.
+    """
+    lineno = 1
+    if workers == 1:
+        for chunk in read_chunks(file_):
+            write_results(evaluate_lines(chunk, lineno, numeric, cache))
+            lineno += len(chunk)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for chunk in read_chunks(file_):
+            pending.append(pool.apply_async(
+                evaluate_lines, (chunk, lineno, numeric)))
+            lineno += len(chunk)
+            if len(pending) >= 2 * workers:
+                write_results(pending.popleft().get())
+        while pending:
+            write_results(pending.popleft().get())
+
+
+def write_log(lines):
+    """Acrescenta as linhas ao arquivo de log com uma única escrita."""
+    if should_rotate():
+        rotate_log()
+    with open(filepath, "a") as file_:
+        file_.write("".join(line + "\n" for line in lines))
+
+
+def parse_log_line(line):
+    """Converte uma linha do log em (data/hora, usuário, expressão, resultado).
+
+    Aceita o formato atual (`data - usuário - sum, 5, 2 = 7`) e o antigo
+    (`sum, 5, 2 = 7`), no qual data/hora e usuário são None. Retorna None
+    para linhas malformadas.
+    """
+    expression, sep, result = line.rstrip("\n").rpartition(" = ")
+    if not sep:
+        return None
+    parts = expression.split(" - ", 2)
+    if len(parts) == 3:
+        try:
+            timestamp = datetime.fromisoformat(parts[0])
+        except ValueError:
+            pass
+        else:
+            return timestamp, parts[1], parts[2], result
+    return None, None, expression, result
+
+
+def should_rotate():
+    """Indica se o log atingiu o tamanho ou a idade máxima.
+
+    Um log ainda inexistente começa agora (ver `log_start_time`).
+    """
+    try:
+        size = os.path.getsize(filepath)
+    except OSError:
+        start_log()
+        return False
+    if size >= LOG_MAX_BYTES:
+        return True
+    return time.time() - log_start_time() >= LOG_MAX_AGE
+
+
+def start_log():
+    """Registra o início do log atual (`.start`); retorna o timestamp."""
+    start = time.time()
+    tmp = filepath + ".start.tmp"
+    with open(tmp, "w") as file_:
+        file_.write(repr(start))
+    os.replace(tmp, filepath + ".start")
+    return start
+
+
+def log_start_time():
+    """Data/hora (timestamp) do início do log atual.
+
+    Lida do arquivo `.start`, sem abrir o log. Sem esse arquivo, o log já
+    existia antes de ser aberto por esta versão e sua idade é desconhecida:
+    ele começa agora.
+    """
+    try:
+        with open(filepath + ".start") as file_:
+            return float(file_.read())
+    except (OSError, ValueError):
+        return start_log()
+
+
+def rotated_logs():
+    """Arquivos de log rotacionados, do mais antigo para o mais recente."""
+    return sorted(glob.glob(glob.escape(filepath) + ".[0-9]*[0-9]"))
+
+
+def rotate_log():
+    """Renomeia o log atual (e seu índice) e descarta os mais antigos."""
+    rotated = f"{filepath}.{datetime.now():%Y%m%dT%H%M%S%f}"
+    os.replace(filepath, rotated)
+    if os.path.exists(filepath + ".idx"):
+        os.replace(filepath + ".idx", rotated + ".idx")
+    start_log()
+    for old in rotated_logs()[:-LOG_BACKUPS]:
+        for name in (old, old + ".idx"):
+            if os.path.exists(name):
+                os.remove(name)
+
+
+class LogIndex:
+    """Índice de um arquivo de log por data/hora e por usuário.
+
+    Guarda o offset (em bytes) de cada registro: `times`/`time_offsets`
+    ordenados por data/hora e, para cada usuário, seus offsets em ordem.
+    O índice cobre os primeiros `size` bytes do log e é estendido apenas
+    com as linhas acrescentadas desde então.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.times = array("d")
+        self.time_offsets = array("q")
+        self.users = {}
+        self.unsorted = False
+
+    def update(self, logpath):
+        """Indexa os registros completos acrescentados ao log."""
+        with open(logpath, "rb") as file_:
+            file_.seek(self.size)
+            offset = self.size
+            last_text = last_time = None
+            for line in file_:
+                if not line.endswith(b"\n"):
+                    break  # Registro ainda sendo escrito
+                parts = line.split(b" - ", 2)
+                if len(parts) == 3 and b" = " in parts[2]:
+                    # Registros de um mesmo lote compartilham a data/hora,
+                    # convertida uma única vez
+                    if parts[0] != last_text:
+                        try:
+                            last_time = datetime.fromisoformat(
+                                parts[0].decode()).timestamp()
+                        except ValueError:
+                            last_time = None  # Formato antigo
+                        last_text = parts[0]
+                    if last_time is not None:
+                        self.add(last_time, parts[1].decode(), offset)
+                offset += len(line)
+        self.sort()
+        changed = offset != self.size
+        self.size = offset
+        return changed
+
+    def add(self, timestamp, user, offset):
+        """Indexa o registro que começa em `offset`.
+
+        Registros fora de ordem (processos concorrentes) também vão para o
+        fim; `sort` reordena o índice uma única vez, ao final do `update`.
+        """
+        if self.times and timestamp < self.times[-1]:
+            self.unsorted = True
+        self.times.append(timestamp)
+        self.time_offsets.append(offset)
+        self.users.setdefault(user, array("q")).append(offset)
+
+    def sort(self):
+        """Reordena por data/hora os registros acrescentados fora de ordem.
+
+        A ordenação é estável: registros com a mesma data/hora continuam
+        na ordem do arquivo. Quase todo o índice já está em ordem, o que
+        torna a ordenação praticamente linear.
+        """
+        if not self.unsorted:
+            return
+        order = sorted(range(len(self.times)), key=self.times.__getitem__)
+        self.times = array("d", map(self.times.__getitem__, order))
+        self.time_offsets = array("q", map(self.time_offsets.__getitem__,
+                                           order))
+        self.unsorted = False
+
+    def query(self, start=None, end=None, user=None):
+        """Offsets dos registros em [start, end) e/ou do usuário, em ordem.
+
+        Sem nenhum filtro retorna None: o arquivo deve ser lido por inteiro.
+        """
+        if start is None and end is None and user is None:
+            return None
+        self.sort()
+        offsets = None
+        if start is not None or end is not None:
+            first = 0 if start is None else bisect_left(self.times, start)
+            last = (len(self.times) if end is None
+                    else bisect_left(self.times, end))
+            offsets = set(self.time_offsets[first:last])
+        if user is not None:
+            by_user = self.users.get(user, ())
+            offsets = set(by_user) if offsets is None else \
+                offsets.intersection(by_user)
+        return sorted(offsets)
+
+    def save(self, path, signature):
+        """Salva o índice junto com a assinatura do log indexado."""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"signature": signature, "times": self.times,
+                         "time_offsets": self.time_offsets,
+                         "users": self.users},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, logpath):
+        """Carrega o índice de `logpath`, atualizado até o fim do log.
+
+        Um índice ausente ou que não corresponde mais ao log é refeito.
+        """
+        index = cls()
+        indexpath = logpath + ".idx"
+        try:
+            with open(indexpath, "rb") as f:
+                saved = pickle.load(f)
+            size = saved["signature"][0]
+            if size <= os.path.getsize(logpath) and \
+                    file_signature(logpath, size) == saved["signature"]:
+                index.size = size
+                index.times = saved["times"]
+                index.time_offsets = saved["time_offsets"]
+                index.users = saved["users"]
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+            pass
+        if index.update(logpath):
+            index.save(indexpath, file_signature(logpath, index.size))
+        return index
+
+
+def parse_datetime(text, option):
+    """Converte a data/hora ISO de uma opção em timestamp."""
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        print(f"Erro: data inválida em --{option}: {text}")
+        sys.exit(1)
+
+
+def history(start=None, end=None, user=None):
+    """Gera os registros do log (atual e rotacionados) que atendem aos filtros."""
+    logs = rotated_logs()
+    if os.path.exists(filepath):
+        logs.append(filepath)
+    for logpath in logs:
+        offsets = LogIndex.load(logpath).query(start, end, user)
+        with open(logpath, "rb") as file_:
+            if offsets is None:
+                lines = iter(file_)
+            else:
+                lines = (read_line_at(file_, offset) for offset in offsets)
+            for line in lines:
+                yield line.decode("utf-8", "replace")
+
+
+def show_history(options):
+    """Exibe os registros do histórico conforme as opções --from/--to/--user."""
+    start = options.get("from")
+    end = options.get("to")
+    start = parse_datetime(start, "from") if start else None
+    end = parse_datetime(end, "to") if end else None
+    count = 0
+    for count, line in enumerate(
+            history(start, end, options.get("user") or None), 1):
+        sys.stdout.write(line)
+    if not count:
+        print("Nenhum registro encontrado.")
+
+
+def main(arguments):
+    # Separa as opções (`--chave=valor` ou `--chave valor`) dos termos da
+    # expressão
+    options = {}
+    terms = []
+    arguments = iter(arguments)
+    for arg in arguments:
+        if arg.startswith("--"):
+            key, equals, value = arg[2:].partition("=")
+            if key not in valid_options:
+                print(f"Opção inválida `{key}`")
+                print(f"Opções válidas: {valid_options}")
+                sys.exit(1)
+            if key in value_options and not equals:
+                value = next(arguments, "")
+            options[key] = value
+        else:
+            terms.append(arg)
+    arguments = terms
+
+    # Subcomando: consulta ao histórico
+    if arguments and arguments[0] in valid_commands:
+        show_history(options)
+        return
+
+    numeric = options.get("numeric") or "auto"
+    if numeric not in numeric_backends:
+        print(f"Modo numérico inválido `{numeric}`")
+        print(f"Modos válidos: {tuple(numeric_backends)}")
+        sys.exit(1)
+
+    cache = None
+    if "cache" in options:
+        if "workers" in options:
+            print("Erro: --cache não pode ser combinado com --workers.")
+            sys.exit(1)
+        cache = ResultCache(options["cache"] or cachepath)
+    try:
+        run(arguments, options, numeric, cache)
+    finally:
+        if cache is not None:
+            cache.save()
+            print(cache.stats(), file=sys.stderr)
+
+
+def run(arguments, options, numeric="auto", cache=None):
+    """Executa o modo streaming ou avalia uma única expressão."""
+    # Modo streaming: uma operação por linha
+    if "stream" in options or "workers" in options:
+        workers = options.get("workers", "1")
+        if not workers.isdigit() or int(workers) < 1:
+            print("Erro: --workers deve ser um número inteiro positivo.")
+            sys.exit(1)
+        run_stream(options.get("stream") or "-", int(workers), numeric, cache)
+        return
+
+    # Verifica se não há argumentos passados
+    if not arguments:
+        # Se não houver, solicita ao usuário que insira a operação e os números
+        operation = input("Operação: ")
+        n1 = input("n1: ")
+        n2 = input("n2: ")
+        # Armazena os valores inseridos em uma lista chamada `arguments`
+        arguments = [operation, n1, n2]
+
+    # Compila e avalia a expressão (operação e operandos)
+    key = (" ".join(" ".join(arguments).split()), numeric)
+    hit = cache.get(key) if cache is not None else None
+    try:
+        if hit is not None:
+            expression, result = hit
+        else:
+            expression = compile_expression(key[0], numeric)
+            result = str(expression.evaluate())
+            if cache is not None:
+                cache.set(key, (str(expression), result))
+    except ExpressionError as e:
+        print(e)
+        sys.exit(1)  # Encerra o programa com código de erro 1
+    except ZeroDivisionError:
+        print("Divisão por zero")
+        sys.exit(1)  # Encerra o programa com código de erro 1
+    except (ArithmeticError, ValueError) as e:
+        print(f"Valor fora dos limites ({e})")
+        sys.exit(1)  # Encerra o programa com código de erro 1
+
+    timestamp = datetime.now().isoformat()
+    user = os.getenv("USER", "anonymous")
+
+    # Salva a operação e o resultado no arquivo de log
+    write_log([f"{timestamp} - {user} - {expression} = {result}"])
 
+    # Exibe o resultado da operação
+    print(f"O resultado é {result}")
 
-# Salva a operação e o resultado no arquivo de log
-with open(filepath, "a") as file_:
-    file_.write(f"{timestamp} - {user} - {operation}, {n1}, {n2} = {result}\n")
 
-# Exibe o resultado da operação
-print(f"O resultado é {result}")
+if __name__ == "__main__":
+    # Obtém os argumentos passados na linha de comando, ignorando o primeiro (nome do script)
+    main(sys.argv[1:])
@@ -14,28 +14,334 @@
 ...
 ###################
 
+Qualquer intervalo pode ser gerado, em três formatos:
+
+    tabuada.py [--n1=INICIO:FIM] [--n2=INICIO:FIM] [--formato=FORMATO]
+               [--saida=ARQUIVO [--workers=N]]
+
+    --n1        tabuadas geradas (padrão 1:10)
+    --n2        multiplicadores de cada tabuada (padrão 1:10)
+    --formato   texto   o formato acima (padrão)
+                csv     linhas `n1,n2,produto`, com cabeçalho
+                binario produtos em int64 little-endian, linha a linha
+                        (uma linha por n1, uma coluna por n2)
+    --saida     grava em ARQUIVO em vez da saída padrão
+    --workers   processos que geram o ARQUIVO em paralelo (padrão 1)
+
+    $ tabuada.py --n1=1:10000 --n2=1:10000 --formato=binario > grade.bin
+
+A saída é montada em blocos grandes, já formatados, e escrita no buffer
+da saída padrão. Em cada tabuada, os multiplicadores são agrupados em
+trechos em que n2 e o produto têm sempre o mesmo número de dígitos; todas
+as linhas de um trecho têm o mesmo tamanho e são formatadas por um único
+`%`. Com o NumPy instalado, a grade do formato binário é calculada por ele.
+
+O tamanho de cada tabuada depende apenas do número de dígitos de n1, n2 e
+dos produtos, e é calculado sem gerá-la (`block_length`). Com --workers, o
+arquivo é criado já com o tamanho final, as tabuadas são divididas em lotes
+e cada processo grava o seu lote direto no offset dele; o resultado é igual,
+byte a byte, ao da geração sequencial. Tanto os lotes quanto os blocos
+formatados têm tamanho limitado, e a memória usada não depende do tamanho
+dos intervalos.
 """
-__version__ = "0.1.1"
+__version__ = "0.3.0"
 __author__ = "Silva"
 
-# numero = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+import multiprocessing
+import sys
+
+from array import array
+from collections import deque
+
+# O NumPy é opcional: se instalado, calcula a grade do formato binário
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Largura das linhas do formato texto
+WIDTH = 18
+# Rodapé de cada tabuada no formato texto
+FOOTER = "\n\n" + "#" * WIDTH + "\n\n\n"
+
+# Cabeçalho do formato CSV
+CSV_HEADER = "n1,n2,produto\n"
+
+# Tamanho mínimo (bytes) de cada bloco escrito na saída
+CHUNK_SIZE = 1 << 22
+# Máximo de multiplicadores formatados por um único `%`
+SPAN = 1 << 16
+# Tamanho mínimo (bytes) de cada lote gravado por um worker
+SHARD_SIZE = 1 << 24
+
+# Opções aceitas na linha de comando
+valid_options = ("n1", "n2", "formato", "saida", "workers")
+valid_formats = ("texto", "csv", "binario")
+
+
+def segments(n1, start, stop):
+    """Divide os multiplicadores [start, stop] da tabuada de n1 em trechos.
+
+    Em cada trecho (a, b), com b inclusive, n2 e n1 * n2 têm sempre o mesmo
+    número de dígitos; gera (a, b, dígitos de n2, dígitos do produto).
+    """
+    a = start
+    while a <= stop:
+        digits = len(str(a))
+        product_digits = len(str(n1 * a))
+        b = min(stop, 10 ** digits - 1, -(-10 ** product_digits // n1) - 1)
+        yield a, b, digits, product_digits
+        a = b + 1
+
+
+def spans(start, stop):
+    """Divide [start, stop] em trechos (a, b) de no máximo SPAN números."""
+    for a in range(start, stop + 1, SPAN):
+        yield a, min(stop, a + SPAN - 1)
+
+
+def interleave(n1, a, b):
+    """Argumentos (n2, produto) dos multiplicadores de a a b."""
+    args = [0] * (2 * (b - a + 1))
+    args[0::2] = range(a, b + 1)
+    args[1::2] = range(n1 * a, n1 * b + 1, n1)
+    return tuple(args)
+
+
+def text_block(n1, start, stop):
+    """Tabuada de n1 no formato texto, em partes de até SPAN linhas."""
+    yield "{:-^18}".format(f"Tabuada do {n1}") + "\n\n"
+    n1_digits = len(str(n1))
+    for a, b, digits, product_digits in segments(n1, start, stop):
+        # Mesmo alinhamento de "{:^18}": a sobra ímpar vai para a direita
+        pad = max(0, WIDTH - (n1_digits + digits + product_digits + 6))
+        line = " " * (pad // 2) + f"{n1} x %d = %d" + " " * (pad - pad // 2)
+        for first, last in spans(a, b):
+            yield (((line + "\n") * (last - first + 1))
+                   % interleave(n1, first, last))
+    yield FOOTER
+
+
+def csv_block(n1, start, stop):
+    """Tabuada de n1 no formato CSV (sem cabeçalho), em partes."""
+    for a, b in spans(start, stop):
+        yield (f"{n1},%d,%d\n" * (b - a + 1)) % interleave(n1, a, b)
+
+
+def block_length(n1, start, stop, output_format="texto"):
+    """Tamanho em bytes da tabuada de n1, calculado sem gerá-la."""
+    if output_format == "binario":
+        return 8 * (stop - start + 1)
+    n1_digits = len(str(n1))
+    if output_format == "csv":
+        return sum((n1_digits + digits + product_digits + 3) * (b - a + 1)
+                   for a, b, digits, product_digits
+                   in segments(n1, start, stop))
+    return (max(WIDTH, len(f"Tabuada do {n1}")) + 2 + len(FOOTER)
+            + sum((max(WIDTH, n1_digits + digits + product_digits + 6) + 1)
+                  * (b - a + 1)
+                  for a, b, digits, product_digits
+                  in segments(n1, start, stop)))
+
+
+def product_grid(n1_start, n1_stop, start, stop):
+    """Produtos de [n1_start, n1_stop] x [start, stop] em int64.
+
+    Com o NumPy, uma única multiplicação vetorizada; sem ele, um array por
+    linha. Em ambos os casos o resultado aceita `bytes()`.
+    """
+    if numpy is not None:
+        n1s = numpy.arange(n1_start, n1_stop + 1, dtype="<i8")
+        n2s = numpy.arange(start, stop + 1, dtype="<i8")
+        return numpy.multiply.outer(n1s, n2s)
+    rows = array("q")
+    for n1 in range(n1_start, n1_stop + 1):
+        rows.extend(range(n1 * start, n1 * stop + 1, n1))
+    if sys.byteorder == "big":
+        rows.byteswap()
+    return rows
+
+
+def render(n1_range, n2_range, output_format="texto", header=True):
+    """Gera a saída em blocos de cerca de CHUNK_SIZE bytes.
+
+    Com `header=False`, omite o cabeçalho do CSV (usado pelos lotes dos
+    workers, que começam no meio do arquivo).
+    """
+    n1_start, n1_stop = n1_range
+    start, stop = n2_range
+    if output_format == "binario":
+        # Linhas suficientes para um bloco de ~CHUNK_SIZE bytes; uma linha
+        # maior que isso é dividida em colunas
+        columns = CHUNK_SIZE // 8
+        rows = columns // (stop - start + 1)
+        if rows == 0:
+            for n1 in range(n1_start, n1_stop + 1):
+                for a in range(start, stop + 1, columns):
+                    b = min(stop, a + columns - 1)
+                    yield bytes(product_grid(n1, n1, a, b))
+            return
+        for first in range(n1_start, n1_stop + 1, rows):
+            last = min(n1_stop, first + rows - 1)
+            yield bytes(product_grid(first, last, start, stop))
+        return
+
+    block = text_block if output_format == "texto" else csv_block
+    parts = [CSV_HEADER] if output_format == "csv" and header else []
+    size = 0
+    for n1 in range(n1_start, n1_stop + 1):
+        for part in block(n1, start, stop):
+            parts.append(part)
+            size += len(part)
+            if size >= CHUNK_SIZE:
+                yield "".join(parts).encode("ascii")
+                parts = []
+                size = 0
+    if parts:
+        yield "".join(parts).encode("ascii")
+
+
+def shards(n1_range, n2_range, output_format="texto"):
+    """Divide as tabuadas em lotes de pelo menos SHARD_SIZE bytes.
+
+    Gera (primeira tabuada, última tabuada, offset no arquivo, tamanho).
+    """
+    n1_start, n1_stop = n1_range
+    offset = len(CSV_HEADER) if output_format == "csv" else 0
+    first = n1_start
+    size = 0
+    for n1 in range(n1_start, n1_stop + 1):
+        size += block_length(n1, *n2_range, output_format)
+        if size >= SHARD_SIZE:
+            yield first, n1, offset, size
+            offset += size
+            first = n1 + 1
+            size = 0
+    if size:
+        yield first, n1_stop, offset, size
+
+
+def output_length(n1_range, n2_range, output_format="texto"):
+    """Tamanho total da saída, em bytes."""
+    if output_format == "binario":
+        rows = n1_range[1] - n1_range[0] + 1
+        return rows * block_length(n1_range[0], *n2_range, output_format)
+    header = len(CSV_HEADER) if output_format == "csv" else 0
+    return header + sum(size for *_, size
+                        in shards(n1_range, n2_range, output_format))
+
+
+def write_file(path, n1_range, n2_range, output_format="texto", workers=1):
+    """Grava a saída em `path`, com `workers` processos.
+
+    O arquivo é criado com o tamanho final e cada lote é gravado no seu
+    offset pelo processo que o gerou; este processo apenas distribui os
+    lotes, com no máximo 2 lotes pendentes por worker.
+    """
+    if workers == 1:
+        with open(path, "wb") as file_:
+            for chunk in render(n1_range, n2_range, output_format):
+                file_.write(chunk)
+        return
+
+    with open(path, "wb") as file_:
+        file_.truncate(output_length(n1_range, n2_range, output_format))
+        if output_format == "csv":
+            file_.write(CSV_HEADER.encode("ascii"))
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(path, n2_range, output_format)) as pool:
+        pending = deque()
+        for shard in shards(n1_range, n2_range, output_format):
+            pending.append(pool.apply_async(_write_shard, shard))
+            if len(pending) >= 2 * workers:
+                pending.popleft().get()
+        while pending:
+            pending.popleft().get()
+
+
+# Estado dos processos que gravam os lotes: arquivo, multiplicadores, formato
+_worker_state = None
+
+
+def _init_worker(path, n2_range, output_format):
+    """Inicializa um processo da gravação paralela."""
+    global _worker_state
+    _worker_state = open(path, "r+b"), n2_range, output_format
+
+
+def _write_shard(first, last, offset, size):
+    """Gera as tabuadas de first a last e grava a partir de `offset`."""
+    file_, n2_range, output_format = _worker_state
+    file_.seek(offset)
+    written = 0
+    for chunk in render((first, last), n2_range, output_format, header=False):
+        file_.write(chunk)
+        written += len(chunk)
+    file_.flush()
+    if written != size:
+        raise RuntimeError(f"Tabuadas {first} a {last}: {written} bytes "
+                           f"gerados, {size} esperados")
+
+
+def parse_range(text, option):
+    """Converte `INICIO:FIM` (ou só `FIM`) em um intervalo de inteiros."""
+    start, _, stop = text.rpartition(":")
+    try:
+        start, stop = int(start or 1), int(stop)
+    except ValueError:
+        start = stop = 0
+    if not 1 <= start <= stop:
+        print(f"Erro: intervalo inválido em --{option}: {text}")
+        sys.exit(1)
+    return start, stop
+
+
+def main(arguments):
+    # Opções `--chave=valor`
+    options = {}
+    for arg in arguments:
+        key, _, value = arg[2:].partition("=")
+        if not arg.startswith("--") or key not in valid_options:
+            print(f"Opção inválida `{arg}`")
+            print(f"Opções válidas: {valid_options}")
+            sys.exit(1)
+        options[key] = value
+
+    n1_range = parse_range(options.get("n1") or "1:10", "n1")
+    n2_range = parse_range(options.get("n2") or "1:10", "n2")
+    output_format = options.get("formato") or "texto"
+    if output_format not in valid_formats:
+        print(f"Formato inválido `{output_format}`")
+        print(f"Formatos válidos: {valid_formats}")
+        sys.exit(1)
+    if output_format == "binario" and n1_range[1] * n2_range[1] >= 2 ** 63:
+        print("Erro: produtos grandes demais para int64")
+        sys.exit(1)
+
+    try:
+        workers = int(options.get("workers") or 1)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        print(f"Erro: número de workers inválido: {options['workers']}")
+        sys.exit(1)
+    if workers > 1 and not options.get("saida"):
+        print("Erro: --workers exige --saida")
+        sys.exit(1)
+    if options.get("saida"):
+        write_file(options["saida"], n1_range, n2_range, output_format,
+                   workers)
+        return
 
-numeros = list(range(1, 11))
+    # Blocos grandes, cada um em uma única escrita no buffer da saída
+    out = sys.stdout.buffer
+    for chunk in render(n1_range, n2_range, output_format):
+        out.write(chunk)
+    out.flush()
 
-# Iterable (percorriveis)
 
-# para cada numero em numeros:
-for n1 in numeros:
-    print("{:-^18}".format(f"Tabuada do {n1}"))
-    print()
-    for n2 in numeros:
-        resultado = n1 * n2
-        print("{:^18}".format(f"{n1} x {n2} = {resultado}"))
-    print()
-    print()
-    print("#" * 18)
-    print()
-    print()
+if __name__ == "__main__":
+    main(sys.argv[1:])
 
 
 # String (corda de caracteres, corrente)
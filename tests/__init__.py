@@ -0,0 +1,6 @@
+"""Testes de comportamento dos scripts.
+
+Executados a partir da raiz do repositório:
+
+    $ python3 -m unittest discover
+"""
@@ -0,0 +1,299 @@
+"""Testes do dicionário (dicionario.py): Entry e DictionaryManager.
+
+O dicionario.py importa o googletrans; sem ele os testes são pulados. O
+tradutor usado aqui é falso e não acessa a rede.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+try:
+    import dicionario
+    from dicionario import Entry
+except ImportError:
+    dicionario = None
+
+
+class FakeTranslator:
+    """Tradutor falso: a tradução é o texto invertido"""
+
+    def translate(self, text, src="auto", dest="en"):
+        if isinstance(text, list):
+            return [dicionario.Translated(t[::-1], src, dest) for t in text]
+        return dicionario.Translated(text[::-1], src, dest)
+
+
+@unittest.skipIf(dicionario is None, "googletrans não instalado")
+class EntryTest(unittest.TestCase):
+
+    def test_fields(self):
+        mapping = {"word": "ação", "src_lang": "pt", "target_lang": "en",
+                   "translation": "action ✓", "timestamp": "ontem à noite"}
+        entry = Entry.from_mapping(mapping)
+        self.assertEqual(entry.to_dict(), mapping)
+        self.assertEqual(dict(entry.to_dict()), {f: entry[f] for f in
+                                                 entry.keys()})
+        self.assertEqual(entry.get("translation"), "action ✓")
+        self.assertIsNone(entry.get("lang"))
+        with self.assertRaises(KeyError):
+            entry["lang"]
+        with self.assertRaises(KeyError):
+            entry["lang"] = "en"
+
+    def test_timestamp_text_is_kept(self):
+        for timestamp in ("2024-01-02T03:04:05.678901", "2024-01-02T03:04:05",
+                          "2024-01-02 03:04:05+00:00", ""):
+            entry = Entry("casa", "pt", "en", "house", timestamp)
+            self.assertEqual(entry.timestamp, timestamp)
+            self.assertEqual(entry.translation, "house")
+
+    def test_setitem_keeps_other_fields(self):
+        entry = Entry("casa", "pt", "en", "house", "2024-01-01T00:00:00")
+        entry["translation"] = "home"
+        self.assertEqual(entry.timestamp, "2024-01-01T00:00:00")
+        entry["timestamp"] = "2025-01-01T00:00:00"
+        self.assertEqual(entry.translation, "home")
+        entry.update({"word": "lar", "target_lang": "es"})
+        self.assertEqual(entry.key, ("lar", "pt", "es"))
+        self.assertIs(entry.target_lang, sys.intern("es"))
+
+    def test_entry_is_its_own_key(self):
+        entry = Entry("casa", "pt", "en", "house", "t")
+        same = Entry("casa", "pt", "en", "home", "u")
+        self.assertEqual(entry, ("casa", "pt", "en"))
+        self.assertEqual(entry, same)
+        self.assertNotEqual(entry, Entry("casa", "pt", "es", "casa", "t"))
+        self.assertEqual(hash(entry), hash(("casa", "pt", "en")))
+        index = {entry: entry}
+        self.assertIs(index.get(("casa", "pt", "en")), entry)
+        self.assertIn(same, index)
+        self.assertEqual(dicionario.entry_key(entry), entry.key)
+        self.assertEqual(dicionario.entry_key(entry.to_dict()), entry.key)
+
+    def test_index_keeps_latest_translation(self):
+        index = dicionario.EntryIndex()
+        old = Entry("casa", "pt", "en", "house", "t")
+        new = Entry("casa", "pt", "en", "home", "u")
+        index[old] = old
+        index[new] = new
+        self.assertEqual(len(index), 1)
+        self.assertIs(index.get(("casa", "pt", "en")), new)
+        self.assertEqual([e.translation for e in index.values()], ["home"])
+        self.assertEqual(list(index.overlay), [("casa", "pt", "en")])
+
+    def test_packed(self):
+        entry = Entry("ação", "pt", "en", "action", "2024-01-01T00:00:00")
+        copy = Entry.from_packed("ação", "pt", "en", entry.packed)
+        self.assertEqual(copy.to_dict(), entry.to_dict())
+        self.assertIsInstance(entry.packed, bytes)
+
+    def test_langs_are_shared(self):
+        a = Entry("a", "p" + "t", "e" + "n", "x", "t")
+        b = Entry("b", "".join(["p", "t"]), "".join(["e", "n"]), "y", "t")
+        self.assertIs(a.src_lang, b.src_lang)
+        self.assertIs(a.target_lang, b.target_lang)
+
+
+def reference_search(entries, term, field="all"):
+    """Chaves encontradas pela pesquisa linear da versão original"""
+    term = term.lower()
+    fields = {"word": ["word"], "translation": ["translation"],
+              "lang": ["src_lang", "target_lang"],
+              "all": ["word", "translation", "src_lang", "target_lang"]}
+    return {key for key, entry in entries.items()
+            if any(term in entry[name].lower() for name in fields[field])}
+
+
+@unittest.skipIf(dicionario is None, "googletrans não instalado")
+class ManagerTest(unittest.TestCase):
+    """O gerenciador se comporta como a lista de dicts da versão original"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+    def open(self, snapshot=True):
+        path = lambda name: os.path.join(self.tmpdir, name)
+        manager = dicionario.DictionaryManager(
+            path("dictionary_v2.txt"), path("dictionary_v2.idx"),
+            trigram_path=path("dictionary_v2.tri"), cache_path=None,
+            translator=FakeTranslator(), rate=0,
+            snapshot_path=path("dictionary_v2.snap") if snapshot else None,
+            history_path=path("history.log"))
+        self.addCleanup(manager.close)
+        return manager
+
+    def check(self, manager, expected):
+        self.assertEqual(len(manager.index), len(expected))
+        self.assertEqual({e.key: e.to_dict() for e in manager.entries},
+                         expected)
+        for key, fields in expected.items():
+            self.assertEqual(manager.find_entry(*key).to_dict(), fields)
+        self.assertIsNone(manager.find_entry("inexistente", "pt", "en"))
+        for term in ("ca", "cas", "asa", "esuoh", "pt", "EN", "s", "xyz",
+                     "palavra1", "ção"):
+            for field in ("all", "word", "translation", "lang"):
+                with self.subTest(term=term, field=field):
+                    found = manager.search_entries(term, field)
+                    self.assertEqual(len(found), len({e.key for e in found}))
+                    self.assertEqual(
+                        {e.key: e.to_dict() for e in found},
+                        {key: expected[key] for key in
+                         reference_search(expected, term, field)})
+
+    def random_session(self, snapshot):
+        rng = random.Random(11)
+        words = ["casa", "casaco", "ação", "cão", "gato"] + \
+            [f"palavra{i}" for i in range(60)]
+        langs = ["pt", "en", "es", "fr"]
+        expected = {}
+        for session in range(6):
+            manager = self.open(snapshot)
+            self.check(manager, expected)
+            for _ in range(40):
+                action = rng.random()
+                if action < 0.5 or not expected:
+                    entry = {"word": rng.choice(words),
+                             "src_lang": rng.choice(langs),
+                             "target_lang": rng.choice(langs),
+                             "translation": rng.choice(words)[::-1]}
+                    manager.add_entry(entry, overwrite=True)
+                    key = dicionario.entry_key(entry)
+                    expected[key] = manager.find_entry(*key).to_dict()
+                elif action < 0.7:
+                    key = rng.choice(sorted(expected))
+                    manager.remove_entry(manager.find_entry(*key))
+                    del expected[key]
+                elif action < 0.85:
+                    key = rng.choice(sorted(expected))
+                    manager.edit_entry(manager.find_entry(*key),
+                                       translation=rng.choice(words))
+                    expected[key] = manager.find_entry(*key).to_dict()
+                else:
+                    # Editar a chave pode substituir outra entrada
+                    key = rng.choice(sorted(expected))
+                    entry = manager.find_entry(*key)
+                    manager.edit_entry(entry, word=rng.choice(words))
+                    del expected[key]
+                    expected[entry.key] = entry.to_dict()
+            words_batch = [rng.choice(words) for _ in range(10)]
+            for entry in manager.translate_many(words_batch, "pt", "de"):
+                self.assertEqual(entry.translation, entry.word[::-1])
+                expected[entry.key] = entry.to_dict()
+            self.check(manager, expected)
+            manager.close()
+        self.check(self.open(snapshot), expected)
+
+    def test_random_session_with_snapshot(self):
+        self.random_session(snapshot=True)
+
+    def test_random_session_without_snapshot(self):
+        self.random_session(snapshot=False)
+
+    def test_duplicate_not_overwritten(self):
+        manager = self.open()
+        entry = {"word": "casa", "src_lang": "pt", "target_lang": "en",
+                 "translation": "house"}
+        self.assertTrue(manager.add_entry(dict(entry), overwrite=False))
+        self.assertFalse(manager.add_entry(dict(entry, translation="home"),
+                                           overwrite=False))
+        self.assertEqual(manager.find_entry("casa", "pt", "en").translation,
+                         "house")
+
+    def test_stale_snapshot_is_rebuilt(self):
+        manager = self.open()
+        for i in range(20):
+            manager.add_entry({"word": f"w{i}", "src_lang": "pt",
+                               "target_lang": "en", "translation": f"t{i}"},
+                              overwrite=True)
+        manager.close()
+        # O TSV é substituído por outro: o snapshot antigo não vale mais
+        os.remove(os.path.join(self.tmpdir, "dictionary_v2.idx"))
+        with open(os.path.join(self.tmpdir, "dictionary_v2.txt"), "w",
+                  encoding="utf-8") as f:
+            f.write("casa\tpt\ten\thouse\t2024-01-01T00:00:00\n")
+        manager = self.open()
+        self.assertEqual([e.to_dict() for e in manager.entries], [{
+            "word": "casa", "src_lang": "pt", "target_lang": "en",
+            "translation": "house", "timestamp": "2024-01-01T00:00:00"}])
+
+    def test_search_returns_current_translation(self):
+        for snapshot in (True, False):
+            manager = self.open(snapshot)
+            manager.add_entry({"word": "casa", "src_lang": "pt",
+                               "target_lang": "en", "translation": "house"},
+                              overwrite=True)
+            manager.add_entry({"word": "casa", "src_lang": "pt",
+                               "target_lang": "en", "translation": "home"},
+                              overwrite=True)
+            for term, field in (("casa", "all"), ("pt", "lang")):
+                with self.subTest(snapshot=snapshot, term=term):
+                    found = manager.search_entries(term, field)
+                    self.assertEqual([e.translation for e in found],
+                                     ["home"])
+            manager.close()
+
+    def test_search_ties_are_ordered_by_key(self):
+        lines = [("casal", "pt", "es"), ("casa", "pt", "fr"),
+                 ("casaco", "pt", "en"), ("casa", "pt", "en"),
+                 ("casa", "en", "pt")]
+        with open(os.path.join(self.tmpdir, "dictionary_v2.txt"), "w",
+                  encoding="utf-8") as f:
+            for i, key in enumerate(lines):
+                timestamp = "2024-01-01T00:00:0" + ("1" if i == 2 else "0")
+                f.write("\t".join(key) + f"\tx{i}\t{timestamp}\n")
+        expected = sorted(key for i, key in enumerate(lines) if i != 2)
+        expected.append(lines[2])
+        for snapshot in (True, False):
+            manager = self.open(snapshot)
+            for term, field in (("cas", "all"), ("ca", "word"),
+                                ("p", "lang")):
+                with self.subTest(snapshot=snapshot, term=term):
+                    found = manager.search_entries(term, field)
+                    self.assertEqual([e.key for e in found], expected)
+            manager.close()
+
+    def test_writes_use_snapshot_offsets(self):
+        manager = self.open()
+        for i in range(20):
+            manager.add_entry({"word": f"w{i}", "src_lang": "pt",
+                               "target_lang": "en", "translation": f"t{i}"},
+                              overwrite=True)
+        manager.edit_entry(manager.find_entry("w0", "pt", "en"),
+                           translation="novo")
+        manager.close()
+        # Sem o .idx: os offsets só podem vir da coluna do snapshot
+        os.remove(os.path.join(self.tmpdir, "dictionary_v2.idx"))
+        manager = self.open()
+        store = manager.store
+        self.assertIsInstance(store._offsets, dicionario.OffsetIndex)
+        manager.edit_entry(manager.find_entry("w1", "pt", "en"),
+                           translation="outro")
+        manager.remove_entry(manager.find_entry("w2", "pt", "en"))
+        manager.add_entry({"word": "w2", "src_lang": "pt",
+                           "target_lang": "en", "translation": "de novo"})
+        manager.remove_entry(manager.find_entry("w3", "pt", "en"))
+        self.assertIsInstance(store._offsets, dicionario.OffsetIndex)
+        self.assertFalse(os.path.exists(store.index_path))
+        expected = {e.key: e.to_dict() for e in manager.entries}
+        self.assertEqual(len(store), len(expected))
+        self.assertEqual({e.key: e.to_dict() for e in store}, expected)
+        for key, fields in expected.items():
+            self.assertEqual(store.get(key).to_dict(), fields)
+        self.assertIsNone(store.get(("w3", "pt", "en")))
+        garbage = store.garbage
+        manager.close()
+
+        # Relido do TSV inteiro, o log tem as mesmas entradas e o mesmo lixo
+        reread = dicionario.DictionaryStore(store.filepath, store.index_path)
+        self.addCleanup(reread.close)
+        self.assertEqual({e.key: e.to_dict() for e in reread}, expected)
+        self.assertEqual(reread.garbage, garbage)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,292 @@
+"""Testes do relatório de alunos por atividade (escola_v4_com_bitsets.py)."""
+
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import escola_v4_com_bitsets as escola
+from escola_v4_com_bitsets import Enrollment
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def baseline(sala1, sala2, atividades):
+    """Saída do laço de escola.py, executado com os dados informados."""
+    with open(os.path.join(ROOT, "escola.py"), encoding="utf-8") as f:
+        source = f.read()
+    loop = source[source.index("# Listar alunos"):]
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        exec(loop, {"sala1": sala1, "sala2": sala2, "atividades": atividades})
+    return out.getvalue()
+
+
+def reference(rooms, activities):
+    """O laço de escola.py para qualquer número de salas.
+
+    Cada aluno da atividade vai para a primeira sala que o contém; com
+    duas salas a saída é a de `baseline` (verificado em ReportTest).
+    """
+    blocks = []
+    for activity, enrolled in activities:
+        listed = [[] for _ in rooms]
+        for student in enrolled:
+            for cell, (_, students) in zip(listed, rooms):
+                if student in students:
+                    cell.append(student)
+                    break
+        cells = "".join(escola.ROOM_FORMAT.format(nome=room, alunos=cell)
+                        for (room, _), cell in zip(rooms, listed))
+        blocks.append(escola.ACTIVITY_FORMAT.format(nome=activity,
+                                                    salas=cells))
+    return "".join(blocks)
+
+
+def write_groups(path, groups):
+    """Grava os grupos em CSV ou JSON, conforme a extensão."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            json.dump(dict(groups), f)
+        else:
+            f.writelines(f"{name},{student}\n"
+                         for name, students in groups
+                         for student in students)
+
+
+def assert_contiguous(test, enrollment):
+    """Os alunos de cada sala ocupam bits consecutivos."""
+    for name, (bits, first) in enrollment.rooms.items():
+        if bits:
+            test.assertEqual(bits >> first,
+                             (1 << (bits.bit_length() - first)) - 1, name)
+
+
+class ReportTest(unittest.TestCase):
+
+    def test_default_school(self):
+        self.assertEqual(escola.load(escola.salas, escola.atividades).report(),
+                         baseline(escola.sala1, escola.sala2,
+                                  escola.atividades))
+
+    def test_same_output_as_escola(self):
+        outputs = [subprocess.run([sys.executable, script], cwd=ROOT,
+                                  capture_output=True, check=True).stdout
+                   for script in ("escola.py", "escola_v4_com_bitsets.py")]
+        self.assertEqual(outputs[1], outputs[0])
+
+    def test_matches_baseline(self):
+        # Alunos nas duas salas, repetidos na atividade ou em nenhuma sala
+        rng = random.Random(1)
+        pool = [f"aluno{i}" for i in range(40)]
+        for _ in range(100):
+            sala1 = rng.choices(pool, k=rng.randint(0, 15))
+            sala2 = rng.choices(pool, k=rng.randint(0, 15))
+            activities = [(f"atividade{i}", rng.choices(pool,
+                                                        k=rng.randint(0, 20)))
+                          for i in range(rng.randint(1, 5))]
+            expected = baseline(sala1, sala2, activities)
+            rooms = [("sala1 ", sala1), ("sala2", sala2)]
+            enrollment = escola.load(rooms, activities)
+            self.assertEqual(enrollment.report(), expected)
+            self.assertEqual(reference(rooms, activities), expected)
+            assert_contiguous(self, enrollment)
+
+    def test_matches_reference(self):
+        rng = random.Random(2)
+        pool = [f"aluno{i}" for i in range(80)]
+        for _ in range(50):
+            rooms = [(f"sala{i}", rng.choices(pool, k=rng.randint(0, 20)))
+                     for i in range(rng.randint(1, 5))]
+            activities = [(f"atividade{i}",
+                           rng.choices(pool, k=rng.randint(0, 30)))
+                          for i in range(rng.randint(1, 5))]
+            enrollment = escola.load(rooms, activities)
+            self.assertEqual(enrollment.report(),
+                             reference(rooms, activities))
+            assert_contiguous(self, enrollment)
+
+    def test_workers(self):
+        rooms = [(f"sala{i}", [f"aluno{j}" for j in range(i, 200, 7)])
+                 for i in range(7)]
+        activities = [(f"atividade{i}", [f"aluno{j}" for j in range(0, 200, i)])
+                      for i in range(1, 12)]
+        enrollment = escola.load(rooms, activities)
+        self.assertEqual(enrollment.report(workers=2),
+                         reference(rooms, activities))
+        # As células calculadas pelos processos voltam para este
+        self.assertEqual(len(enrollment.cells), 7 * 11)
+
+
+class IncrementalTest(unittest.TestCase):
+    """Execuções com estado dão o mesmo relatório que uma sem estado."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+        self.state = os.path.join(self.tmpdir, "escola.state")
+        self.room_files = [os.path.join(self.tmpdir, name)
+                           for name in ("salas1.csv", "salas2.json")]
+        self.activity_files = [os.path.join(self.tmpdir, name)
+                               for name in ("atividades1.json",
+                                            "atividades2.csv")]
+        self.mtime = 1_000_000_000 * 10 ** 9
+
+    def write(self, path, groups):
+        write_groups(path, groups)
+        # Mesmo tamanho e data de modificação fariam o arquivo ser pulado:
+        # cada gravação recebe uma data nova
+        self.mtime += 10 ** 9
+        os.utime(path, ns=(self.mtime, self.mtime))
+
+    def run_incremental(self):
+        enrollment = Enrollment.load(self.state)
+        enrollment.load_files(self.room_files, self.activity_files,
+                              io.StringIO())
+        text = enrollment.report()
+        enrollment.save(self.state)
+        return text, enrollment
+
+    def run_fresh(self):
+        enrollment = Enrollment()
+        enrollment.load_files(self.room_files, self.activity_files,
+                              io.StringIO())
+        return enrollment.report()
+
+    def test_random_changes(self):
+        rng = random.Random(3)
+        pool = [f"A{i}" for i in range(60)]
+        files = self.room_files + self.activity_files
+
+        def groups(path):
+            prefix, extension = os.path.basename(path).split(".")
+            # Um grupo vazio não tem linhas no CSV
+            smallest = 1 if extension == "csv" else 0
+            return [(f"{prefix}-{i}",
+                     rng.choices(pool, k=rng.randint(smallest, 12)))
+                    for i in range(rng.randint(0, 4))]
+
+        for trial in range(20):
+            for path in (self.state, self.state + escola.CELLS_SUFFIX):
+                if os.path.exists(path):
+                    os.remove(path)
+            contents = {}
+            for path in files:
+                contents[path] = groups(path)
+                self.write(path, contents[path])
+            for step in range(8):
+                path = rng.choice(files)
+                contents[path] = groups(path)
+                self.write(path, contents[path])
+                text, enrollment = self.run_incremental()
+                rooms = [group for path in self.room_files
+                         for group in contents[path]]
+                activities = [group for path in self.activity_files
+                              for group in contents[path]]
+                with self.subTest(trial=trial, step=step):
+                    self.assertEqual(text, self.run_fresh())
+                    self.assertEqual(text, reference(rooms, activities))
+                    assert_contiguous(self, enrollment)
+
+    def test_unchanged_files_are_not_recomputed(self):
+        pool = [f"A{i}" for i in range(30)]
+        self.write(self.room_files[0], [("sala1", pool[:10]),
+                                        ("sala2", pool[10:25])])
+        self.write(self.room_files[1], [("sala3", pool[25:])])
+        self.write(self.activity_files[0], [("Dança", pool[::2])])
+        self.write(self.activity_files[1], [("Música", pool[::3])])
+        text, enrollment = self.run_incremental()
+        self.assertEqual(enrollment.recomputed, 3 * 2)
+
+        again, enrollment = self.run_incremental()
+        self.assertEqual(again, text)
+        self.assertEqual(enrollment.recomputed, 0)
+
+        # Só as células da atividade alterada são recalculadas
+        self.write(self.activity_files[1], [("Música", pool[::4])])
+        _, enrollment = self.run_incremental()
+        self.assertEqual(enrollment.recomputed, 3)
+        self.assertEqual(self.run_incremental()[0], self.run_fresh())
+
+        # Sala alterada: uma célula por atividade
+        self.write(self.room_files[1], [("sala3", pool[29:24:-1])])
+        text, enrollment = self.run_incremental()
+        self.assertEqual(enrollment.recomputed, 2)
+        self.assertEqual(text, self.run_fresh())
+
+    def test_interrupted_cells_file(self):
+        pool = [f"A{i}" for i in range(30)]
+        self.write(self.room_files[0], [("sala1", pool[:15]),
+                                        ("sala2", pool[15:])])
+        self.write(self.room_files[1], [])
+        self.write(self.activity_files[0], [("Dança", pool[::2])])
+        self.write(self.activity_files[1], [])
+        self.run_incremental()
+        self.write(self.activity_files[1], [("Música", pool[::3])])
+        self.run_incremental()
+        # Um registro incompleto no fim do arquivo de células é descartado
+        cells = self.state + escola.CELLS_SUFFIX
+        with open(cells, "r+b") as f:
+            f.truncate(os.path.getsize(cells) - 5)
+        text, enrollment = self.run_incremental()
+        self.assertEqual(text, self.run_fresh())
+        self.assertEqual(enrollment.recomputed, 2)
+        self.assertEqual(self.run_incremental()[1].recomputed, 0)
+
+
+class ReadGroupsTest(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+    def path(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_invalid_json(self):
+        for content in ('["sala1", "sala2"]', '{"sala1": "Ana"}',
+                        '{"sala1": [1, 2]}', '"sala1"', 'null'):
+            with self.subTest(content=content), \
+                    self.assertRaises(ValueError):
+                escola.read_groups(self.path("salas.json", content))
+
+    def test_csv_rows_with_wrong_columns_are_reported(self):
+        path = self.path("salas.csv",
+                         "sala1,Ana\nsala1\n\nsala2,Bia,extra\nsala2,Caio\n")
+        report = io.StringIO()
+        self.assertEqual(escola.read_groups(path, report),
+                         [("sala1", ["Ana"]), ("sala2", ["Caio"])])
+        self.assertEqual(report.getvalue().splitlines(), [
+            f"{path}: linha 2 ignorada: 1 coluna(s), esperado 2",
+            f"{path}: linha 4 ignorada: 3 coluna(s), esperado 2"])
+
+    def test_main_reports_invalid_files(self):
+        state = os.path.join(self.tmpdir, "escola.state")
+        rooms = self.path("salas.csv", "sala1,Ana\n")
+        for content in ('["Dança"]', '{"Dança": ', '{"Dança": [null]}'):
+            activities = self.path("atividades.json", content)
+            out = io.StringIO()
+            with self.subTest(content=content), \
+                    contextlib.redirect_stdout(out), \
+                    self.assertRaises(SystemExit) as raised:
+                escola.main([f"--salas={rooms}",
+                             f"--atividades={activities}",
+                             f"--estado={state}"])
+            self.assertEqual(raised.exception.code, 1)
+            self.assertTrue(out.getvalue().startswith(
+                "Erro ao ler as matrículas:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Testes do checkpoint da mala direta (interpolacao.py)."""
+
+import json
+import mailbox
+import os
+import tempfile
+import unittest
+
+import interpolacao
+from interpolacao import Checkpoint, RecipientReader
+
+
+class FailingBackend:
+    """Backend em memória; cada email de `failures` falha na 1ª tentativa."""
+
+    concurrent = False
+
+    def __init__(self, failures=()):
+        self.failures = set(failures)
+        self.sent = []
+
+    def send(self, mail):
+        if mail.email in self.failures:
+            self.failures.discard(mail.email)
+            raise OSError("recusado")
+        self.sent.append(mail.email)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+        self.emails = [f"aluno{i}@escola.com" for i in range(50)]
+        self.datapath = os.path.join(self.tmpdir, "emails.txt")
+        with open(self.datapath, "w", encoding="utf-8") as f:
+            f.writelines(f"Aluno {i},{email}\n"
+                         for i, email in enumerate(self.emails))
+        self.path = self.datapath + ".checkpoint"
+
+    def deliver(self, backend, on_save):
+        """Entrega a lista inteira, gravando o checkpoint a cada email."""
+        checkpoint = Checkpoint(self.path, self.datapath, interval=0)
+        checkpoint.flush = backend.flush
+        save = checkpoint.save
+
+        def save_and_check():
+            save()
+            with open(self.path, encoding="utf-8") as f:
+                on_save(json.load(f))
+
+        checkpoint.save = save_and_check
+        with RecipientReader(self.datapath, interpolacao.DEFAULT_COLUMNS,
+                             seen=interpolacao.AddressSet()) as recipients:
+            mails = list(interpolacao.render("Oi %(nome)s", recipients))
+            interpolacao.deliver(backend, mails, retries=1, backoff=0,
+                                 on_done=checkpoint.done,
+                                 on_failed=checkpoint.failed)
+        checkpoint.save()
+        return mails
+
+    def test_saved_mails_are_durable(self):
+        # Cada checkpoint gravado só cobre emails já presentes no arquivo
+        # mbox em disco, como se o processo fosse morto logo depois
+        path = os.path.join(self.tmpdir, "saida.mbox")
+        backend = interpolacao.MboxBackend(path)
+        lines = []
+
+        def on_save(saved):
+            reader = mailbox.mbox(path)
+            on_disk = [message["To"] for message in reader]
+            reader.close()
+            self.assertEqual(on_disk, self.emails[:len(on_disk)])
+            self.assertGreaterEqual(len(on_disk), saved["line"])
+            self.assertEqual(saved["count"], saved["line"])
+            lines.append(saved["line"])
+
+        try:
+            self.deliver(backend, on_save)
+        finally:
+            backend.close()
+        self.assertEqual(lines[-1], len(self.emails))
+
+    def test_stdout_backend_flushes_before_save(self):
+        backend = interpolacao.StdoutBackend()
+        backend.out = open(os.path.join(self.tmpdir, "saida.txt"), "w",
+                           encoding="utf-8", buffering=1 << 20)
+        written = []
+
+        def on_save(saved):
+            with open(backend.out.name, encoding="utf-8") as f:
+                written.append(f.read().count("Enviando email para:"))
+            self.assertGreaterEqual(written[-1], saved["line"])
+
+        try:
+            self.deliver(backend, on_save)
+        finally:
+            backend.close()
+        self.assertEqual(written[-1], len(self.emails))
+
+    def test_held_offset_advances_after_retry(self):
+        failed = self.emails[2]
+        backend = FailingBackend([failed])
+        saves = []
+        mails = self.deliver(backend, lambda saved: saves.append(
+            (saved["offset"], saved["line"])))
+        # Até a nova tentativa, o offset fica no ponto anterior ao email
+        # que falhou; depois dela, avança até o fim da lista
+        before = (mails[1].offset, mails[1].line)
+        self.assertEqual(saves[2:len(mails) - 1], [before] * (len(mails) - 3))
+        self.assertEqual(saves[-1], (mails[-1].offset, mails[-1].line))
+        self.assertIn(failed, backend.sent)
+
+        checkpoint = Checkpoint(self.path, self.datapath)
+        self.assertEqual(len(checkpoint.load()), len(self.emails))
+        self.assertEqual(checkpoint.line, len(self.emails))
+
+    def test_held_offset_without_save_in_between(self):
+        checkpoint = Checkpoint(self.path, self.datapath, interval=3600)
+        mails = [interpolacao.Mail("", email, "", 10 * (i + 1), i + 1)
+                 for i, email in enumerate(self.emails[:4])]
+        checkpoint.done(mails[0])
+        checkpoint.failed(mails[1], OSError(), False)
+        checkpoint.failed(mails[2], OSError(), False)
+        checkpoint.done(mails[3])
+        self.assertEqual(next(iter(checkpoint.held.values())), (10, 1))
+        checkpoint.done(mails[1])
+        self.assertEqual(next(iter(checkpoint.held.values())), (20, 2))
+        checkpoint.failed(mails[2], OSError("erro"), True)
+        self.assertEqual(checkpoint.held, {})
+        self.assertEqual((checkpoint.offset, checkpoint.line), (40, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
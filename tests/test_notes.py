@@ -0,0 +1,121 @@
+"""Testes do bloco de notas do dicionário offline (notes.py).
+
+O script executa o comando ao ser importado: cada teste o executa em um
+processo, em um diretório temporário com o seu próprio notes.txt.
+"""
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "notes.py")
+
+
+def brute_force(rows, term):
+    """Palavras das entradas cuja palavra ou tradução contém o termo."""
+    term = term.lower()
+    return [word for word, _, translation in rows
+            if term in word.lower() or term in translation.lower()]
+
+
+class NotesTest(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+        self.notes = os.path.join(self.tmpdir, "notes.txt")
+
+    def run_notes(self, *arguments, stdin=""):
+        result = subprocess.run(
+            [sys.executable, SCRIPT, *arguments], cwd=self.tmpdir,
+            input=stdin, capture_output=True, text=True, encoding="utf-8")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def search(self, term):
+        """Palavras encontradas pelo comando search, na ordem exibida."""
+        return [line[len("Palavra: "):]
+                for line in self.run_notes("search", term).splitlines()
+                if line.startswith("Palavra: ")]
+
+    def write(self, rows, mode="w"):
+        with open(self.notes, mode, encoding="utf-8") as f:
+            f.writelines("\t".join(row) + "\n" for row in rows)
+
+    def read(self):
+        with open(self.notes, encoding="utf-8") as f:
+            return [tuple(line.rstrip("\n").split("\t")) for line in f]
+
+    def test_search_matches_full_scan(self):
+        rows = [("casa", "en", "house"), ("Cachorro", "en", "dog"),
+                ("gato", "en", "cat"), ("ação", "en", "action"),
+                ("casaco", "es", "abrigo"), ("cão", "fr", "chien")]
+        self.write(rows)
+        for term in ("cas", "CASA", "ca", "a", "ção", "house", "og", "xyz",
+                     "abrigo"):
+            with self.subTest(term=term):
+                self.assertEqual(self.search(term), brute_force(rows, term))
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir,
+                                                    "notes.tri")))
+
+    def test_appended_entries_are_indexed(self):
+        rows = [("casa", "en", "house")]
+        self.write(rows)
+        self.assertEqual(self.search("cas"), ["casa"])
+        more = [("casaco", "en", "coat"), ("rato", "en", "mouse")]
+        self.write(more, "a")
+        self.assertEqual(self.search("cas"), ["casa", "casaco"])
+        self.assertEqual(self.search("ous"), ["casa", "rato"])
+
+    def test_same_size_edit(self):
+        # Edição que não muda o tamanho do arquivo nem os 4 KiB finais:
+        # o índice antigo apontaria para o texto anterior
+        rows = [("cat", "en", "gato")] + \
+            [(f"palavra{i:04d}", "en", f"word{i:04d}") for i in range(400)]
+        self.write(rows)
+        self.assertEqual(self.search("cat"), ["cat"])
+        size = os.path.getsize(self.notes)
+        self.run_notes("edit", "cat", stdin="cow\n\n\n")
+        self.assertEqual(os.path.getsize(self.notes), size)
+        self.assertEqual(self.search("cat"), [])
+        self.assertEqual(self.search("cow"), ["cow"])
+
+    def test_remove(self):
+        rows = [("casa", "en", "house"), ("casaco", "en", "coat")]
+        self.write(rows)
+        self.assertEqual(self.search("cas"), ["casa", "casaco"])
+        self.run_notes("remove", "casa")
+        self.assertEqual(self.read(), rows[1:])
+        self.assertEqual(self.search("cas"), ["casaco"])
+
+    def test_several_segments(self):
+        rng = random.Random(5)
+        letters = "abcdefghij"
+        rows = [("".join(rng.choices(letters, k=8)), "en",
+                 "".join(rng.choices(letters, k=30)))
+                for _ in range(40_000)]
+        self.write(rows)
+        self.assertGreater(os.path.getsize(self.notes), 1 << 20)
+        for term in ("abcd", "jihg", "aaa"):
+            with self.subTest(term=term):
+                self.assertEqual(sorted(self.search(term)),
+                                 sorted(brute_force(rows, term)))
+        self.write(rows[:10], "a")
+        self.assertEqual(sorted(self.search("abcd")),
+                         sorted(brute_force(rows + rows[:10], "abcd")))
+
+    def test_read(self):
+        self.write([("casa", "en", "house"), ("casa", "es", "casa")])
+        self.assertEqual(self.run_notes("read", "CASA", "es"),
+                         "Palavra: casa\nIdioma: es\nTradução: casa\n"
+                         + "-" * 30 + "\n")
+        self.assertEqual(self.run_notes("read", "casa").count("Palavra:"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,318 @@
+"""Testes da calculadora prefixada (prefixcalc.py)."""
+
+import contextlib
+import io
+import operator
+import os
+import random
+import tempfile
+import time
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+from unittest import mock
+
+import prefixcalc
+from prefixcalc import ExpressionError, compile_expression, evaluate_line, \
+    evaluate_lines, parse_number
+
+# Operações da versão original do script
+ORIGINAL_OPERATIONS = {"sum": operator.add, "sub": operator.sub,
+                       "mul": operator.mul, "div": operator.truediv}
+
+
+def original(operation, n1, n2):
+    """Expressão e resultado como na versão original (`op n1 n2`)."""
+    numbers = []
+    for num in (n1, n2):
+        if not num.replace(".", "").isdigit():
+            raise ValueError(f"Número inválido: {num}")
+        numbers.append(float(num) if "." in num else int(num))
+    n1, n2 = numbers
+    return f"{operation}, {n1}, {n2}", ORIGINAL_OPERATIONS[operation](n1, n2)
+
+
+def reference(tokens):
+    """Avalia uma expressão prefixada recursivamente (tokens na ordem)."""
+    token = tokens.pop(0)
+    if token in ORIGINAL_OPERATIONS:
+        left = reference(tokens)
+        right = reference(tokens)
+        return ORIGINAL_OPERATIONS[token](left, right)
+    return float(token) if "." in token else int(token)
+
+
+def random_operand(rng):
+    """Operando inteiro ou decimal aceito pela versão original."""
+    if rng.random() < 0.5:
+        return str(rng.randint(0, 10 ** rng.randint(1, 20)))
+    return f"{rng.randint(0, 999)}.{rng.randint(0, 999)}"
+
+
+class OriginalBehaviourTest(unittest.TestCase):
+    """`op n1 n2` continua igual à versão original."""
+
+    def test_same_expression_and_result(self):
+        rng = random.Random(42)
+        for _ in range(2000):
+            operation = rng.choice(list(ORIGINAL_OPERATIONS))
+            n1, n2 = random_operand(rng), random_operand(rng)
+            if operation == "div" and float(n2) == 0:
+                continue
+            line = f"{operation} {n1} {n2}"
+            self.assertEqual(evaluate_line(line), original(operation, n1, n2),
+                             line)
+            # O caminho geral (compilado) dá o mesmo resultado
+            expression = compile_expression(line)
+            self.assertEqual(
+                (str(expression), expression.evaluate()),
+                original(operation, n1, n2), line)
+
+
+class ParserTest(unittest.TestCase):
+
+    def test_nested_expressions(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            # Expressão aleatória: n operações precisam de n + 1 operandos
+            count = rng.randint(1, 6)
+            tokens = [rng.choice(("sum", "sub", "mul"))]
+            pending = 2
+            while pending:
+                if count > 1 and rng.random() < 0.4:
+                    tokens.append(rng.choice(("sum", "sub", "mul")))
+                    count -= 1
+                    pending += 1
+                else:
+                    tokens.append(str(rng.randint(0, 1000)))
+                    pending -= 1
+            text = " ".join(tokens)
+            self.assertEqual(compile_expression(text).evaluate(),
+                             reference(list(tokens)), text)
+
+    def test_variables(self):
+        expression = compile_expression("sum mul x 2 y")
+        self.assertEqual(expression.evaluate({"x": 3, "y": 4}), 10)
+        self.assertEqual(
+            expression.evaluate_many({"x": [1, 2, 3], "y": [10, 20, 30]}),
+            [12, 24, 36])
+        with self.assertRaises(ExpressionError):
+            expression.evaluate({"x": 1})
+
+    def test_invalid_expressions(self):
+        for text in ("", "pow 2 3", "5 sum 1 2", "sum 1", "sum 1 2 3",
+                     "sum sum 1 2", "sum 1 abc!"):
+            with self.subTest(text=text), self.assertRaises(ExpressionError):
+                compile_expression(text)
+
+
+class NumberTest(unittest.TestCase):
+
+    def test_valid_operands(self):
+        cases = [("5", 5), ("-5", -5), ("+5", 5), ("2.5", 2.5), (".5", 0.5),
+                 ("5.", 5.0), ("1e3", 1000.0), ("-1.5E-2", -0.015)]
+        for text, value in cases:
+            with self.subTest(text=text):
+                self.assertEqual(parse_number(text), value)
+                self.assertIs(type(parse_number(text)), type(value))
+
+    def test_numeric_modes(self):
+        self.assertEqual(parse_number("0.1", "decimal"), Decimal("0.1"))
+        self.assertEqual(parse_number("0.1", "fraction"), Fraction(1, 10))
+        self.assertEqual(parse_number("7", "float"), 7.0)
+        self.assertEqual(parse_number("7", "int"), 7)
+        with self.assertRaises(ExpressionError):
+            parse_number("2.5", "int")
+        self.assertEqual(evaluate_line("sum 0.1 0.2", "decimal")[1],
+                         Decimal("0.3"))
+        self.assertEqual(evaluate_line("div 7 2", "int")[1], 3)
+
+    def test_invalid_operands(self):
+        for text in ("", ".", "e5", "1e", "1.2.3", "--1", "0x10", "1_000",
+                     "inf", "nan", " 1"):
+            with self.subTest(text=text), self.assertRaises(ExpressionError):
+                parse_number(text)
+
+    def test_non_ascii_digits(self):
+        # "²".isdigit() é verdadeiro, mas int("²") falha: eram aceitos pela
+        # validação e derrubavam o script na conversão
+        for text in ("²", "1²", "٣", "١٢", "３"):
+            for numeric in prefixcalc.numeric_backends:
+                with self.subTest(text=text, numeric=numeric), \
+                        self.assertRaises(ExpressionError):
+                    parse_number(text, numeric)
+
+    def test_size_limits(self):
+        limit = prefixcalc.NUMBER_MAX_DIGITS
+        self.assertEqual(parse_number("9" * limit), 10 ** limit - 1)
+        for numeric in prefixcalc.numeric_backends:
+            for text in ("9" * (limit + 1), "1." + "0" * limit,
+                         f"1e{prefixcalc.NUMBER_MAX_EXPONENT + 1}",
+                         "1e-99999999999999999999"):
+                with self.subTest(text=text[:20], numeric=numeric), \
+                        self.assertRaises(ExpressionError):
+                    parse_number(text, numeric)
+
+
+class EvaluateLinesTest(unittest.TestCase):
+
+    def test_one_output_line_per_input_line(self):
+        lines = ["sum 5 2\n", "\n", "pow 2 3\n", "div 1 0\n", "mul 2 3\n",
+                 "sum ² 1\n"]
+        output, errors, log = evaluate_lines(lines, first_lineno=10)
+        self.assertEqual(output.split("\n"), ["7", "", "", "", "6", "", ""])
+        self.assertEqual(len(log), 2)
+        self.assertTrue(log[0].endswith(" - sum, 5, 2 = 7"))
+        self.assertEqual([e.split(":")[0] for e in errors],
+                         ["linha 12", "linha 13", "linha 15"])
+        self.assertIn("Divisão por zero", errors[1])
+
+    def test_out_of_range_values_are_reported(self):
+        # O resultado tem mais dígitos do que int -> str aceita: era um
+        # ValueError não tratado que interrompia todo o lote
+        big = "9" * 4000
+        lines = [f"mul {big} {big}\n", "sum 1 1\n"]
+        output, errors, log = evaluate_lines(lines)
+        self.assertEqual(output.split("\n"), ["", "2", ""])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith("linha 1: Valor fora dos limites"))
+        self.assertEqual(len(log), 1)
+
+    def test_nested_lines_match_line_by_line(self):
+        # Expressões aninhadas são avaliadas em grupos pela forma; o
+        # resultado, os erros e o log são os da avaliação linha a linha
+        rng = random.Random(7)
+        lines = [f"sum {rng.randint(0, 9)} {rng.choice(['mul', 'div'])} "
+                 f"{rng.randint(0, 9)} {rng.randint(0, 3)}\n"
+                 for _ in range(500)]
+        lines += ["sum 1 2 3 4\n", "sum 1 mul x 2\n", "mul 2 3\n", "\n",
+                  "sum 1 div 1 0\n", "sum 1 mul 2 " + "9" * 4000 + "\n"]
+        rng.shuffle(lines)
+        for numeric in prefixcalc.numeric_backends:
+            output, errors, log = evaluate_lines(lines, 5, numeric)
+            expected = []
+            for lineno, line in enumerate(lines, 5):
+                try:
+                    expression, result = evaluate_line(line, numeric)
+                    expected.append((str(result), f"{expression} = {result}"))
+                except (ArithmeticError, ValueError):
+                    expected.append(("", None))
+            with self.subTest(numeric=numeric):
+                self.assertEqual(output.split("\n")[:-1],
+                                 [result for result, _ in expected])
+                self.assertEqual([entry.split(" - ", 2)[2] for entry in log],
+                                 [entry for _, entry in expected if entry])
+                linenos = [int(error.split(":")[0][6:]) for error in errors]
+                self.assertEqual(linenos, sorted(linenos))
+                self.assertEqual(len(errors), len(expected) - len(log) - 1)
+
+    def test_cache_gives_same_results(self):
+        cache = prefixcalc.ResultCache(path="/nonexistent/prefixcal.cache")
+        lines = ["sum 1 2\n", "mul  3   4\n", "sum 1 2\n", "div 1 0\n"]
+        first = evaluate_lines(lines, cache=cache)
+        second = evaluate_lines(lines, cache=cache)
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(first[1], second[1])
+        # Linhas com erro não vão para o cache
+        self.assertEqual(cache.hits, 1 + 3)
+
+
+class RunStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+        # O log do repositório não é tocado
+        patcher = mock.patch.object(
+            prefixcalc, "filepath", os.path.join(self.tmpdir, "prefixcal.log"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_stream(self, source, stdin=""):
+        out = io.StringIO()
+        with mock.patch("sys.stdin", io.StringIO(stdin)) as stdin, \
+                contextlib.redirect_stdout(out):
+            prefixcalc.run_stream(source)
+        return out.getvalue(), stdin
+
+    def test_stdin_is_not_closed(self):
+        output, stdin = self.run_stream("-", "sum 5 2\nmul 2 3\n")
+        self.assertEqual(output, "7\n6\n")
+        self.assertFalse(stdin.closed)
+
+    def test_file_source(self):
+        source = os.path.join(self.tmpdir, "operacoes.txt")
+        with open(source, "w") as f:
+            f.write("sum 1 mul 2 3\n")
+        self.assertEqual(self.run_stream(source)[0], "7\n")
+        with open(prefixcalc.filepath) as f:
+            self.assertTrue(f.read().endswith(" - sum, 1, mul, 2, 3 = 7\n"))
+
+
+class LogRotationTest(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.logpath = os.path.join(tmpdir.name, "prefixcal.log")
+        patcher = mock.patch.object(prefixcalc, "filepath", self.logpath)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_existing_old_log_is_not_rotated(self):
+        # Como o prefixcal.log do repositório: registros e data de
+        # modificação antigos, sem `.start`
+        with open(self.logpath, "w") as f:
+            f.write("mul, 8, 99 = 792\n"
+                    "2025-01-31T03:29:45.813168 - anonymous - sum, 1, 2 = 3\n")
+        old = time.time() - 30 * 24 * 60 * 60
+        os.utime(self.logpath, (old, old))
+        prefixcalc.write_log(["x"])
+        self.assertEqual(prefixcalc.rotated_logs(), [])
+        self.assertAlmostEqual(prefixcalc.log_start_time(), time.time(),
+                               delta=60)
+
+    def test_rotation_by_age(self):
+        prefixcalc.write_log(["a"])
+        start = prefixcalc.log_start_time()
+        # A idade vem do `.start`: o log em si não é lido
+        with mock.patch("time.time",
+                        return_value=start + prefixcalc.LOG_MAX_AGE - 1):
+            prefixcalc.write_log(["b"])
+        self.assertEqual(prefixcalc.rotated_logs(), [])
+        with mock.patch("time.time",
+                        return_value=start + prefixcalc.LOG_MAX_AGE):
+            prefixcalc.write_log(["c"])
+            self.assertEqual(prefixcalc.log_start_time(),
+                             start + prefixcalc.LOG_MAX_AGE)
+        rotated = prefixcalc.rotated_logs()
+        self.assertEqual(len(rotated), 1)
+        with open(rotated[0]) as f:
+            self.assertEqual(f.read(), "a\nb\n")
+        with open(self.logpath) as f:
+            self.assertEqual(f.read(), "c\n")
+
+
+class OptionsTest(unittest.TestCase):
+
+    def parse(self, arguments):
+        with mock.patch.object(prefixcalc, "run") as run:
+            prefixcalc.main(arguments)
+        arguments, options, numeric, _ = run.call_args.args
+        return arguments, options, numeric
+
+    def test_separate_values(self):
+        self.assertEqual(
+            self.parse(["--stream=ops.txt", "--workers", "4"]),
+            self.parse(["--stream=ops.txt", "--workers=4"]))
+        self.assertEqual(
+            self.parse(["--numeric", "decimal", "sum", "0.1", "0.2"]),
+            (["sum", "0.1", "0.2"], {"numeric": "decimal"}, "decimal"))
+        # Opções sem valor obrigatório não consomem o argumento seguinte
+        self.assertEqual(self.parse(["--stream", "sum", "1", "2"])[0],
+                         ["sum", "1", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
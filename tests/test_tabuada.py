@@ -0,0 +1,159 @@
+"""Testes do gerador de tabuadas (tabuada.py)."""
+
+import contextlib
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+import tabuada
+
+
+def original(n1_range, n2_range):
+    """Saída da versão original do script: um print por linha."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        for n1 in range(n1_range[0], n1_range[1] + 1):
+            print("{:-^18}".format(f"Tabuada do {n1}"))
+            print()
+            for n2 in range(n2_range[0], n2_range[1] + 1):
+                resultado = n1 * n2
+                print("{:^18}".format(f"{n1} x {n2} = {resultado}"))
+            print()
+            print()
+            print("#" * 18)
+            print()
+            print()
+    return out.getvalue()
+
+
+def original_csv(n1_range, n2_range):
+    """Formato CSV linha a linha."""
+    return tabuada.CSV_HEADER + "".join(
+        f"{n1},{n2},{n1 * n2}\n"
+        for n1 in range(n1_range[0], n1_range[1] + 1)
+        for n2 in range(n2_range[0], n2_range[1] + 1))
+
+
+def original_binary(n1_range, n2_range):
+    """Formato binário produto a produto."""
+    return b"".join(
+        struct.pack("<q", n1 * n2)
+        for n1 in range(n1_range[0], n1_range[1] + 1)
+        for n2 in range(n2_range[0], n2_range[1] + 1))
+
+
+def rendered(n1_range, n2_range, output_format="texto"):
+    return b"".join(tabuada.render(n1_range, n2_range, output_format))
+
+
+# Intervalos que cruzam mudanças no número de dígitos de n2 e do produto,
+# e linhas mais largas que WIDTH (sem centralização)
+RANGES = [((1, 10), (1, 10)), ((7, 13), (1, 150)), ((95, 105), (9, 1001)),
+          ((9999, 10001), (99990, 100010)), ((123456, 123457), (1, 12)),
+          ((10 ** 9 - 1, 10 ** 9), (10 ** 9 - 2, 10 ** 9 + 2))]
+
+
+class SegmentsTest(unittest.TestCase):
+
+    def test_segments_cover_range_with_constant_widths(self):
+        for n1 in (1, 3, 7, 9, 11, 99, 101, 997, 12345):
+            for start, stop in ((1, 1), (1, 2000), (95, 1234), (999, 1001)):
+                expected = start
+                for a, b, digits, product_digits in tabuada.segments(
+                        n1, start, stop):
+                    self.assertEqual(a, expected)
+                    self.assertLessEqual(a, b)
+                    for n2 in (a, b):
+                        self.assertEqual(len(str(n2)), digits)
+                        self.assertEqual(len(str(n1 * n2)), product_digits)
+                    expected = b + 1
+                self.assertEqual(expected, stop + 1)
+
+    def test_spans_limit_size(self):
+        spans = list(tabuada.spans(1, 3 * tabuada.SPAN + 5))
+        self.assertEqual(spans[0], (1, tabuada.SPAN))
+        self.assertEqual(spans[-1], (3 * tabuada.SPAN + 1, 3 * tabuada.SPAN + 5))
+        self.assertTrue(all(b - a < tabuada.SPAN for a, b in spans))
+
+
+class RenderTest(unittest.TestCase):
+
+    def test_text_matches_original(self):
+        for n1_range, n2_range in RANGES:
+            with self.subTest(n1=n1_range, n2=n2_range):
+                self.assertEqual(rendered(n1_range, n2_range).decode("ascii"),
+                                 original(n1_range, n2_range))
+
+    def test_default_output(self):
+        self.assertEqual(rendered((1, 10), (1, 10)).decode("ascii"),
+                         original((1, 10), (1, 10)))
+
+    def test_csv_and_binary(self):
+        for n1_range, n2_range in RANGES:
+            with self.subTest(n1=n1_range, n2=n2_range):
+                self.assertEqual(
+                    rendered(n1_range, n2_range, "csv").decode("ascii"),
+                    original_csv(n1_range, n2_range))
+                self.assertEqual(rendered(n1_range, n2_range, "binario"),
+                                 original_binary(n1_range, n2_range))
+
+    def test_block_length(self):
+        for output_format in tabuada.valid_formats:
+            for n1_range, n2_range in RANGES:
+                with self.subTest(formato=output_format, n1=n1_range):
+                    self.assertEqual(
+                        tabuada.output_length(n1_range, n2_range,
+                                              output_format),
+                        len(rendered(n1_range, n2_range, output_format)))
+
+    def test_small_chunks(self):
+        # Blocos e trechos pequenos não mudam o resultado
+        expected = {output_format: rendered((7, 13), (1, 150), output_format)
+                    for output_format in tabuada.valid_formats}
+        chunk_size, span = tabuada.CHUNK_SIZE, tabuada.SPAN
+        tabuada.CHUNK_SIZE, tabuada.SPAN = 64, 3
+        try:
+            for output_format in tabuada.valid_formats:
+                chunks = list(tabuada.render((7, 13), (1, 150),
+                                             output_format))
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual(b"".join(chunks), expected[output_format])
+        finally:
+            tabuada.CHUNK_SIZE, tabuada.SPAN = chunk_size, span
+
+
+class WriteFileTest(unittest.TestCase):
+
+    def test_workers_write_same_file(self):
+        shard_size = tabuada.SHARD_SIZE
+        tabuada.SHARD_SIZE = 4096
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                for output_format in tabuada.valid_formats:
+                    path = os.path.join(tmpdir, f"tabuada.{output_format}")
+                    tabuada.write_file(path, (1, 60), (1, 300),
+                                       output_format, workers=2)
+                    with open(path, "rb") as f:
+                        self.assertEqual(
+                            f.read(),
+                            rendered((1, 60), (1, 300), output_format))
+        finally:
+            tabuada.SHARD_SIZE = shard_size
+
+
+class ParseRangeTest(unittest.TestCase):
+
+    def test_ranges(self):
+        self.assertEqual(tabuada.parse_range("5", "n1"), (1, 5))
+        self.assertEqual(tabuada.parse_range("3:8", "n1"), (3, 8))
+        for text in ("0", "8:3", "a:b", "1:", ":"):
+            with self.subTest(text=text), \
+                    contextlib.redirect_stdout(io.StringIO()), \
+                    self.assertRaises(SystemExit):
+                tabuada.parse_range(text, "n1")
+
+
+if __name__ == "__main__":
+    unittest.main()